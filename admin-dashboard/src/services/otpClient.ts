@@ -6,6 +6,7 @@ export interface SendOtpResponse {
   expires_at: string
   resend_available_in: number
   method: 'sms' | 'voice'
+  delivery_status?: string
 }
 
 export interface VerifyOtpResponse {
@@ -21,6 +22,10 @@ export interface VerificationStatus {
   max_attempts: number
   expires_at?: string | null
   last_sent_at?: string | null
+  delivery_status?: string | null
+  delivery_attempts?: number
+  delivery_error?: string | null
+  delivered_at?: string | null
 }
 
 export const sendOtp = async (phoneNumber: string, method: 'sms' | 'voice' = 'sms'): Promise<SendOtpResponse> => {
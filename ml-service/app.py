@@ -1,22 +1,47 @@
-from fastapi import FastAPI
+import asyncio
 
-from db import engine
-from models import Base
+from fastapi import FastAPI, Response
+
+from autocomplete import run_refresher as run_autocomplete_refresher
+from config import get_settings
+from db import engine, pool_status
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, instrument_engine, register_pool_metrics, registry
+from migrate import check_schema_revision
+from otp_audit import audit_writer as otp_audit_writer
+from otp_outbox import run_worker as run_otp_outbox_worker
+from sql_profiler import SQLProfilerMiddleware, profile_engine
+from twilio_service import close_transports as close_twilio_transports
 from routers.settings import router as settings_router
 from routers.auth import router as auth_router
 from routers.files import router as files_router
 from routers.content import router as content_router
+from routers.search import router as search_router
+from routers.imports import router as imports_router
+from routers.exports import router as exports_router
 from routers.monetization import router as monetization_router
 from routers.uploads import router as uploads_router
 from routers.users import router as users_router
 
+settings = get_settings()
 app = FastAPI(title="ComedyInsight Configuration Service")
 
+if settings.enable_metrics:
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine.sync_engine)
+    register_pool_metrics(pool_status)
+
+if settings.sql_profiler_enabled:
+    app.add_middleware(SQLProfilerMiddleware)
+    profile_engine(engine.sync_engine)
+
 app.include_router(settings_router)
 app.include_router(auth_router)
 app.include_router(files_router)
 app.include_router(uploads_router)
 app.include_router(content_router)
+app.include_router(search_router)
+app.include_router(imports_router)
+app.include_router(exports_router)
 app.include_router(monetization_router)
 app.include_router(users_router)
 
@@ -26,6 +51,19 @@ async def health_check() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/health/db-pool", tags=["system"])
+async def db_pool_health() -> dict[str, float]:
+    """Connection pool occupancy and checkout waits since startup."""
+    return pool_status()
+
+
+if settings.enable_metrics:
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics() -> Response:
+        return Response(content=registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/predict", tags=["ml"])
 async def predict_stub() -> dict[str, str]:
     return {"message": "ML service placeholder"}
@@ -33,6 +71,24 @@ async def predict_stub() -> dict[str, str]:
 
 @app.on_event("startup")
 async def on_startup() -> None:
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Migrations are applied by `python migrate.py upgrade`; workers only confirm the revision.
+    async with engine.connect() as conn:
+        await check_schema_revision(conn)
+    app.state.background_tasks = [
+        asyncio.create_task(otp_audit_writer.run()),
+        asyncio.create_task(run_autocomplete_refresher(settings.autocomplete_refresh_seconds)),
+    ]
+    if settings.otp_outbox_inline_worker:
+        app.state.background_tasks.append(asyncio.create_task(run_otp_outbox_worker()))
+
 
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    for task in getattr(app.state, "background_tasks", []):
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+    await otp_audit_writer.flush()
+    await close_twilio_transports()
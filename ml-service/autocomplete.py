@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from models import Artist, Category, Video
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+_WORD = re.compile(r"[^\W_]+")
+
+Entry = Tuple[str, str, str, int]  # (normalized key, kind, id, index of the first word in key)
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    type: str
+    id: str
+    label: str
+    slug: str
+    status: str
+    featured: bool
+
+
+def normalize(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(_WORD.findall(stripped))
+
+
+def _keys(label: str) -> List[Tuple[str, int]]:
+    """The full label plus every suffix starting at a later word, so
+    "Jerry Seinfeld" is found by both "jer" and "sein"."""
+    words = normalize(label).split(" ")
+    return [(" ".join(words[start:]), start) for start in range(len(words)) if words[start]]
+
+
+class AutocompleteIndex:
+    """Prefix index over a sorted array of normalized keys.
+
+    A lookup bisects to the first key with the prefix and scans forward, so
+    it costs O(log n + scan_limit) and never touches the database. Matches are
+    ranked featured first, then whole-label matches, then shorter labels; for
+    very short prefixes only the first ``scan_limit`` keys are considered.
+    """
+
+    def __init__(self, scan_limit: int) -> None:
+        self.scan_limit = scan_limit
+        self._entries: List[Entry] = []
+        self._docs: Dict[Tuple[str, str], Suggestion] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def replace_all(self, suggestions: Iterable[Suggestion]) -> None:
+        docs = {(item.type, item.id): item for item in suggestions}
+        entries = sorted(
+            (key, kind, doc_id, start) for (kind, doc_id), item in docs.items() for key, start in _keys(item.label)
+        )
+        with self._lock:
+            self._docs = docs
+            self._entries = entries
+
+    def _remove_locked(self, kind: str, doc_id: str) -> None:
+        previous = self._docs.pop((kind, doc_id), None)
+        if previous is None:
+            return
+        for key, start in _keys(previous.label):
+            entry = (key, kind, doc_id, start)
+            position = bisect.bisect_left(self._entries, entry)
+            if position < len(self._entries) and self._entries[position] == entry:
+                del self._entries[position]
+
+    def upsert(self, suggestion: Suggestion) -> None:
+        with self._lock:
+            self._remove_locked(suggestion.type, suggestion.id)
+            self._docs[(suggestion.type, suggestion.id)] = suggestion
+            for key, start in _keys(suggestion.label):
+                bisect.insort(self._entries, (key, suggestion.type, suggestion.id, start))
+
+    def remove(self, kind: str, doc_id: object) -> None:
+        with self._lock:
+            self._remove_locked(kind, str(doc_id))
+
+    def lookup(
+        self,
+        prefix: str,
+        limit: int,
+        types: Optional[Sequence[str]] = None,
+        status_filter: Optional[str] = None,
+    ) -> List[Suggestion]:
+        needle = normalize(prefix)
+        if not needle:
+            return []
+        candidates: Dict[Tuple[str, str], Tuple[bool, bool, int, str]] = {}
+        with self._lock:
+            position = bisect.bisect_left(self._entries, (needle,))
+            scanned = 0
+            while position < len(self._entries) and scanned < self.scan_limit:
+                key, kind, doc_id, start = self._entries[position]
+                if not key.startswith(needle):
+                    break
+                position += 1
+                scanned += 1
+                doc = self._docs[(kind, doc_id)]
+                if (types and kind not in types) or (status_filter and doc.status != status_filter):
+                    continue
+                rank = (not doc.featured, start > 0, len(doc.label), key)
+                current = candidates.get((kind, doc_id))
+                if current is None or rank < current:
+                    candidates[(kind, doc_id)] = rank
+            ranked = sorted(candidates.items(), key=lambda item: item[1])[:limit]
+            return [self._docs[doc_key] for doc_key, _ in ranked]
+
+
+def _active_status(is_active: Optional[bool]) -> str:
+    return "active" if is_active else "inactive"
+
+
+def video_suggestion(video: Video) -> Suggestion:
+    return Suggestion("video", str(video.id), video.title, video.slug, video.status, bool(video.is_featured))
+
+
+def artist_suggestion(artist: Artist) -> Suggestion:
+    return Suggestion("artist", str(artist.id), artist.name, artist.slug, _active_status(artist.is_active), bool(artist.is_featured))
+
+
+def category_suggestion(category: Category) -> Suggestion:
+    return Suggestion("category", str(category.id), category.name, category.slug, _active_status(category.is_active), False)
+
+
+async def _load(session: AsyncSession) -> List[Suggestion]:
+    suggestions: List[Suggestion] = []
+    rows = await session.execute(select(Video.id, Video.title, Video.slug, Video.status, Video.is_featured))
+    suggestions.extend(Suggestion("video", str(row.id), row.title, row.slug, row.status, bool(row.is_featured)) for row in rows)
+    rows = await session.execute(select(Artist.id, Artist.name, Artist.slug, Artist.is_active, Artist.is_featured))
+    suggestions.extend(
+        Suggestion("artist", str(row.id), row.name, row.slug, _active_status(row.is_active), bool(row.is_featured)) for row in rows
+    )
+    rows = await session.execute(select(Category.id, Category.name, Category.slug, Category.is_active))
+    suggestions.extend(Suggestion("category", str(row.id), row.name, row.slug, _active_status(row.is_active), False) for row in rows)
+    return suggestions
+
+
+async def rebuild_index(session: AsyncSession) -> int:
+    autocomplete_index.replace_all(await _load(session))
+    return len(autocomplete_index)
+
+
+async def run_refresher(interval: float) -> None:
+    """Build the index, then rebuild it periodically so writes made by other processes show up.
+
+    Runs as a startup background task, so the first build does not hold up
+    startup; suggestions are empty until it finishes.
+    """
+    from db import SessionLocal
+
+    while True:
+        try:
+            async with SessionLocal() as session:
+                await rebuild_index(session)
+        except Exception:  # noqa: BLE001
+            logger.exception("Failed to refresh autocomplete index")
+        await asyncio.sleep(interval)
+
+
+autocomplete_index = AutocompleteIndex(scan_limit=settings.autocomplete_scan_limit)
@@ -0,0 +1,320 @@
+"""Reconcile file_objects against the objects actually stored in the bucket.
+
+Run ``python bucket_inventory.py --concurrency 16`` to backfill etag/size_bytes and flag orphans.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass, fields
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import FileObject, StorageOrphan
+from storage_usage import Totals, add_change, apply_usage_deltas
+
+MISSING_OBJECT = "missing_object"
+UNTRACKED_OBJECT = "untracked_object"
+
+
+@dataclass(frozen=True)
+class Partition:
+    prefix: str
+    recursive: bool
+
+
+@dataclass
+class InventoryStats:
+    listed: int = 0
+    matched: int = 0
+    backfilled: int = 0
+    missing: int = 0
+    untracked: int = 0
+
+    def add(self, other: "InventoryStats") -> None:
+        for item in fields(self):
+            setattr(self, item.name, getattr(self, item.name) + getattr(other, item.name))
+
+
+async def _common_prefixes(storage, prefix: str) -> List[str]:
+    prefixes: List[str] = []
+    token: Optional[str] = None
+    while True:
+        response = await storage.list_objects_async(prefix=prefix or None, continuation_token=token, delimiter="/")
+        prefixes.extend(item["Prefix"] for item in response.get("CommonPrefixes", []))
+        if not response.get("IsTruncated"):
+            return prefixes
+        token = response.get("NextContinuationToken")
+
+
+async def tracked_prefixes(session: AsyncSession, bucket: str, depth: int) -> Set[str]:
+    """Every ``/`` delimited prefix, up to ``depth`` levels, of the live keys in ``file_objects``."""
+    prefix = func.substring(FileObject.key, f"^((?:[^/]*/){{1,{depth}}})")
+    result = await session.execute(
+        select(prefix).where(FileObject.bucket == bucket, FileObject.deleted_at.is_(None)).distinct()
+    )
+    prefixes: Set[str] = set()
+    for (value,) in result.all():
+        while value:
+            prefixes.add(value)
+            value = value[: value.rstrip("/").rfind("/") + 1]
+    return prefixes
+
+
+def _children(prefix: str, candidates: Iterable[str]) -> List[str]:
+    return [
+        candidate
+        for candidate in candidates
+        if candidate.startswith(prefix) and candidate != prefix and candidate[len(prefix) :].count("/") == 1
+    ]
+
+
+async def discover_partitions(storage, depth: int, tracked: Iterable[str] = ()) -> List[Partition]:
+    """Split the bucket into disjoint key ranges by walking ``/`` delimited prefixes.
+
+    With the default depth of 4 the leaves are the ``uploads/YYYY/MM/DD/`` days
+    produced by ``generate_object_key``; objects sitting directly under an
+    intermediate prefix get a non-recursive partition of their own.
+
+    ``tracked`` adds the prefixes known from ``file_objects``, so a prefix
+    whose objects were all deleted from the bucket still gets a partition
+    and its rows are flagged missing.
+    """
+    tracked = set(tracked)
+    partitions: List[Partition] = []
+    frontier = [""]
+    for _ in range(depth):
+        listed = await asyncio.gather(*(_common_prefixes(storage, prefix) for prefix in frontier))
+        partitions.extend(Partition(prefix, recursive=False) for prefix in frontier)
+        frontier = sorted(
+            {child for prefix, group in zip(frontier, listed) for child in (*group, *_children(prefix, tracked))}
+        )
+        if not frontier:
+            break
+    partitions.extend(Partition(prefix, recursive=True) for prefix in frontier)
+    return partitions
+
+
+def _partition_filters(model, partition: Partition) -> List[Any]:
+    key = model.key.collate("C")
+    filters: List[Any] = []
+    if partition.prefix:
+        filters.append(key.startswith(partition.prefix, autoescape=True))
+    if not partition.recursive:
+        filters.append(func.strpos(func.substr(model.key, len(partition.prefix) + 1), "/") == 0)
+    return filters
+
+
+async def _iter_objects(storage, partition: Partition) -> AsyncIterator[Dict[str, Any]]:
+    token: Optional[str] = None
+    while True:
+        response = await storage.list_objects_async(
+            prefix=partition.prefix or None,
+            continuation_token=token,
+            delimiter=None if partition.recursive else "/",
+        )
+        for obj in response.get("Contents", []):
+            yield obj
+        if not response.get("IsTruncated"):
+            return
+        token = response.get("NextContinuationToken")
+
+
+async def _iter_rows(session: AsyncSession, bucket: str, partition: Partition, batch_size: int) -> AsyncIterator[Any]:
+    key = FileObject.key.collate("C")
+    query = (
+        select(
+            FileObject.id, FileObject.key, FileObject.content_type, FileObject.size_bytes, FileObject.etag, FileObject.uploaded_at
+        )
+        .where(FileObject.bucket == bucket, FileObject.deleted_at.is_(None), *_partition_filters(FileObject, partition))
+        .order_by(key)
+        .limit(batch_size)
+    )
+    last_key: Optional[str] = None
+    while True:
+        page = query if last_key is None else query.where(key > last_key)
+        rows = (await session.execute(page)).all()
+        for row in rows:
+            yield row
+        if len(rows) < batch_size:
+            return
+        last_key = rows[-1].key
+
+
+async def _next(iterator: AsyncIterator[Any]) -> Any:
+    try:
+        return await iterator.__anext__()
+    except StopAsyncIteration:
+        return None
+
+
+class _PartitionWriter:
+    def __init__(self, session: AsyncSession, bucket: str) -> None:
+        self.session = session
+        self.bucket = bucket
+        self.updates: List[Dict[str, Any]] = []
+        self.orphans: List[Dict[str, Any]] = []
+        self.usage: Totals = defaultdict(lambda: [0, 0])
+
+    def __len__(self) -> int:
+        return len(self.updates) + len(self.orphans)
+
+    def backfill(self, row: Any, size_bytes: int, etag: Optional[str]) -> None:
+        self.updates.append({"file_id": row.id, "new_size": size_bytes, "new_etag": etag})
+        # A presigned upload starts counting once its object is found; a corrected size moves usage by the difference.
+        add_change(self.usage, row.key, row.content_type, (row.size_bytes, row.etag), (size_bytes, etag))
+
+    def orphan(self, kind: str, key: str, file_id: Optional[uuid.UUID], size_bytes: Optional[int], etag: Optional[str]) -> None:
+        self.orphans.append(
+            {
+                "id": uuid.uuid4(),
+                "bucket": self.bucket,
+                "key": key,
+                "kind": kind,
+                "file_id": file_id,
+                "size_bytes": size_bytes,
+                "etag": etag,
+                "detected_at": datetime.utcnow(),
+            }
+        )
+
+    async def flush(self) -> None:
+        if self.updates:
+            statement = (
+                update(FileObject.__table__)
+                .where(FileObject.__table__.c.id == bindparam("file_id"))
+                .values(size_bytes=bindparam("new_size"), etag=bindparam("new_etag"), updated_at=datetime.utcnow())
+            )
+            await self.session.execute(statement, self.updates)
+            await apply_usage_deltas(self.session, self.bucket, self.usage)
+        if self.orphans:
+            statement = pg_insert(StorageOrphan).values(self.orphans)
+            statement = statement.on_conflict_do_update(
+                constraint="uq_storage_orphan_key",
+                set_={
+                    "kind": statement.excluded.kind,
+                    "file_id": statement.excluded.file_id,
+                    "size_bytes": statement.excluded.size_bytes,
+                    "etag": statement.excluded.etag,
+                    "detected_at": statement.excluded.detected_at,
+                },
+            )
+            await self.session.execute(statement)
+        await self.session.commit()
+        self.updates.clear()
+        self.orphans.clear()
+        self.usage.clear()
+
+
+async def reconcile_partition(
+    session: AsyncSession,
+    storage,
+    partition: Partition,
+    batch_size: int,
+    cutoff: datetime,
+) -> InventoryStats:
+    """Merge-join one partition's sorted listing against its sorted rows.
+
+    S3 returns keys in binary order and rows are read with ``COLLATE "C"``, so
+    both sides stream in the same order and memory stays bounded by
+    ``batch_size`` regardless of partition size.
+    """
+    bucket = storage.credentials.bucket
+    stats = InventoryStats()
+    writer = _PartitionWriter(session, bucket)
+    await session.execute(
+        delete(StorageOrphan).where(StorageOrphan.bucket == bucket, *_partition_filters(StorageOrphan, partition))
+    )
+
+    objects = _iter_objects(storage, partition)
+    rows = _iter_rows(session, bucket, partition, batch_size)
+    obj = await _next(objects)
+    row = await _next(rows)
+    while obj is not None or row is not None:
+        if row is None or (obj is not None and obj["Key"] < row.key):
+            stats.listed += 1
+            stats.untracked += 1
+            writer.orphan(UNTRACKED_OBJECT, obj["Key"], None, obj.get("Size"), (obj.get("ETag") or "").strip('"') or None)
+            obj = await _next(objects)
+        elif obj is None or row.key < obj["Key"]:
+            if row.uploaded_at < cutoff:
+                stats.missing += 1
+                writer.orphan(MISSING_OBJECT, row.key, row.id, row.size_bytes, row.etag)
+            row = await _next(rows)
+        else:
+            stats.listed += 1
+            stats.matched += 1
+            etag = (obj.get("ETag") or "").strip('"') or None
+            size = obj.get("Size", 0)
+            if row.etag != etag or row.size_bytes != size:
+                stats.backfilled += 1
+                writer.backfill(row, size, etag)
+            obj = await _next(objects)
+            row = await _next(rows)
+        if len(writer) >= batch_size:
+            await writer.flush()
+    await writer.flush()
+    return stats
+
+
+async def run_inventory(
+    storage,
+    concurrency: int = 8,
+    batch_size: int = 1000,
+    grace_seconds: int = 3600,
+    depth: int = 4,
+) -> InventoryStats:
+    from db import SessionLocal
+
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=grace_seconds)
+    async with SessionLocal() as session:
+        tracked = await tracked_prefixes(session, storage.credentials.bucket, depth)
+    partitions = await discover_partitions(storage, depth, tracked)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def worker(partition: Partition) -> InventoryStats:
+        async with semaphore:
+            async with SessionLocal() as session:
+                return await reconcile_partition(session, storage, partition, batch_size, cutoff)
+
+    totals = InventoryStats()
+    for stats in await asyncio.gather(*(worker(partition) for partition in partitions)):
+        totals.add(stats)
+    return totals
+
+
+async def _main(args: argparse.Namespace) -> None:
+    from db import SessionLocal
+    from storage_service import StorageService
+
+    async with SessionLocal() as session:
+        storage = await StorageService.from_session(session)
+    started = time.monotonic()
+    stats = await run_inventory(storage, args.concurrency, args.batch_size, args.grace_seconds, args.depth)
+    elapsed = time.monotonic() - started
+    rate = stats.listed / elapsed if elapsed else 0.0
+    print(
+        f"{storage.credentials.bucket}: listed={stats.listed} matched={stats.matched} backfilled={stats.backfilled} "
+        f"missing={stats.missing} untracked={stats.untracked} in {elapsed:.1f}s ({rate:.0f} keys/s)"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Reconcile file_objects against the storage bucket")
+    parser.add_argument("--concurrency", type=int, default=8, help="Partitions reconciled in parallel")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows read and written per batch")
+    parser.add_argument("--grace-seconds", type=int, default=3600, help="Skip rows newer than this when flagging missing objects")
+    parser.add_argument("--depth", type=int, default=4, help="Prefix levels to split the bucket on")
+    asyncio.run(_main(parser.parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.orm import aliased
+
+from catalog_import import FORMATS, LIST_SEPARATOR
+from models import Artist, Category, Subtitle, Video, video_artists, video_categories
+
+EXPORT_KINDS = ("videos", "artists", "categories", "subtitles")
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def parse_export_kind(raw: str) -> str:
+    if raw not in EXPORT_KINDS:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown export '{raw}'")
+    return raw
+
+
+def parse_export_format(raw: str) -> str:
+    value = raw.lower()
+    if value not in FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported export format '{raw}'")
+    return value
+
+
+def _slugs(model, link_table, link_column):
+    """Correlated ``array_agg`` of linked slugs, so each video row carries them without extra round trips."""
+    return (
+        select(func.array_agg(aggregate_order_by(model.slug, model.slug)))
+        .select_from(link_table.join(model, link_column == model.id))
+        .where(link_table.c.video_id == Video.id)
+        .scalar_subquery()
+    )
+
+
+def _videos() -> Select:
+    return select(
+        Video.id,
+        Video.title,
+        Video.slug,
+        Video.description,
+        Video.thumbnail_url,
+        Video.video_url,
+        Video.duration_seconds,
+        Video.status,
+        Video.release_date,
+        Video.is_featured,
+        Video.__table__.c.metadata,
+        _slugs(Artist, video_artists, video_artists.c.artist_id).label("artist_slugs"),
+        _slugs(Category, video_categories, video_categories.c.category_id).label("category_slugs"),
+        Video.created_at,
+        Video.updated_at,
+    )
+
+
+def _artists() -> Select:
+    return select(
+        Artist.id,
+        Artist.name,
+        Artist.slug,
+        Artist.bio,
+        Artist.profile_image_url,
+        Artist.is_active,
+        Artist.is_featured,
+        Artist.created_at,
+        Artist.updated_at,
+    )
+
+
+def _categories() -> Select:
+    parent = aliased(Category)
+    return select(
+        Category.id,
+        Category.name,
+        Category.slug,
+        Category.description,
+        Category.parent_id,
+        parent.slug.label("parent_slug"),
+        Category.display_order,
+        Category.is_active,
+        Category.created_at,
+        Category.updated_at,
+    ).outerjoin(parent, Category.parent_id == parent.id)
+
+
+def build_export_query(kind: str, updated_since: Optional[datetime] = None) -> Select:
+    """Rows for ``kind`` in ``(updated_at, id)`` order, optionally only those changed since ``updated_since``.
+
+    Subtitles have no ``updated_at`` of their own; any subtitle change bumps
+    its video, so they are filtered on the video's instead.
+    """
+    if kind == "subtitles":
+        query = (
+            select(
+                Subtitle.id,
+                Subtitle.video_id,
+                Video.slug.label("video_slug"),
+                Subtitle.language,
+                Subtitle.label,
+                Subtitle.file_url,
+                Subtitle.created_at,
+            )
+            .join(Video, Subtitle.video_id == Video.id)
+            .order_by(Video.updated_at, Video.id, Subtitle.id)
+        )
+        if updated_since is not None:
+            query = query.where(Video.updated_at >= updated_since)
+        return query
+
+    model = {"videos": Video, "artists": Artist, "categories": Category}[kind]
+    query = {"videos": _videos, "artists": _artists, "categories": _categories}[kind]().order_by(model.updated_at, model.id)
+    if updated_since is not None:
+        query = query.where(model.updated_at >= updated_since)
+    return query
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _csv_cell(value: Any) -> Any:
+    # Mirrors what catalog_import accepts, so an export can be imported again as-is.
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, list):
+        return LIST_SEPARATOR.join(value)
+    if isinstance(value, dict):
+        return json.dumps(value, default=_json_default)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class _Encoder(ABC):
+    def __init__(self, columns: Sequence[str], list_columns: Sequence[str]) -> None:
+        self.columns = list(columns)
+        self.list_columns = list_columns
+
+    def header(self) -> bytes:
+        return b""
+
+    @abstractmethod
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        """Serialize one batch of rows."""
+
+
+class _NDJSONEncoder(_Encoder):
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        lines = []
+        for row in rows:
+            record = dict(row)
+            for column in self.list_columns:
+                record[column] = record[column] or []
+            lines.append(json.dumps(record, default=_json_default, ensure_ascii=False))
+        return ("\n".join(lines) + "\n").encode()
+
+
+class _CSVEncoder(_Encoder):
+    def __init__(self, columns: Sequence[str], list_columns: Sequence[str]) -> None:
+        super().__init__(columns, list_columns)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+
+    def _drain(self) -> bytes:
+        text = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return text.encode()
+
+    def header(self) -> bytes:
+        self._writer.writerow(self.columns)
+        return self._drain()
+
+    def encode(self, rows: List[Dict[str, Any]]) -> bytes:
+        self._writer.writerows([_csv_cell(row[column]) for column in self.columns] for row in rows)
+        return self._drain()
+
+
+async def stream_export(kind: str, export_format: str, updated_since: Optional[datetime], batch_size: int) -> AsyncIterator[bytes]:
+    """Yield the export in ``batch_size``-row chunks read from a server-side cursor.
+
+    The generator owns its session: it outlives the request handler, and only
+    one batch is held in memory at a time however large the table is.
+    """
+    from db import SessionLocal
+
+    query = build_export_query(kind, updated_since).execution_options(yield_per=batch_size)
+    columns = [column.name for column in query.selected_columns]
+    list_columns = [column for column in ("artist_slugs", "category_slugs") if column in columns]
+    encoder = (_CSVEncoder if export_format == "csv" else _NDJSONEncoder)(columns, list_columns)
+    header = encoder.header()
+    if header:
+        yield header
+    async with SessionLocal() as session:
+        result = await session.stream(query)
+        async for rows in result.mappings().partitions():
+            yield encoder.encode(rows)
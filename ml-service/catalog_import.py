@@ -0,0 +1,453 @@
+"""Bulk-load artists, categories and videos from NDJSON or CSV.
+
+Run ``python catalog_import.py videos partner.ndjson --batch-size 2000`` (``-`` reads stdin).
+
+Input is parsed as it streams. Rows are validated, their artist/category slugs
+resolved with one query per batch, and each batch is written with multi-row
+``INSERT ... ON CONFLICT DO NOTHING`` statements in a single transaction. A row
+that fails is reported by line number and never aborts the rest of the import.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import codecs
+import csv
+import json
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Table, insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from autocomplete import rebuild_index
+from config import get_settings
+from models import Artist, Category, Subtitle, Video, video_artists, video_categories
+from schemas import ArtistImportRow, CategoryImportRow, VideoImportRow
+
+settings = get_settings()
+
+KINDS = ("artists", "categories", "videos")
+FORMATS = ("ndjson", "csv")
+MAX_BATCH_SIZE = 10000
+
+# CSV cells for list columns hold slugs separated by "|"; JSON columns hold a JSON document.
+LIST_SEPARATOR = "|"
+_LIST_COLUMNS = {"artist_slugs", "category_slugs"}
+_JSON_COLUMNS = {"metadata", "subtitles"}
+
+_ROW_MODELS = {"artists": ArtistImportRow, "categories": CategoryImportRow, "videos": VideoImportRow}
+
+# Slug -> id lookups are cached across batches; the cache is dropped once it grows past this.
+_KNOWN_SLUG_LIMIT = 100_000
+
+Record = Tuple[int, Optional[Dict[str, Any]], Optional[str]]  # (line, values, parse error)
+Rejection = Tuple[int, Optional[str], str]  # (line, slug, error)
+
+
+def parse_kind(raw: str) -> str:
+    if raw not in KINDS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported import kind '{raw}'")
+    return raw
+
+
+def parse_format(raw: Optional[str], content_type: Optional[str] = None) -> str:
+    if raw:
+        value = raw.lower()
+        if value not in FORMATS:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unsupported import format '{raw}'")
+        return value
+    return "csv" if content_type and "csv" in content_type.lower() else "ndjson"
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    number = 0
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *complete, pending = pending.split("\n")
+        for line in complete:
+            number += 1
+            yield number, line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield number + 1, pending.rstrip("\r")
+
+
+async def _ndjson_records(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[Record]:
+    async for number, line in lines:
+        if not line.strip():
+            continue
+        try:
+            values = json.loads(line)
+        except ValueError as exc:
+            yield number, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(values, dict):
+            yield number, None, "Expected a JSON object"
+            continue
+        yield number, values, None
+
+
+def _csv_values(header: List[str], cells: List[str]) -> Dict[str, Any]:
+    values: Dict[str, Any] = {}
+    for name, raw in zip(header, cells):
+        cell = raw.strip()
+        if not cell:
+            continue
+        if name in _LIST_COLUMNS:
+            values[name] = [item.strip() for item in cell.split(LIST_SEPARATOR) if item.strip()]
+        elif name in _JSON_COLUMNS:
+            values[name] = json.loads(cell)
+        else:
+            values[name] = cell
+    return values
+
+
+async def _csv_records(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[Record]:
+    header: Optional[List[str]] = None
+    pending, start = "", 0
+    async for number, line in lines:
+        if pending:
+            pending += "\n" + line
+        else:
+            pending, start = line, number
+        if pending.count('"') % 2:
+            continue  # a quoted cell carries on to the next line
+        text, pending = pending, ""
+        if not text.strip():
+            continue
+        cells = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in cells]
+            continue
+        if len(cells) != len(header):
+            yield start, None, f"Expected {len(header)} columns, got {len(cells)}"
+            continue
+        try:
+            values = _csv_values(header, cells)
+        except ValueError as exc:
+            yield start, None, f"Invalid JSON cell: {exc}"
+            continue
+        yield start, values, None
+    if pending:
+        yield start, None, "Unterminated quoted cell"
+
+
+def _describe(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors())
+
+
+def _slug_of(values: Optional[Dict[str, Any]]) -> Optional[str]:
+    slug = values.get("slug") if values else None
+    return slug if isinstance(slug, str) else None
+
+
+def _row(table: Table, values: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    row = {"id": uuid.uuid4(), **values, "created_at": now, "updated_at": now}
+    for column in table.c:
+        # Explicit nulls in the input fall back to the column default, as they would through the ORM.
+        default = column.default
+        if row.get(column.key) is not None or column.nullable or default is None:
+            continue
+        if default.is_scalar:
+            row[column.key] = default.arg
+        elif default.is_callable:
+            # SQLAlchemy wraps callables to take an execution context; ours (dict, uuid4, utcnow) ignore it.
+            row[column.key] = default.arg(None)
+    return row
+
+
+@dataclass
+class ImportReport:
+    kind: str
+    format: str
+    max_errors: int
+    processed: int = 0
+    created: int = 0
+    failed: int = 0
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    started: float = field(default_factory=time.monotonic)
+
+    def fail(self, line: int, slug: Optional[str], error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "slug": slug, "error": error})
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "format": self.format,
+            "processed": self.processed,
+            "created": self.created,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda error: error["line"]),
+            "errors_truncated": self.failed > len(self.errors),
+            "elapsed_seconds": round(time.monotonic() - self.started, 3),
+        }
+
+
+class CatalogImporter:
+    """Validates rows and writes them ``batch_size`` at a time, one transaction per batch.
+
+    A batch that the database rejects outright (for example a constraint the
+    row models do not check, or a parent removed mid-import) is rolled back
+    and written again one row per transaction, so only the offending rows
+    are reported; earlier batches stay committed.
+    """
+
+    def __init__(self, session: AsyncSession, kind: str, report: ImportReport, batch_size: int) -> None:
+        self.session = session
+        self.kind = kind
+        self.report = report
+        self.batch_size = batch_size
+        self._row_model = _ROW_MODELS[kind]
+        self._batch: List[Tuple[int, BaseModel]] = []
+        self._batch_slugs: Set[str] = set()
+        self._known: Dict[str, Dict[str, uuid.UUID]] = {"artist": {}, "category": {}}
+
+    async def add(self, line: int, values: Optional[Dict[str, Any]], error: Optional[str]) -> None:
+        self.report.processed += 1
+        if error is not None:
+            self.report.fail(line, _slug_of(values), error)
+            return
+        try:
+            row = self._row_model.model_validate(values)
+        except ValidationError as exc:
+            self.report.fail(line, _slug_of(values), _describe(exc))
+            return
+        if self.kind == "categories" and row.parent_slug in self._batch_slugs:
+            await self.flush()  # the parent has to be committed before a child can point at it
+        self._batch.append((line, row))
+        self._batch_slugs.add(row.slug)
+        if len(self._batch) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        batch, self._batch = self._batch, []
+        self._batch_slugs = set()
+        if not batch:
+            return
+        if len(batch) > 1:
+            try:
+                await self._commit(batch)
+                return
+            except SQLAlchemyError:
+                await self.session.rollback()
+        # Single rows, or a rejected batch retried row by row so only the offending rows fail.
+        for item in batch:
+            await self._flush_one(item)
+
+    async def _flush_one(self, item: Tuple[int, BaseModel]) -> None:
+        try:
+            await self._commit([item])
+        except SQLAlchemyError as exc:
+            await self.session.rollback()
+            line, row = item
+            self.report.fail(line, row.slug, f"Rejected by the database: {getattr(exc, 'orig', exc)}")
+
+    async def _commit(self, batch: List[Tuple[int, BaseModel]]) -> None:
+        write = {"artists": self._write_artists, "categories": self._write_categories, "videos": self._write_videos}[self.kind]
+        created, rejected = await write(batch)
+        await self.session.commit()
+        self.report.created += len(created)
+        for line, slug, error in rejected:
+            self.report.fail(line, slug, error)
+        if self.kind != "videos":
+            self._remember("artist" if self.kind == "artists" else "category", created)
+
+    def _remember(self, kind: str, slugs: Dict[str, uuid.UUID]) -> None:
+        known = self._known[kind]
+        if len(known) + len(slugs) > _KNOWN_SLUG_LIMIT:
+            known.clear()
+        known.update(slugs)
+
+    async def _resolve(self, kind: str, model, slugs: Iterable[str]) -> Dict[str, uuid.UUID]:
+        known = self._known[kind]
+        wanted = set(slugs)
+        missing = wanted - known.keys()
+        if missing:
+            result = await self.session.execute(select(model.slug, model.id).where(model.slug.in_(missing)))
+            self._remember(kind, {slug: row_id for slug, row_id in result.all()})
+        return {slug: known[slug] for slug in wanted if slug in known}
+
+    async def _insert(self, table: Table, rows: List[Dict[str, Any]]) -> Set[uuid.UUID]:
+        if not rows:
+            return set()
+        statement = pg_insert(table).on_conflict_do_nothing().returning(table.c.id)
+        result = await self.session.execute(statement, rows)
+        return set(result.scalars().all())
+
+    @staticmethod
+    def _split(
+        accepted: List[Tuple[int, BaseModel]], rows: List[Dict[str, Any]], inserted: Set[uuid.UUID], conflict: str
+    ) -> Tuple[Dict[str, uuid.UUID], List[Rejection]]:
+        created: Dict[str, uuid.UUID] = {}
+        rejected: List[Rejection] = []
+        for (line, row), values in zip(accepted, rows):
+            if values["id"] in inserted:
+                created[row.slug] = values["id"]
+            else:
+                rejected.append((line, row.slug, conflict))
+        return created, rejected
+
+    async def _write_artists(self, batch: List[Tuple[int, BaseModel]]) -> Tuple[Dict[str, uuid.UUID], List[Rejection]]:
+        now = datetime.utcnow()
+        table = Artist.__table__
+        rows = [_row(table, row.model_dump(), now) for _, row in batch]
+        return self._split(batch, rows, await self._insert(table, rows), "Artist with this name or slug already exists")
+
+    async def _write_categories(self, batch: List[Tuple[int, BaseModel]]) -> Tuple[Dict[str, uuid.UUID], List[Rejection]]:
+        parents = await self._resolve("category", Category, (row.parent_slug for _, row in batch if row.parent_slug))
+        parent_ids = {row.parent_id for _, row in batch if row.parent_id and not row.parent_slug}
+        if parent_ids:
+            result = await self.session.execute(select(Category.id).where(Category.id.in_(parent_ids)))
+            existing = set(result.scalars().all())
+        else:
+            existing = set()
+
+        now = datetime.utcnow()
+        table = Category.__table__
+        accepted: List[Tuple[int, BaseModel]] = []
+        rows: List[Dict[str, Any]] = []
+        rejected: List[Rejection] = []
+        for line, row in batch:
+            values = row.model_dump(exclude={"parent_slug"})
+            if row.parent_slug:
+                if row.parent_slug not in parents:
+                    rejected.append((line, row.slug, f"Unknown parent category slug: {row.parent_slug}"))
+                    continue
+                values["parent_id"] = parents[row.parent_slug]
+            elif row.parent_id and row.parent_id not in existing:
+                rejected.append((line, row.slug, f"Unknown parent category id: {row.parent_id}"))
+                continue
+            accepted.append((line, row))
+            rows.append(_row(table, values, now))
+        created, conflicts = self._split(accepted, rows, await self._insert(table, rows), "Category with this name or slug already exists")
+        return created, rejected + conflicts
+
+    async def _write_videos(self, batch: List[Tuple[int, BaseModel]]) -> Tuple[Dict[str, uuid.UUID], List[Rejection]]:
+        artists = await self._resolve("artist", Artist, (slug for _, row in batch for slug in row.artist_slugs))
+        categories = await self._resolve("category", Category, (slug for _, row in batch for slug in row.category_slugs))
+
+        now = datetime.utcnow()
+        table = Video.__table__
+        accepted: List[Tuple[int, BaseModel]] = []
+        rows: List[Dict[str, Any]] = []
+        rejected: List[Rejection] = []
+        for line, row in batch:
+            unknown = [f"artist '{slug}'" for slug in row.artist_slugs if slug not in artists]
+            unknown += [f"category '{slug}'" for slug in row.category_slugs if slug not in categories]
+            if unknown:
+                rejected.append((line, row.slug, f"Unknown {', '.join(unknown)}"))
+                continue
+            accepted.append((line, row))
+            rows.append(_row(table, row.model_dump(exclude={"artist_slugs", "category_slugs", "subtitles"}), now))
+        inserted = await self._insert(table, rows)
+        created, conflicts = self._split(accepted, rows, inserted, "Video with this slug already exists")
+
+        artist_links: List[Dict[str, Any]] = []
+        category_links: List[Dict[str, Any]] = []
+        subtitles: List[Dict[str, Any]] = []
+        for (_, row), values in zip(accepted, rows):
+            video_id = values["id"]
+            if video_id not in inserted:
+                continue
+            artist_links.extend(
+                {"video_id": video_id, "artist_id": artists[slug], "created_at": now} for slug in dict.fromkeys(row.artist_slugs)
+            )
+            category_links.extend(
+                {"video_id": video_id, "category_id": categories[slug], "created_at": now}
+                for slug in dict.fromkeys(row.category_slugs)
+            )
+            subtitles.extend(
+                {"id": uuid.uuid4(), "video_id": video_id, **subtitle.model_dump(), "created_at": now} for subtitle in row.subtitles
+            )
+        if artist_links:
+            await self.session.execute(insert(video_artists), artist_links)
+        if category_links:
+            await self.session.execute(insert(video_categories), category_links)
+        if subtitles:
+            await self.session.execute(insert(Subtitle.__table__), subtitles)
+        return created, rejected + conflicts
+
+
+async def import_catalog(
+    session: AsyncSession,
+    kind: str,
+    input_format: str,
+    chunks: AsyncIterator[bytes],
+    batch_size: int,
+    max_errors: int,
+) -> ImportReport:
+    report = ImportReport(kind=kind, format=input_format, max_errors=max_errors)
+    importer = CatalogImporter(session, kind, report, batch_size)
+    parse = _csv_records if input_format == "csv" else _ndjson_records
+    last_line = 0
+    try:
+        async for line, values, error in parse(_lines(chunks)):
+            last_line = line
+            await importer.add(line, values, error)
+    except UnicodeDecodeError:
+        report.fail(last_line + 1, None, "Input is not valid UTF-8; import stopped here")
+    await importer.flush()
+    if report.created:
+        await rebuild_index(session)
+    return report
+
+
+async def _read_chunks(path: str, chunk_size: int = 1 << 16) -> AsyncIterator[bytes]:
+    handle = sys.stdin.buffer if path == "-" else open(path, "rb")
+    try:
+        while chunk := handle.read(chunk_size):
+            yield chunk
+    finally:
+        if handle is not sys.stdin.buffer:
+            handle.close()
+
+
+async def _main(args: argparse.Namespace) -> int:
+    from db import SessionLocal
+
+    input_format = args.format or ("csv" if args.path.lower().endswith(".csv") else "ndjson")
+    async with SessionLocal() as session:
+        report = await import_catalog(session, args.kind, input_format, _read_chunks(args.path), args.batch_size, args.max_errors)
+    summary = report.as_dict()
+    elapsed = summary["elapsed_seconds"]
+    rate = report.processed / elapsed if elapsed else 0.0
+    print(
+        f"{args.kind}: processed={report.processed} created={report.created} failed={report.failed} "
+        f"in {elapsed:.1f}s ({rate:.0f} rows/s)"
+    )
+    for error in report.errors:
+        print(f"  line {error['line']} ({error['slug'] or '-'}): {error['error']}", file=sys.stderr)
+    if summary["errors_truncated"]:
+        print(f"  ... {report.failed - len(report.errors)} more errors not shown", file=sys.stderr)
+    return 1 if report.failed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Bulk import artists, categories or videos")
+    parser.add_argument("kind", choices=KINDS)
+    parser.add_argument("path", help="NDJSON or CSV file, or - for stdin")
+    parser.add_argument("--format", choices=FORMATS, help="Defaults to csv for *.csv files, otherwise ndjson")
+    parser.add_argument("--batch-size", type=int, default=settings.import_batch_size, help="Rows written per transaction")
+    parser.add_argument("--max-errors", type=int, default=settings.import_max_errors, help="Row errors kept in the report")
+    args = parser.parse_args(argv)
+    if not 1 <= args.batch_size <= MAX_BATCH_SIZE:
+        parser.error(f"--batch-size must be between 1 and {MAX_BATCH_SIZE}")
+    sys.exit(asyncio.run(_main(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,17 @@ from __future__ import annotations
 import os
 from functools import lru_cache
 from typing import Optional
+from urllib.parse import quote
+
+
+def _redis_url_from_parts() -> str:
+    scheme = "rediss" if os.getenv("REDIS_TLS", "false").lower() in ("1", "true", "yes") else "redis"
+    password = os.getenv("REDIS_PASSWORD")
+    auth = f":{quote(password, safe='')}@" if password else ""
+    host = os.getenv("REDIS_HOST") or "redis"
+    port = os.getenv("REDIS_PORT") or "6379"
+    db = os.getenv("REDIS_DB") or "0"
+    return f"{scheme}://{auth}{host}:{port}/{db}"
 
 
 class Settings:
@@ -23,6 +34,24 @@ class Settings:
             raw_url = raw_url.replace("postgresql://", "postgresql+asyncpg://", 1)
         self.database_url = raw_url
 
+        # Connection pool; DB_STATEMENT_CACHE_SIZE=0 is required behind pgbouncer in transaction mode
+        self.db_pool_size = int(os.getenv("DB_POOL_SIZE", "10"))
+        self.db_max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+        self.db_pool_timeout_seconds = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+        self.db_pool_recycle_seconds = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+        self.db_pool_pre_ping = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+        self.db_statement_cache_size = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+        # How long a transactional migration waits for a table lock before giving up
+        self.migration_lock_timeout_seconds = float(os.getenv("MIGRATION_LOCK_TIMEOUT_SECONDS", "10"))
+
+        self.enable_metrics = os.getenv("ENABLE_METRICS", "false").lower() in ("1", "true", "yes")
+        # Per-request SQL profiling, switched on by admins with the X-SQL-Profile header
+        self.sql_profiler_enabled = os.getenv("SQL_PROFILER_ENABLED", "false").lower() in ("1", "true", "yes")
+        self.sql_profiler_n_plus_one_threshold = int(os.getenv("SQL_PROFILER_N_PLUS_ONE_THRESHOLD", "5"))
+        self.sql_profiler_slowest = int(os.getenv("SQL_PROFILER_SLOWEST", "5"))
+
+        self.app_env = os.getenv("APP_ENV", "development").lower()
+
         key = os.getenv("SETTINGS_ENCRYPTION_KEY")
         if not key:
             raise RuntimeError("SETTINGS_ENCRYPTION_KEY environment variable is required")
@@ -32,6 +61,18 @@ class Settings:
         self.admin_api_token = os.getenv("ADMIN_API_TOKEN")
         self.rate_limit_requests = int(os.getenv("SETTINGS_RATE_LIMIT_REQUESTS", "20"))
         self.rate_limit_window = int(os.getenv("SETTINGS_RATE_LIMIT_WINDOW", "60"))
+        self.rate_limit_backend = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+        self.rate_limit_max_keys = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+        self.rate_limit_redis_timeout_seconds = float(os.getenv("RATE_LIMIT_REDIS_TIMEOUT_SECONDS", "0.25"))
+        # REDIS_URL overrides the individual REDIS_* settings when set
+        self.redis_url = os.getenv("REDIS_URL") or _redis_url_from_parts()
+        self.settings_cache_ttl_seconds = float(os.getenv("SETTINGS_CACHE_TTL_SECONDS", "5"))
+        self.s3_max_pool_connections = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "50"))
+        self.storage_executor_workers = int(os.getenv("STORAGE_EXECUTOR_WORKERS", "32"))
+        self.storage_call_timeout_seconds = float(os.getenv("STORAGE_CALL_TIMEOUT_SECONDS", "30"))
+        self.upload_part_size_bytes = int(os.getenv("UPLOAD_PART_SIZE_BYTES", str(8 * 1024 * 1024)))
+        self.presign_cache_max_entries = int(os.getenv("PRESIGN_CACHE_MAX_ENTRIES", "10000"))
+        self.presign_min_remaining_ratio = float(os.getenv("PRESIGN_MIN_REMAINING_RATIO", "0.5"))
 
         # OTP configuration
         self.otp_code_length = int(os.getenv("OTP_CODE_LENGTH", "6"))
@@ -40,6 +81,50 @@ class Settings:
         self.otp_rate_limit_per_hour = int(os.getenv("OTP_RATE_LIMIT_PER_HOUR", "5"))
         self.otp_max_attempts = int(os.getenv("OTP_MAX_ATTEMPTS", "5"))
         self.otp_default_method = os.getenv("OTP_DEFAULT_METHOD", "sms").lower()
+        # "memory" keeps OTPs per process, so it is only allowed outside APP_ENV=production
+        self.otp_store_backend = os.getenv("OTP_STORE_BACKEND", "redis").lower()
+        self.otp_state_retention_seconds = int(os.getenv("OTP_STATE_RETENTION_SECONDS", "3600"))
+        self.otp_audit_enabled = os.getenv("OTP_AUDIT_ENABLED", "true").lower() in ("1", "true", "yes")
+        self.otp_audit_batch_size = int(os.getenv("OTP_AUDIT_BATCH_SIZE", "500"))
+        self.otp_audit_flush_seconds = float(os.getenv("OTP_AUDIT_FLUSH_SECONDS", "2"))
+        self.otp_audit_max_buffer = int(os.getenv("OTP_AUDIT_MAX_BUFFER", "50000"))
+        self.otp_outbox_inline_worker = os.getenv("OTP_OUTBOX_INLINE_WORKER", "true").lower() in ("1", "true", "yes")
+        self.otp_outbox_concurrency = int(os.getenv("OTP_OUTBOX_CONCURRENCY", "16"))
+        self.otp_outbox_batch_size = int(os.getenv("OTP_OUTBOX_BATCH_SIZE", "50"))
+        self.otp_outbox_poll_interval_seconds = float(os.getenv("OTP_OUTBOX_POLL_INTERVAL_SECONDS", "1"))
+        self.otp_outbox_lease_seconds = int(os.getenv("OTP_OUTBOX_LEASE_SECONDS", "30"))
+        self.otp_outbox_max_attempts = int(os.getenv("OTP_OUTBOX_MAX_ATTEMPTS", "5"))
+        self.otp_outbox_backoff_base_seconds = float(os.getenv("OTP_OUTBOX_BACKOFF_BASE_SECONDS", "2"))
+        self.otp_outbox_backoff_max_seconds = float(os.getenv("OTP_OUTBOX_BACKOFF_MAX_SECONDS", "60"))
+        # Delivered, failed, expired and superseded rows are deleted once this old
+        self.otp_outbox_retention_seconds = int(os.getenv("OTP_OUTBOX_RETENTION_SECONDS", "86400"))
+        self.otp_outbox_prune_batch_size = int(os.getenv("OTP_OUTBOX_PRUNE_BATCH_SIZE", "1000"))
+        self.otp_outbox_prune_interval_seconds = float(os.getenv("OTP_OUTBOX_PRUNE_INTERVAL_SECONDS", "300"))
+
+        # Twilio REST transport; point TWILIO_API_BASE_URL at a local fake for testing
+        self.twilio_api_base_url = (os.getenv("TWILIO_API_BASE_URL") or "https://api.twilio.com").rstrip("/")
+        self.twilio_timeout_seconds = float(os.getenv("TWILIO_TIMEOUT_SECONDS", "10"))
+        self.twilio_connect_timeout_seconds = float(os.getenv("TWILIO_CONNECT_TIMEOUT_SECONDS", "3"))
+        self.twilio_max_connections = int(os.getenv("TWILIO_MAX_CONNECTIONS", "20"))
+        self.twilio_circuit_failure_threshold = int(os.getenv("TWILIO_CIRCUIT_FAILURE_THRESHOLD", "5"))
+        self.twilio_circuit_reset_seconds = float(os.getenv("TWILIO_CIRCUIT_RESET_SECONDS", "30"))
+
+        # Paginated list totals
+        self.count_cache_ttl_seconds = int(os.getenv("LIST_COUNT_CACHE_TTL_SECONDS", "30"))
+        self.count_cache_max_entries = int(os.getenv("LIST_COUNT_CACHE_MAX_ENTRIES", "1024"))
+        self.count_estimate_exact_threshold = int(os.getenv("LIST_COUNT_ESTIMATE_EXACT_THRESHOLD", "1000"))
+
+        # Autocomplete index
+        self.autocomplete_scan_limit = int(os.getenv("AUTOCOMPLETE_SCAN_LIMIT", "128"))
+        self.autocomplete_refresh_seconds = float(os.getenv("AUTOCOMPLETE_REFRESH_SECONDS", "300"))
+        self.autocomplete_rate_limit_requests = int(os.getenv("AUTOCOMPLETE_RATE_LIMIT_REQUESTS", "600"))
+
+        # Bulk catalog import
+        self.import_batch_size = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+        self.import_max_errors = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+
+        # Streaming catalog export
+        self.export_batch_size = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
 
 
 @lru_cache
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Artist, Category, Subtitle, Video, video_artists, video_categories
+from schemas import ArtistResponse, CategoryResponse, SubtitleResponse, VideoResponse
+
+
+@dataclass
+class VideoRelations:
+    artists: Dict[UUID, List[ArtistResponse]] = field(default_factory=lambda: defaultdict(list))
+    categories: Dict[UUID, List[CategoryResponse]] = field(default_factory=lambda: defaultdict(list))
+    subtitles: Dict[UUID, List[SubtitleResponse]] = field(default_factory=lambda: defaultdict(list))
+
+
+async def load_video_relations(session: AsyncSession, video_ids: Iterable[UUID]) -> VideoRelations:
+    """Fetch artists, categories and subtitles for many videos in three queries."""
+    ids = list(dict.fromkeys(video_ids))
+    relations = VideoRelations()
+    if not ids:
+        return relations
+
+    artist_rows = await session.execute(
+        select(video_artists.c.video_id, Artist)
+        .join(Artist, video_artists.c.artist_id == Artist.id)
+        .where(video_artists.c.video_id.in_(ids))
+    )
+    artist_cache: Dict[UUID, ArtistResponse] = {}
+    for video_id, artist in artist_rows.all():
+        response = artist_cache.get(artist.id)
+        if response is None:
+            response = artist_cache[artist.id] = ArtistResponse.model_validate(artist)
+        relations.artists[video_id].append(response)
+
+    category_rows = await session.execute(
+        select(video_categories.c.video_id, Category)
+        .join(Category, video_categories.c.category_id == Category.id)
+        .where(video_categories.c.video_id.in_(ids))
+    )
+    category_cache: Dict[UUID, CategoryResponse] = {}
+    for video_id, category in category_rows.all():
+        response = category_cache.get(category.id)
+        if response is None:
+            response = category_cache[category.id] = CategoryResponse.model_validate(category)
+        relations.categories[video_id].append(response)
+
+    subtitle_rows = await session.execute(select(Subtitle).where(Subtitle.video_id.in_(ids)))
+    for subtitle in subtitle_rows.scalars().all():
+        relations.subtitles[subtitle.video_id].append(SubtitleResponse.model_validate(subtitle))
+
+    return relations
+
+
+def build_video_response(video: Video, relations: VideoRelations) -> VideoResponse:
+    base = {
+        "id": video.id,
+        "title": video.title,
+        "slug": video.slug,
+        "description": video.description,
+        "thumbnail_url": video.thumbnail_url,
+        "video_url": video.video_url,
+        "duration_seconds": video.duration_seconds,
+        "status": video.status,
+        "release_date": video.release_date,
+        "is_featured": video.is_featured,
+        "metadata": video.metadata or {},
+        "created_at": video.created_at,
+        "updated_at": video.updated_at,
+    }
+    return VideoResponse.model_validate(
+        {
+            **base,
+            "artists": relations.artists.get(video.id, []),
+            "categories": relations.categories.get(video.id, []),
+            "subtitles": relations.subtitles.get(video.id, []),
+        }
+    )
+
+
+async def serialize_videos(session: AsyncSession, videos: Sequence[Video]) -> List[VideoResponse]:
+    relations = await load_video_relations(session, (video.id for video in videos))
+    return [build_video_response(video, relations) for video in videos]
+
+
+def _linked_signature(link_table, link_column, model) -> Tuple[Any, Any]:
+    latest = (
+        select(func.max(model.updated_at))
+        .select_from(link_table.join(model, link_column == model.id))
+        .where(link_table.c.video_id == Video.id)
+        .scalar_subquery()
+    )
+    count = select(func.count()).select_from(link_table).where(link_table.c.video_id == Video.id).scalar_subquery()
+    return latest, count
+
+
+async def load_video_with_validator(session: AsyncSession, video_id: UUID) -> Optional[Tuple[Video, Tuple[Any, ...]]]:
+    """Load a video together with the values its ETag is derived from.
+
+    Subtitle and link changes made through the API bump ``videos.updated_at``
+    (see :func:`touch_video`); edits to linked artists and categories show up
+    in their own ``updated_at`` and link counts.
+    """
+    result = await session.execute(
+        select(
+            Video,
+            *_linked_signature(video_artists, video_artists.c.artist_id, Artist),
+            *_linked_signature(video_categories, video_categories.c.category_id, Category),
+        ).where(Video.id == video_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    video, *signature = row
+    return video, (video.updated_at, *signature)
+
+
+async def related_signatures(session: AsyncSession, video_ids: Sequence[UUID]) -> Tuple[Any, ...]:
+    """Linked artist and category signatures for the videos on one list page, in one query."""
+    if not video_ids:
+        return ()
+    result = await session.execute(
+        select(
+            Video.id,
+            *_linked_signature(video_artists, video_artists.c.artist_id, Artist),
+            *_linked_signature(video_categories, video_categories.c.category_id, Category),
+        )
+        .where(Video.id.in_(video_ids))
+        .order_by(Video.id)
+    )
+    return tuple(tuple(row) for row in result.all())
+
+
+async def touch_video(session: AsyncSession, video_id: UUID) -> bool:
+    """Bump the video's ``updated_at``; ``False`` if there is no such video."""
+    result = await session.execute(
+        update(Video).where(Video.id == video_id).values(updated_at=datetime.utcnow()).returning(Video.id)
+    )
+    return result.scalar_one_or_none() is not None
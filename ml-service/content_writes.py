@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import Row, Table, all_, any_, delete, func, insert, literal, select, update
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Subtitle
+from schemas import SubtitleCreate
+
+UNIQUE_VIOLATION = "23505"
+FOREIGN_KEY_VIOLATION = "23503"
+
+_UUID_ARRAY = ARRAY(PG_UUID(as_uuid=True))
+
+
+@asynccontextmanager
+async def write_transaction(
+    session: AsyncSession,
+    conflict: Optional[str] = None,
+    invalid_reference: Optional[str] = None,
+) -> AsyncIterator[None]:
+    """Commit the block's statements once, or roll them all back.
+
+    Unique and foreign-key violations raised by the statements become 409
+    ``conflict`` and 400 ``invalid_reference`` respectively when a detail is
+    given for them.
+    """
+    try:
+        yield
+        await session.commit()
+    except IntegrityError as exc:
+        await session.rollback()
+        code = getattr(exc.orig, "sqlstate", None)
+        if code == UNIQUE_VIOLATION and conflict:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=conflict) from exc
+        if code == FOREIGN_KEY_VIOLATION and invalid_reference:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=invalid_reference) from exc
+        raise
+    except BaseException:
+        await session.rollback()
+        raise
+
+
+async def insert_returning(session: AsyncSession, model, values: Dict[str, Any], conflict: str) -> Any:
+    """``INSERT ... ON CONFLICT DO NOTHING RETURNING``; no row back means a unique key is already taken."""
+    statement = pg_insert(model).values(**values).on_conflict_do_nothing().returning(model)
+    instance = (await session.execute(statement)).scalar_one_or_none()
+    if instance is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=conflict)
+    return instance
+
+
+async def update_returning(session: AsyncSession, model, object_id: UUID, values: Dict[str, Any], not_found: str) -> Any:
+    """``UPDATE ... RETURNING`` by id; an empty ``values`` only reads the row so its ``updated_at`` stays put."""
+    if values:
+        statement = update(model).where(model.id == object_id).values(**values).returning(model)
+    else:
+        statement = select(model).where(model.id == object_id)
+    instance = (await session.execute(statement.execution_options(populate_existing=True))).scalar_one_or_none()
+    if instance is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+    return instance
+
+
+async def delete_returning(session: AsyncSession, model, object_id: UUID, not_found: str, *columns: Any) -> Row:
+    """``DELETE ... RETURNING`` by id, handing back ``columns`` (the id by default) of the removed row."""
+    statement = delete(model).where(model.id == object_id).returning(*(columns or (model.id,)))
+    row = (await session.execute(statement)).one_or_none()
+    if row is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+    return row
+
+
+def _ids(values: Iterable[UUID]) -> Any:
+    # One array parameter however many ids there are, instead of one bind per id.
+    return literal(sorted(set(values)), _UUID_ARRAY)
+
+
+async def update_links(
+    session: AsyncSession,
+    table: Table,
+    column: Any,
+    video_id: UUID,
+    replace: Optional[Iterable[UUID]] = None,
+    add: Optional[Iterable[UUID]] = None,
+    remove: Optional[Iterable[UUID]] = None,
+) -> bool:
+    """Apply a change to one of a video's link tables as a set difference.
+
+    ``replace`` is the full desired set; ``add``/``remove`` adjust it, or the
+    current links when ``replace`` is omitted. Only links that actually
+    appear or disappear are written: one ``DELETE`` for the removals and one
+    ``INSERT ... ON CONFLICT DO NOTHING`` for the additions. Returns whether
+    anything changed.
+    """
+    additions = set(add or ())
+    removals = set(remove or ())
+    if additions & removals:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="The same id cannot be both added and removed")
+
+    owner = table.c.video_id
+    changed = False
+    stale = None
+    if replace is not None:
+        additions = (set(replace) | additions) - removals
+        stale = column != all_(_ids(additions))
+    elif removals:
+        stale = column == any_(_ids(removals))
+    if stale is not None:
+        result = await session.execute(delete(table).where(owner == video_id, stale).returning(column))
+        changed = bool(result.all())
+
+    if additions:
+        rows = select(literal(video_id, PG_UUID(as_uuid=True)), func.unnest(_ids(additions)), func.now())
+        statement = (
+            pg_insert(table)
+            .from_select([owner, column, table.c.created_at], rows)
+            .on_conflict_do_nothing()
+            .returning(column)
+        )
+        result = await session.execute(statement)
+        changed = bool(result.all()) or changed
+    return changed
+
+
+async def replace_subtitles(session: AsyncSession, video_id: UUID, subtitles: List[SubtitleCreate]) -> bool:
+    """Make the video's subtitles match ``subtitles``, keeping rows that are already identical."""
+    wanted: Dict[Tuple[Any, ...], SubtitleCreate] = {
+        (subtitle.language, subtitle.label, subtitle.file_url): subtitle for subtitle in subtitles
+    }
+    result = await session.execute(
+        select(Subtitle.id, Subtitle.language, Subtitle.label, Subtitle.file_url).where(Subtitle.video_id == video_id)
+    )
+    kept = set()
+    stale: List[UUID] = []
+    for subtitle_id, *key in result.all():
+        key = tuple(key)
+        if key in wanted and key not in kept:
+            kept.add(key)
+        else:
+            stale.append(subtitle_id)
+
+    if stale:
+        await session.execute(delete(Subtitle).where(Subtitle.id == any_(_ids(stale))))
+    missing = [{"video_id": video_id, **subtitle.model_dump()} for key, subtitle in wanted.items() if key not in kept]
+    if missing:
+        await session.execute(insert(Subtitle), missing)
+    return bool(stale or missing)
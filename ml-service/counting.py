@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Mapping, Optional, Tuple, Union
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement
+from sqlalchemy.sql.selectable import TextualSelect
+
+from config import get_settings
+
+settings = get_settings()
+
+COUNT_MODES = ("exact", "estimated", "cached")
+
+CountableQuery = Union[Select, TextualSelect]
+
+_count_cache: "OrderedDict[Tuple[str, str], Tuple[float, int]]" = OrderedDict()
+
+
+class _Explain(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement: ClauseElement) -> None:
+        self.statement = statement
+
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element: _Explain, compiler, **kw) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
+def _cache_key(query: CountableQuery, params: Optional[Mapping[str, Any]]) -> Tuple[str, str]:
+    compiled = query.compile()
+    bound = {**compiled.params, **(params or {})}
+    return str(compiled), repr(sorted(bound.items()))
+
+
+async def _exact_count(session: AsyncSession, query: CountableQuery, params: Optional[Mapping[str, Any]]) -> int:
+    result = await session.execute(select(func.count()).select_from(query.subquery()), params)
+    return result.scalar_one()
+
+
+async def _estimated_count(session: AsyncSession, query: CountableQuery, params: Optional[Mapping[str, Any]]) -> int:
+    result = await session.execute(_Explain(query), params)
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def _cached_count(session: AsyncSession, query: CountableQuery, params: Optional[Mapping[str, Any]]) -> int:
+    key = _cache_key(query, params)
+    now = time.monotonic()
+    entry = _count_cache.get(key)
+    if entry and entry[0] > now:
+        _count_cache.move_to_end(key)
+        return entry[1]
+
+    total = await _exact_count(session, query, params)
+    _count_cache[key] = (now + settings.count_cache_ttl_seconds, total)
+    _count_cache.move_to_end(key)
+    while len(_count_cache) > settings.count_cache_max_entries:
+        _count_cache.popitem(last=False)
+    return total
+
+
+async def resolve_total(
+    session: AsyncSession,
+    query: CountableQuery,
+    mode: str = "exact",
+    include_total: bool = True,
+    params: Optional[Mapping[str, Any]] = None,
+) -> Tuple[Optional[int], str]:
+    """Count the rows ``query`` would return using the requested strategy.
+
+    ``query`` is the unpaginated row query. Returns ``(total, mode)`` where
+    ``mode`` is reported back to the client; ``estimated`` falls back to an
+    exact count when the planner expects only a small result.
+    """
+    if mode not in COUNT_MODES:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid count mode '{mode}'")
+    if not include_total:
+        return None, "none"
+
+    if mode == "estimated":
+        estimate = await _estimated_count(session, query, params)
+        if estimate >= settings.count_estimate_exact_threshold:
+            return estimate, "estimated"
+        return await _exact_count(session, query, params), "exact"
+    if mode == "cached":
+        return await _cached_count(session, query, params), "cached"
+    return await _exact_count(session, query, params), "exact"
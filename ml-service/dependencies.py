@@ -1,17 +1,14 @@
 from __future__ import annotations
 
-import time
-from typing import Dict
+from typing import Callable
 
-from fastapi import Depends, HTTPException, Request, status
+from fastapi import Depends, HTTPException, Request, Response, status
 
 from config import get_settings
+from rate_limit import get_rate_limit_backend
 
 settings = get_settings()
 
-_rate_limiter_state: Dict[str, Dict[str, float]] = {}
-_otp_rate_state: Dict[str, Dict[str, float]] = {}
-
 
 async def admin_required(request: Request) -> str:
     header = request.headers.get("Authorization")
@@ -24,39 +21,49 @@ async def admin_required(request: Request) -> str:
     return request.headers.get("X-Admin-User", "admin")
 
 
-async def rate_limiter(request: Request) -> None:
-    identifier = request.client.host if request.client else "unknown"
-    bucket = _rate_limiter_state.setdefault(identifier, {"count": 0, "reset": time.time() + settings.rate_limit_window})
-    current_time = time.time()
+class RateLimit:
+    def __init__(self, scope: str, limit: int, window: float, cost: int = 1, detail: str = "Rate limit exceeded") -> None:
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+        self.cost = cost
+        self.detail = detail
+
+    async def __call__(self, request: Request, response: Response) -> None:
+        identifier = request.client.host if request.client else "unknown"
+        result = await get_rate_limit_backend().hit(f"{self.scope}:{identifier}", self.limit, self.window, self.cost)
+        if not result.allowed:
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=self.detail, headers=result.headers())
+        response.headers.update(result.headers())
+
 
-    if current_time > bucket["reset"]:
-        bucket["count"] = 0
-        bucket["reset"] = current_time + settings.rate_limit_window
+rate_limiter = RateLimit("admin", settings.rate_limit_requests, settings.rate_limit_window)
 
-    if bucket["count"] >= settings.rate_limit_requests:
-        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Rate limit exceeded")
+otp_rate_limit = RateLimit(
+    "otp",
+    max(1, int(settings.otp_rate_limit_per_hour * settings.otp_resend_interval_seconds / 3600)),
+    settings.otp_resend_interval_seconds,
+    detail="Too many OTP requests. Slow down.",
+)
 
-    bucket["count"] += 1
+
+# Autocomplete fires on every keystroke, so it gets its own, larger bucket.
+autocomplete_rate_limit = RateLimit("autocomplete", settings.autocomplete_rate_limit_requests, settings.rate_limit_window)
 
 
 async def admin_with_rate_limit(request: Request, _: None = Depends(rate_limiter)) -> str:
     return await admin_required(request)
 
 
-async def otp_rate_limit(request: Request) -> None:
-    identifier = request.client.host if request.client else "unknown"
-    bucket = _otp_rate_state.setdefault(identifier, {"count": 0, "reset": time.time() + settings.otp_resend_interval_seconds})
-    current_time = time.time()
-
-    window = settings.otp_resend_interval_seconds
-    max_requests = max(1, int(settings.otp_rate_limit_per_hour * window / 3600))
+async def admin_with_autocomplete_rate_limit(request: Request, _: None = Depends(autocomplete_rate_limit)) -> str:
+    return await admin_required(request)
 
-    if current_time > bucket["reset"]:
-        bucket["count"] = 0
-        bucket["reset"] = current_time + window
 
-    if bucket["count"] >= max_requests:
-        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too many OTP requests. Slow down.")
+def admin_with_rate_limit_cost(cost: int) -> Callable[..., object]:
+    """Admin dependency that draws ``cost`` tokens from the shared admin bucket."""
+    limiter = RateLimit("admin", settings.rate_limit_requests, settings.rate_limit_window, cost=cost)
 
-    bucket["count"] += 1
+    async def dependency(request: Request, _: None = Depends(limiter)) -> str:
+        return await admin_required(request)
 
+    return dependency
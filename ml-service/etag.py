@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Any, Optional, Sequence, Tuple
+
+from fastapi import Request, Response, status
+
+# Clients must revalidate every time; the ETag makes that a cheap 304.
+CACHE_CONTROL = "private, no-cache"
+
+
+def compute_etag(*parts: Any) -> str:
+    """Weak ETag over validator values; the JSON body itself is never hashed."""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def check_not_modified(request: Request, response: Response, *parts: Any) -> Optional[Response]:
+    """Return a 304 response if the client already holds the representation for ``parts``.
+
+    Otherwise the ETag is set on ``response`` and ``None`` is returned so the
+    route can go on to build the body.
+    """
+    etag = compute_etag(request.url.path, *parts)
+    response.headers.update({"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        # A returned Response replaces the injected one, so carry its headers (rate limit, ETag) over.
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=dict(response.headers))
+    return None
+
+
+def query_parts(request: Request) -> Tuple[Tuple[str, str], ...]:
+    return tuple(sorted(request.query_params.multi_items()))
+
+
+def page_validator(items: Sequence[Any], total: Optional[int], next_cursor: Optional[str]) -> Tuple[Any, ...]:
+    """Validator for one list page: the rows shown, the total reported and the cursor onward.
+
+    All of it comes from the page the route loads anyway, so list ETags cost
+    no extra query and honour whatever ``count_mode`` the client asked for.
+    """
+    return (total, next_cursor, tuple((item.id, item.updated_at) for item in items))
@@ -0,0 +1,271 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Everything here is plain counters behind a lock, cheap enough to update on
+every request, query and outbound call. ``ENABLE_METRICS`` decides whether
+the HTTP middleware and DB listeners are installed and ``/metrics`` served.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DB_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    @abstractmethod
+    def render(self) -> List[str]:
+        """Exposition lines for this metric, header included."""
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: LabelValues = (), amount: float = 1.0) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count in each bucket (non-cumulative, last is +Inf), sum]
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+            entry[0][index] += 1
+            entry[1][0] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(counts), total[0]) for key, (counts, total) in self._values.items()]
+        lines = self.header()
+        names = self.labelnames + ("le",)
+        for key, counts, total in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(names, key + (_number(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """A gauge or counter whose value is read from ``func`` at scrape time."""
+
+    def __init__(self, name: str, documentation: str, kind: str, func: Callable[[], float]) -> None:
+        super().__init__(name, documentation)
+        self.kind = kind
+        self.func = func
+
+    def render(self) -> List[str]:
+        return self.header() + [f"{self.name} {_number(self.func())}"]
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> Any:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_DURATION = registry.register(
+    Histogram("http_request_duration_seconds", "HTTP request latency by route template", ("method", "route", "status"))
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.register(Gauge("http_requests_in_flight", "HTTP requests being served", ("method",)))
+DB_QUERIES = registry.register(Counter("db_queries_total", "SQL statements executed", ("operation", "outcome")))
+DB_QUERY_DURATION = registry.register(
+    Histogram("db_query_duration_seconds", "SQL statement latency", ("operation",), buckets=DB_BUCKETS)
+)
+S3_REQUESTS = registry.register(Counter("s3_requests_total", "S3 API calls", ("operation", "outcome")))
+S3_REQUEST_DURATION = registry.register(Histogram("s3_request_duration_seconds", "S3 API call latency", ("operation",)))
+TWILIO_REQUESTS = registry.register(Counter("twilio_requests_total", "Twilio API calls", ("resource", "outcome")))
+TWILIO_REQUEST_DURATION = registry.register(
+    Histogram("twilio_request_duration_seconds", "Twilio API call latency", ("resource",))
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing each HTTP request by method, route template and status.
+
+    The route template (``/api/videos/{video_id}``) rather than the raw path
+    is used so label cardinality stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc((method,))
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec((method,))
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "<unmatched>"
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, (method, template, str(status_code)))
+
+
+_SQL_OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "BEGIN", "COMMIT", "ROLLBACK"}
+
+
+def _operation(statement: Optional[str]) -> str:
+    keyword = statement.lstrip()[:8].split(None, 1)[0].upper() if statement and statement.strip() else ""
+    return keyword if keyword in _SQL_OPERATIONS else "OTHER"
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count and time every statement run through ``engine`` (the sync engine behind an AsyncEngine)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        conn.info.setdefault("metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+        started = conn.info["metrics_started"].pop()
+        operation = _operation(statement)
+        DB_QUERY_DURATION.observe(time.perf_counter() - started, (operation,))
+        DB_QUERIES.inc((operation, "success"))
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context) -> None:
+        stack = context.connection.info.get("metrics_started") if context.connection is not None else None
+        if stack:
+            stack.pop()
+        DB_QUERIES.inc((_operation(context.statement), "error"))
+
+
+def _s3_before_call(model: Any = None, context: Optional[Dict[str, Any]] = None, **_: Any) -> None:
+    if context is not None:
+        context["metrics_operation"] = model.name
+        context["metrics_started"] = time.perf_counter()
+
+
+def _s3_finish(context: Optional[Dict[str, Any]], outcome: str) -> None:
+    if not context or "metrics_started" not in context:
+        return
+    operation = context["metrics_operation"]
+    S3_REQUEST_DURATION.observe(time.perf_counter() - context.pop("metrics_started"), (operation,))
+    S3_REQUESTS.inc((operation, outcome))
+
+
+def _s3_after_call(http_response: Any = None, context: Optional[Dict[str, Any]] = None, **_: Any) -> None:
+    _s3_finish(context, "success" if http_response is not None and http_response.status_code < 300 else "error")
+
+
+def _s3_after_call_error(context: Optional[Dict[str, Any]] = None, **_: Any) -> None:
+    _s3_finish(context, "error")
+
+
+def instrument_s3_client(client: Any) -> None:
+    """Hook botocore's call events so every API call on ``client`` is counted and timed."""
+    events = client.meta.events
+    events.register("before-call.s3", _s3_before_call)
+    events.register("after-call.s3", _s3_after_call)
+    events.register("after-call-error.s3", _s3_after_call_error)
+
+
+def register_pool_metrics(pool_status: Callable[[], Dict[str, float]]) -> None:
+    gauges: Iterable[Tuple[str, str, str, str]] = (
+        ("db_pool_size", "Connections the pool keeps open", "gauge", "size"),
+        ("db_pool_checked_out", "Connections currently checked out", "gauge", "checked_out"),
+        ("db_pool_checked_in", "Idle connections in the pool", "gauge", "checked_in"),
+        ("db_pool_overflow", "Connections open beyond the pool size", "gauge", "overflow"),
+        ("db_pool_checkouts_total", "Connection checkouts", "counter", "checkouts"),
+        ("db_pool_timeouts_total", "Checkouts that timed out waiting for a connection", "counter", "timeouts"),
+        ("db_pool_wait_seconds_total", "Time spent waiting for connections", "counter", "wait_seconds_total"),
+        ("db_pool_wait_seconds_max", "Longest single checkout wait", "gauge", "wait_seconds_max"),
+    )
+    for name, documentation, kind, key in gauges:
+        registry.register(CallbackMetric(name, documentation, kind, lambda key=key: pool_status()[key]))
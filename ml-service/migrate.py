@@ -0,0 +1,229 @@
+"""Schema migrations for the ml-service models.
+
+Migrations live in ``migrations/NNNN_name.py`` and run in revision order.
+Each defines ``async def upgrade(conn)``; the applied revisions are recorded
+in ``ml_schema_migrations``. A migration runs in one transaction together
+with its bookkeeping row unless it sets ``transactional = False``, which
+index builds with ``CREATE INDEX CONCURRENTLY`` need. Those run on an
+autocommit connection and must be safe to re-run if interrupted.
+
+Revision 1 creates the models' tables with ``create_all``, so a fresh
+database gets the current models straight away. Later migrations
+therefore have to tolerate finding their change already there
+(``ADD COLUMN IF NOT EXISTS`` and the like).
+
+Run ``python migrate.py upgrade`` before starting the API. Concurrent runs
+from several containers wait on an advisory lock. At startup the API only
+compares the recorded revision with the newest file (``check_schema_revision``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import logging
+import re
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Iterator, List, Optional
+
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, MetaData, String, Table, func, insert, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.schema import CreateIndex, DropIndex
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+MIGRATIONS_DIR = Path(__file__).with_name("migrations")
+# Arbitrary constant shared by every migrate.py process.
+ADVISORY_LOCK_KEY = 7_240_311_958_113
+
+_FILENAME = re.compile(r"^(\d{4})_(\w+)\.py$")
+
+schema_metadata = MetaData()
+schema_migrations = Table(
+    "ml_schema_migrations",
+    schema_metadata,
+    Column("revision", Integer, primary_key=True, autoincrement=False),
+    Column("name", String(255), nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now(), nullable=False),
+)
+
+
+@dataclass(frozen=True)
+class Migration:
+    revision: int
+    name: str
+    path: Path
+
+    @property
+    def label(self) -> str:
+        return f"{self.revision:04d}_{self.name}"
+
+    def load(self) -> ModuleType:
+        spec = importlib.util.spec_from_file_location(f"ml_migration_{self.label}", self.path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    migrations = []
+    for path in directory.glob("*.py"):
+        match = _FILENAME.match(path.name)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), path))
+    migrations.sort(key=lambda migration: migration.revision)
+    for previous, current in zip(migrations, migrations[1:]):
+        if previous.revision == current.revision:
+            raise RuntimeError(f"Duplicate migration revision {current.revision}: {previous.path.name}, {current.path.name}")
+    return migrations
+
+
+def head_revision() -> int:
+    migrations = discover()
+    return migrations[-1].revision if migrations else 0
+
+
+async def current_revision(conn: AsyncConnection) -> int:
+    """Newest applied revision, 0 for a database never migrated: a catalog lookup and an index-only ``max``."""
+    exists = await conn.scalar(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": schema_migrations.name})
+    if not exists:
+        return 0
+    return await conn.scalar(select(func.max(schema_migrations.c.revision))) or 0
+
+
+async def check_schema_revision(conn: AsyncConnection) -> None:
+    """Refuse to start against a database that is missing migrations this build expects.
+
+    A database ahead of the code (a rolling deploy, or a rollback of the
+    code only) is allowed with a warning.
+    """
+    head = head_revision()
+    current = await current_revision(conn)
+    if current < head:
+        raise RuntimeError(
+            f"Database schema is at revision {current} but this build expects {head}; run `python migrate.py upgrade`"
+        )
+    if current > head:
+        logger.warning("Database schema is at revision %d, newer than this build's %d", current, head)
+
+
+@contextmanager
+def _concurrently(index: Index) -> Iterator[Index]:
+    options = index.dialect_options["postgresql"]
+    options["concurrently"] = True
+    try:
+        yield index
+    finally:
+        options["concurrently"] = False
+
+
+async def create_index_concurrently(conn: AsyncConnection, index: Index) -> None:
+    """Build a model-declared index without blocking writes to its table.
+
+    Only usable from a ``transactional = False`` migration. An invalid index
+    left behind by an interrupted build is dropped and built again.
+    """
+    invalid = await conn.scalar(
+        text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {"name": index.name}
+    )
+    with _concurrently(index):
+        if invalid:
+            logger.info("Dropping invalid index %s left by an earlier build", index.name)
+            await conn.execute(DropIndex(index, if_exists=True))
+        await conn.execute(CreateIndex(index, if_not_exists=True))
+
+
+async def _apply(engine: AsyncEngine, migration: Migration) -> None:
+    module = migration.load()
+    record = insert(schema_migrations).values(revision=migration.revision, name=migration.name)
+    if getattr(module, "transactional", True):
+        async with engine.begin() as conn:
+            # Fail fast instead of queueing every query on the table behind a DDL lock we cannot get.
+            await conn.execute(
+                text("SELECT set_config('lock_timeout', :timeout, true)"),
+                {"timeout": f"{int(settings.migration_lock_timeout_seconds * 1000)}ms"},
+            )
+            await module.upgrade(conn)
+            await conn.execute(record)
+        return
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        await module.upgrade(conn)
+        await conn.execute(record)
+
+
+def _lock_key():
+    return literal(ADVISORY_LOCK_KEY, BigInteger)
+
+
+async def upgrade(engine: AsyncEngine, target: Optional[int] = None) -> List[Migration]:
+    """Apply every pending migration up to ``target`` (default: all) and return the ones applied."""
+    pending = [migration for migration in discover() if target is None or migration.revision <= target]
+    applied: List[Migration] = []
+    async with engine.connect() as lock:
+        lock = await lock.execution_options(isolation_level="AUTOCOMMIT")
+        await lock.execute(select(func.pg_advisory_lock(_lock_key())))
+        try:
+            async with engine.begin() as conn:
+                await conn.run_sync(schema_metadata.create_all)
+                done = set((await conn.execute(select(schema_migrations.c.revision))).scalars())
+            for migration in pending:
+                if migration.revision in done:
+                    continue
+                logger.info("Applying migration %s", migration.label)
+                await _apply(engine, migration)
+                applied.append(migration)
+        finally:
+            await lock.execute(select(func.pg_advisory_unlock(_lock_key())))
+    return applied
+
+
+async def _main(args: argparse.Namespace) -> int:
+    from db import engine
+
+    try:
+        if args.command == "upgrade":
+            applied = await upgrade(engine, args.to)
+            for migration in applied:
+                print(f"applied {migration.label}")
+            if not applied:
+                print("nothing to apply")
+        else:
+            async with engine.connect() as conn:
+                current = await current_revision(conn)
+                if args.command == "current":
+                    head = head_revision()
+                    print(f"current {current}, head {head}")
+                    return 0 if current >= head else 1
+                rows = (await conn.execute(select(schema_migrations))).mappings().all() if current else []
+            applied_at = {row["revision"]: row["applied_at"] for row in rows}
+            for migration in discover():
+                when = applied_at.get(migration.revision)
+                print(f"{migration.label}  {when.isoformat() if when else 'pending'}")
+    finally:
+        await engine.dispose()
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Apply or inspect ml-service schema migrations")
+    commands = parser.add_subparsers(dest="command", required=True)
+    upgrade_parser = commands.add_parser("upgrade", help="Apply pending migrations")
+    upgrade_parser.add_argument("--to", type=int, help="Stop after this revision")
+    commands.add_parser("current", help="Print the applied and expected revisions; exits 1 if behind")
+    commands.add_parser("history", help="List migrations and when they were applied")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main(args)))
+
+
+if __name__ == "__main__":
+    main()
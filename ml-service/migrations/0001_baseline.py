@@ -0,0 +1,12 @@
+"""Baseline: the tables ml-service used to create with ``create_all`` on every boot."""
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from models import Base
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    # Trigram indexes on the content tables need pg_trgm (see server migration 008).
+    await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    await conn.run_sync(Base.metadata.create_all)
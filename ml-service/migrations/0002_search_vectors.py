@@ -0,0 +1,21 @@
+"""Generated ``search_vector`` columns for databases that never ran server migration 008.
+
+The index build in the next revision needs them. Adding a stored generated
+column rewrites the table, so this holds its lock for the length of that rewrite.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from models import Artist, Category, Video
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    for model in (Video, Artist, Category):
+        column = model.__table__.c.search_vector
+        await conn.execute(
+            text(
+                f"ALTER TABLE {model.__tablename__} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+                f"GENERATED ALWAYS AS ({column.computed.sqltext}) STORED"
+            )
+        )
@@ -0,0 +1,17 @@
+"""Indexes the models declare but ``create_all`` never added to tables that already existed.
+
+Built concurrently so existing deployments keep serving writes while they build.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from migrate import create_index_concurrently
+from models import Base
+
+transactional = False
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    for table in Base.metadata.sorted_tables:
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            await create_index_concurrently(conn, index)
@@ -0,0 +1,13 @@
+"""Partial index on finished ``otp_outbox`` rows, used by the worker's prune."""
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from migrate import create_index_concurrently
+from models import OTPOutbox
+
+transactional = False
+
+
+async def upgrade(conn: AsyncConnection) -> None:
+    index = next(index for index in OTPOutbox.__table__.indexes if index.name == "ix_otp_outbox_finished_updated")
+    await create_index_concurrently(conn, index)
@@ -5,23 +5,37 @@ from datetime import datetime
 
 from sqlalchemy import (
     JSON,
+    BigInteger,
     Boolean,
     Column,
+    Computed,
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Table,
     Text,
     UniqueConstraint,
+    text,
 )
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import declarative_base, deferred
 
 Base = declarative_base()
 
 
+def _search_vector(*weighted_columns: tuple[str, str]) -> str:
+    """Expression for a generated, weighted ``tsvector`` column (see migration 008).
+
+    Mapped as ``deferred`` so only search queries load it.
+    """
+    return " || ".join(
+        f"setweight(to_tsvector('english', coalesce({column}, '')), '{weight}')" for column, weight in weighted_columns
+    )
+
+
 class SettingsVersion(Base):
     __tablename__ = "settings_versions"
     __table_args__ = (UniqueConstraint("version", name="uq_settings_version"),)
@@ -62,28 +76,50 @@ class SettingsAuditLog(Base):
     created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
 
 
-class PhoneOTP(Base):
-    __tablename__ = "phone_otp_codes"
-    __table_args__ = (UniqueConstraint("phone_number", name="uq_phone_otp_phone"),)
+class OTPAuditEvent(Base):
+    __tablename__ = "otp_audit_events"
+    __table_args__ = (Index("ix_otp_audit_events_phone_created", "phone_number", "created_at"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    phone_number = Column(String(32), nullable=False)
+    event = Column(String(32), nullable=False)
+    method = Column(String(16), nullable=True)
+    detail = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+
+class OTPOutbox(Base):
+    __tablename__ = "otp_outbox"
+    __table_args__ = (
+        Index("ix_otp_outbox_due", "next_attempt_at", postgresql_where=text("status IN ('pending', 'sending')")),
+        Index("ix_otp_outbox_phone_created", "phone_number", "created_at"),
+        Index(
+            "ix_otp_outbox_finished_updated",
+            "updated_at",
+            postgresql_where=text("status IN ('sent', 'failed', 'expired', 'superseded')"),
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     phone_number = Column(String(32), nullable=False)
-    code_hash = Column(String(128), nullable=False)
-    code_salt = Column(String(32), nullable=False)
     method = Column(String(16), nullable=False, default="sms")
-    expires_at = Column(DateTime(timezone=True), nullable=False)
-    last_sent_at = Column(DateTime(timezone=True), nullable=False)
-    verified_at = Column(DateTime(timezone=True), nullable=True)
+    code_ciphertext = Column(Text, nullable=True)
+    status = Column(String(16), nullable=False, default="pending")
     attempts = Column(Integer, nullable=False, default=0)
-    max_attempts = Column(Integer, nullable=False, default=5)
-    send_count = Column(Integer, nullable=False, default=1)
-    rate_limit_reset_at = Column(DateTime(timezone=True), nullable=False)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    last_error = Column(Text, nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
 class FileObject(Base):
     __tablename__ = "file_objects"
+    __table_args__ = (
+        Index("ix_file_objects_uploaded_at_id", "uploaded_at", "id", postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_file_objects_bucket_key", "bucket", text('key COLLATE "C"')),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     bucket = Column(String(255), nullable=False)
@@ -97,8 +133,42 @@ class FileObject(Base):
     deleted_at = Column(DateTime(timezone=True), nullable=True)
 
 
+class StorageOrphan(Base):
+    __tablename__ = "storage_orphans"
+    __table_args__ = (UniqueConstraint("bucket", "key", name="uq_storage_orphan_key"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    bucket = Column(String(255), nullable=False)
+    key = Column(String(1024), nullable=False)
+    kind = Column(String(32), nullable=False)
+    file_id = Column(UUID(as_uuid=True), ForeignKey("file_objects.id", ondelete="CASCADE"), nullable=True)
+    size_bytes = Column(BigInteger, nullable=True)
+    etag = Column(String(128), nullable=True)
+    detected_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+
+class StorageUsageRollup(Base):
+    __tablename__ = "storage_usage_rollups"
+    __table_args__ = (UniqueConstraint("bucket", "dimension", "value", name="uq_storage_usage_rollup"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    bucket = Column(String(255), nullable=False)
+    dimension = Column(String(32), nullable=False)
+    value = Column(String(255), nullable=False)
+    file_count = Column(BigInteger, nullable=False, default=0)
+    total_bytes = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class Artist(Base):
     __tablename__ = "artists"
+    __table_args__ = (
+        Index("ix_artists_created_at_id", "created_at", "id"),
+        Index("ix_artists_updated_at_id", "updated_at", "id"),
+        Index("ix_artists_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_artists_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_artists_slug_trgm", "slug", postgresql_using="gin", postgresql_ops={"slug": "gin_trgm_ops"}),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=False, unique=True)
@@ -109,10 +179,18 @@ class Artist(Base):
     is_featured = Column(Boolean, nullable=False, default=False)
     created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    search_vector = deferred(Column(TSVECTOR, Computed(_search_vector(("name", "A"), ("bio", "C")), persisted=True)))
 
 
 class Category(Base):
     __tablename__ = "categories"
+    __table_args__ = (
+        Index("ix_categories_created_at_id", "created_at", "id"),
+        Index("ix_categories_updated_at_id", "updated_at", "id"),
+        Index("ix_categories_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_categories_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_categories_slug_trgm", "slug", postgresql_using="gin", postgresql_ops={"slug": "gin_trgm_ops"}),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     name = Column(String(255), nullable=False, unique=True)
@@ -123,6 +201,7 @@ class Category(Base):
     is_active = Column(Boolean, nullable=False, default=True)
     created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    search_vector = deferred(Column(TSVECTOR, Computed(_search_vector(("name", "A"), ("description", "B")), persisted=True)))
 
 
 video_artists = Table(
@@ -145,6 +224,12 @@ video_categories = Table(
 
 class Video(Base):
     __tablename__ = "videos"
+    __table_args__ = (
+        Index("ix_videos_created_at_id", "created_at", "id"),
+        Index("ix_videos_updated_at_id", "updated_at", "id"),
+        Index("ix_videos_search_vector", "search_vector", postgresql_using="gin"),
+        Index("ix_videos_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title = Column(String(255), nullable=False)
@@ -159,6 +244,7 @@ class Video(Base):
     metadata = Column(JSON, nullable=False, default=dict)
     created_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
     updated_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    search_vector = deferred(Column(TSVECTOR, Computed(_search_vector(("title", "A"), ("description", "B")), persisted=True)))
 
 
 class Subtitle(Base):
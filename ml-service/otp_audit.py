@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Optional
+
+from sqlalchemy import insert
+
+from config import get_settings
+from models import OTPAuditEvent
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class OTPAuditWriter:
+    """Buffers OTP audit events and writes them to Postgres in batches.
+
+    Events are flushed when ``batch_size`` accumulate or every
+    ``flush_interval`` seconds. The buffer is bounded; if the database falls
+    behind, the oldest events are dropped rather than stalling OTP requests.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_buffer: int) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer: Deque[Dict[str, Any]] = deque(maxlen=max_buffer)
+        self._dropped = 0
+        self._ready: Optional[asyncio.Event] = None
+
+    def record(self, phone_number: str, event: str, method: Optional[str] = None, detail: Optional[str] = None) -> None:
+        if not settings.otp_audit_enabled:
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self._dropped += 1
+        self._buffer.append(
+            {
+                "id": uuid.uuid4(),
+                "phone_number": phone_number,
+                "event": event,
+                "method": method,
+                "detail": detail,
+                "created_at": datetime.now(timezone.utc),
+            }
+        )
+        if self._ready is not None and len(self._buffer) >= self.batch_size:
+            self._ready.set()
+
+    async def flush(self) -> int:
+        from db import SessionLocal
+
+        written = 0
+        while self._buffer:
+            rows = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+            try:
+                async with SessionLocal() as session:
+                    await session.execute(insert(OTPAuditEvent), rows)
+                    await session.commit()
+            except Exception:
+                self._buffer.extendleft(reversed(rows))
+                raise
+            written += len(rows)
+        if self._dropped:
+            logger.warning("Dropped %s OTP audit events while the buffer was full", self._dropped)
+            self._dropped = 0
+        return written
+
+    async def run(self) -> None:
+        self._ready = asyncio.Event()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._ready.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._ready.clear()
+                try:
+                    await self.flush()
+                except Exception:  # noqa: BLE001
+                    logger.exception("Failed to write OTP audit events")
+        finally:
+            self._ready = None
+
+
+audit_writer = OTPAuditWriter(
+    batch_size=settings.otp_audit_batch_size,
+    flush_interval=settings.otp_audit_flush_seconds,
+    max_buffer=settings.otp_audit_max_buffer,
+)
+
+
+def record_otp_event(phone_number: str, event: str, method: Optional[str] = None, detail: Optional[str] = None) -> None:
+    audit_writer.record(phone_number, event, method, detail)
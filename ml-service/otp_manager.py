@@ -1,113 +1,87 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta, timezone
-from typing import Optional, Tuple
+import math
+from datetime import datetime
+from typing import Tuple
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import get_settings
-from models import PhoneOTP
+from otp_audit import record_otp_event
+from otp_outbox import enqueue_otp, notify_outbox
+from otp_store import (
+    EXHAUSTED,
+    EXPIRED,
+    NOT_FOUND,
+    RATE_LIMITED,
+    RESEND_WAIT,
+    VERIFIED,
+    OTPState,
+    get_otp_store,
+)
 from otp_utils import generate_code, generate_salt, hash_code, verify_code
-from twilio_service import TwilioOTPService
 
 settings = get_settings()
 
 
-async def _get_record(session: AsyncSession, phone_number: str) -> Optional[PhoneOTP]:
-    result = await session.execute(select(PhoneOTP).where(PhoneOTP.phone_number == phone_number))
-    return result.scalar_one_or_none()
-
-
-def _now() -> datetime:
-    return datetime.now(timezone.utc)
-
-
 async def send_otp(session: AsyncSession, phone_number: str, method: str) -> Tuple[datetime, int]:
-    now = _now()
-    record = await _get_record(session, phone_number)
-    creating = False
-
-    if record is None:
-        creating = True
-        record = PhoneOTP(
-            phone_number=phone_number,
-            attempts=0,
-            max_attempts=settings.otp_max_attempts,
-            send_count=0,
-            rate_limit_reset_at=now + timedelta(hours=1),
-        )
-        session.add(record)
-    else:
-        if record.rate_limit_reset_at is None:
-            record.rate_limit_reset_at = now + timedelta(hours=1)
-            record.send_count = 0
-        if record.rate_limit_reset_at <= now:
-            record.send_count = 0
-            record.rate_limit_reset_at = now + timedelta(hours=1)
-        if (record.send_count or 0) >= settings.otp_rate_limit_per_hour:
-            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="OTP rate limit exceeded. Try again later.")
-        if not creating and record.last_sent_at and (now - record.last_sent_at).total_seconds() < settings.otp_resend_interval_seconds:
-            remaining = settings.otp_resend_interval_seconds - int((now - record.last_sent_at).total_seconds())
-            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=f"Please wait {remaining}s before requesting a new code.")
-
     code = generate_code(settings.otp_code_length)
     salt = generate_salt()
-    record.code_hash = hash_code(code, salt)
-    record.code_salt = salt
-    record.method = method
-    record.expires_at = now + timedelta(seconds=settings.otp_ttl_seconds)
-    record.last_sent_at = now
-    record.verified_at = None
-    record.attempts = 0
-    record.send_count = (record.send_count or 0) + 1
-
-    twilio = await TwilioOTPService.from_session(session)
+    issued = await get_otp_store().issue(phone_number, hash_code(code, salt), salt, method)
+    if issued.status == RATE_LIMITED:
+        record_otp_event(phone_number, "rate_limited", method)
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="OTP rate limit exceeded. Try again later.")
+    if issued.status == RESEND_WAIT:
+        remaining = math.ceil(issued.retry_after)
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=f"Please wait {remaining}s before requesting a new code.")
+
     try:
-        await twilio.send_code(phone_number, code, method)
+        await enqueue_otp(session, phone_number, code, method, issued.expires_at)
         await session.commit()
-    except Exception:
+    except BaseException:
         await session.rollback()
+        # The code was never queued, so it must not use up the send or the resend wait.
+        await get_otp_store().revoke(phone_number, salt)
         raise
+    notify_outbox()
+    record_otp_event(phone_number, "sent", method)
 
-    return record.expires_at, settings.otp_resend_interval_seconds
+    return issued.expires_at, settings.otp_resend_interval_seconds
 
 
-async def verify_otp(session: AsyncSession, phone_number: str, code: str) -> bool:
-    record = await _get_record(session, phone_number)
-    now = _now()
-    if record is None:
+async def verify_otp(phone_number: str, code: str) -> bool:
+    store = get_otp_store()
+    attempt = await store.reserve_attempt(phone_number)
+    if attempt.status == NOT_FOUND:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No OTP request found.")
-    if record.verified_at:
+    if attempt.status == VERIFIED:
         return True
-    if now > record.expires_at:
+    if attempt.status == EXPIRED:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="OTP code expired. Request a new code.")
-    if record.attempts >= record.max_attempts:
+    if attempt.status == EXHAUSTED:
         raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Maximum verification attempts exceeded.")
 
-    if not verify_code(code, record.code_salt, record.code_hash):
-        record.attempts += 1
-        await session.commit()
+    if not verify_code(code, attempt.code_salt, attempt.code_hash):
+        record_otp_event(phone_number, "verify_failed")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid OTP code.")
 
-    record.verified_at = now
-    record.attempts += 1
-    await session.commit()
+    if not await store.mark_verified(phone_number, attempt.code_salt):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="OTP code was replaced. Use the latest code.")
+    record_otp_event(phone_number, "verified")
     return True
 
 
 async def resend_otp(session: AsyncSession, phone_number: str, method: str) -> Tuple[datetime, int]:
-    record = await _get_record(session, phone_number)
+    record = await get_otp_store().get(phone_number)
     if record is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No OTP request found.")
     chosen_method = method or record.method
     return await send_otp(session, phone_number, chosen_method)
 
 
-async def verification_status(session: AsyncSession, phone_number: str) -> PhoneOTP:
-    record = await _get_record(session, phone_number)
+async def verification_status(phone_number: str) -> OTPState:
+    record = await get_otp_store().get(phone_number)
     if record is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No OTP request found.")
     return record
-
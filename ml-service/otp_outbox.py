@@ -0,0 +1,286 @@
+"""Durable outbox for OTP delivery.
+
+``otp_manager`` enqueues a row in the same transaction that stores the code hash;
+workers claim due rows with ``FOR UPDATE SKIP LOCKED`` and deliver them in parallel,
+and between batches delete finished rows older than ``OTP_OUTBOX_RETENTION_SECONDS``.
+Run ``python otp_outbox.py --concurrency 16`` for a standalone worker; the API
+process also runs one inline unless ``OTP_OUTBOX_INLINE_WORKER=false``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import get_settings
+from encryption import decrypt_value, encrypt_value
+from models import OTPOutbox
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PENDING = "pending"
+SENDING = "sending"
+SENT = "sent"
+FAILED = "failed"
+EXPIRED = "expired"
+SUPERSEDED = "superseded"
+FINISHED = (SENT, FAILED, EXPIRED, SUPERSEDED)
+
+_wakeup: Optional[asyncio.Event] = None
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _wakeup_event() -> asyncio.Event:
+    global _wakeup
+    if _wakeup is None:
+        _wakeup = asyncio.Event()
+    return _wakeup
+
+
+def notify_outbox() -> None:
+    """Wake the in-process worker after a commit instead of waiting for the next poll."""
+    if _wakeup is not None:
+        _wakeup.set()
+
+
+async def enqueue_otp(
+    session: AsyncSession,
+    phone_number: str,
+    code: str,
+    method: str,
+    expires_at: datetime,
+) -> OTPOutbox:
+    """Queue ``code`` for delivery and retire undelivered codes for the same number.
+
+    Does not commit; the caller commits together with the OTP record and then
+    calls :func:`notify_outbox`.
+    """
+    await session.execute(
+        update(OTPOutbox)
+        .where(OTPOutbox.phone_number == phone_number, OTPOutbox.status == PENDING)
+        .values(status=SUPERSEDED, code_ciphertext=None, updated_at=_now())
+    )
+    entry = OTPOutbox(
+        phone_number=phone_number,
+        method=method,
+        code_ciphertext=encrypt_value(code),
+        status=PENDING,
+        attempts=0,
+        next_attempt_at=_now(),
+        expires_at=expires_at,
+    )
+    session.add(entry)
+    return entry
+
+
+async def latest_delivery(session: AsyncSession, phone_number: str) -> Optional[OTPOutbox]:
+    result = await session.execute(
+        select(OTPOutbox)
+        .where(OTPOutbox.phone_number == phone_number)
+        .order_by(OTPOutbox.created_at.desc())
+        .limit(1)
+    )
+    return result.scalar_one_or_none()
+
+
+@dataclass
+class _Outcome:
+    row_id: object
+    status: str
+    code_ciphertext: Optional[str]
+    next_attempt_at: datetime
+    last_error: Optional[str] = None
+    sent_at: Optional[datetime] = None
+
+    def params(self) -> dict:
+        return {
+            "row_id": self.row_id,
+            "new_status": self.status,
+            "new_code": self.code_ciphertext,
+            "new_next_attempt_at": self.next_attempt_at,
+            "new_last_error": self.last_error,
+            "new_sent_at": self.sent_at,
+        }
+
+
+def _backoff(attempts: int) -> timedelta:
+    delay = min(settings.otp_outbox_backoff_max_seconds, settings.otp_outbox_backoff_base_seconds * 2 ** (attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+async def _claim(session: AsyncSession, batch_size: int) -> List[OTPOutbox]:
+    now = _now()
+    due = (
+        select(OTPOutbox.id)
+        .where(OTPOutbox.status.in_((PENDING, SENDING)), OTPOutbox.next_attempt_at <= now)
+        .order_by(OTPOutbox.next_attempt_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    # A claimed row is leased until next_attempt_at; if the worker dies it becomes due again.
+    result = await session.execute(
+        update(OTPOutbox)
+        .where(OTPOutbox.id.in_(due.scalar_subquery()))
+        .values(
+            status=SENDING,
+            attempts=OTPOutbox.attempts + 1,
+            next_attempt_at=now + timedelta(seconds=settings.otp_outbox_lease_seconds),
+            updated_at=now,
+        )
+        .returning(OTPOutbox)
+        .execution_options(synchronize_session=False)
+    )
+    rows = list(result.scalars().all())
+    await session.commit()
+    return rows
+
+
+async def _deliver(twilio, unavailable: Optional[str], row: OTPOutbox, semaphore: asyncio.Semaphore) -> _Outcome:
+    now = _now()
+    if row.expires_at <= now:
+        return _Outcome(row.id, EXPIRED, None, now, "Code expired before delivery")
+    if row.attempts > settings.otp_outbox_max_attempts:
+        return _Outcome(row.id, FAILED, None, now, row.last_error)
+
+    error: Optional[str] = None
+    if unavailable is not None:
+        error = unavailable
+    else:
+        try:
+            async with semaphore:
+                await twilio.send_code(row.phone_number, decrypt_value(row.code_ciphertext), row.method)
+        except HTTPException as exc:
+            error = str(exc.detail)
+        except Exception as exc:  # noqa: BLE001
+            error = f"Unexpected delivery error: {exc}"
+        else:
+            return _Outcome(row.id, SENT, None, now, sent_at=_now())
+
+    logger.warning("OTP delivery %s attempt %s failed: %s", row.id, row.attempts, error)
+    if row.attempts >= settings.otp_outbox_max_attempts:
+        return _Outcome(row.id, FAILED, None, now, error)
+    return _Outcome(row.id, PENDING, row.code_ciphertext, now + _backoff(row.attempts), error)
+
+
+async def process_batch(session: AsyncSession, batch_size: int, concurrency: int) -> int:
+    """Claim up to ``batch_size`` due rows, deliver them and record the outcomes."""
+    from twilio_service import TwilioOTPService
+
+    rows = await _claim(session, batch_size)
+    if not rows:
+        return 0
+
+    twilio: Optional[TwilioOTPService] = None
+    unavailable: Optional[str] = None
+    try:
+        twilio = await TwilioOTPService.from_session(session)
+    except HTTPException as exc:
+        # Missing configuration is recorded on each row and retried with backoff.
+        unavailable = str(exc.detail)
+    semaphore = asyncio.Semaphore(concurrency)
+    outcomes = await asyncio.gather(*(_deliver(twilio, unavailable, row, semaphore) for row in rows))
+
+    table = OTPOutbox.__table__
+    await session.execute(
+        update(table)
+        .where(table.c.id == bindparam("row_id"))
+        .values(
+            status=bindparam("new_status"),
+            code_ciphertext=bindparam("new_code"),
+            next_attempt_at=bindparam("new_next_attempt_at"),
+            last_error=bindparam("new_last_error"),
+            sent_at=bindparam("new_sent_at"),
+            updated_at=_now(),
+        ),
+        [outcome.params() for outcome in outcomes],
+    )
+    await session.commit()
+    return len(rows)
+
+
+async def prune_outbox(session: AsyncSession, retention_seconds: float, batch_size: int) -> int:
+    """Delete up to ``batch_size`` finished rows last updated more than ``retention_seconds`` ago."""
+    cutoff = _now() - timedelta(seconds=retention_seconds)
+    stale = (
+        select(OTPOutbox.id)
+        .where(OTPOutbox.status.in_(FINISHED), OTPOutbox.updated_at < cutoff)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    result = await session.execute(
+        delete(OTPOutbox).where(OTPOutbox.id.in_(stale.scalar_subquery())).execution_options(synchronize_session=False)
+    )
+    await session.commit()
+    return result.rowcount
+
+
+async def run_worker(
+    concurrency: int = settings.otp_outbox_concurrency,
+    batch_size: int = settings.otp_outbox_batch_size,
+    poll_interval: float = settings.otp_outbox_poll_interval_seconds,
+    once: bool = False,
+) -> None:
+    from db import SessionLocal
+
+    wakeup = _wakeup_event()
+    next_prune = time.monotonic()
+    while True:
+        try:
+            async with SessionLocal() as session:
+                processed = await process_batch(session, batch_size, concurrency)
+        except asyncio.CancelledError:
+            raise
+        except Exception:  # noqa: BLE001
+            logger.exception("OTP outbox batch failed")
+            processed = 0
+        if time.monotonic() >= next_prune:
+            # One batch per pass so a large backlog of old rows never delays deliveries for long.
+            prune_batch = settings.otp_outbox_prune_batch_size
+            try:
+                async with SessionLocal() as session:
+                    pruned = await prune_outbox(session, settings.otp_outbox_retention_seconds, prune_batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception:  # noqa: BLE001
+                logger.exception("OTP outbox prune failed")
+                pruned = 0
+            if pruned < prune_batch:
+                next_prune = time.monotonic() + settings.otp_outbox_prune_interval_seconds
+        if once:
+            return
+        # A full batch of either kind means there is more to do, so go round again without waiting.
+        if processed < batch_size and time.monotonic() < next_prune:
+            wakeup.clear()
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Deliver queued OTP codes")
+    parser.add_argument("--concurrency", type=int, default=settings.otp_outbox_concurrency, help="Deliveries in flight")
+    parser.add_argument("--batch-size", type=int, default=settings.otp_outbox_batch_size, help="Rows claimed per batch")
+    parser.add_argument("--poll-interval", type=float, default=settings.otp_outbox_poll_interval_seconds, help="Seconds between polls when idle")
+    parser.add_argument("--once", action="store_true", help="Process one batch and exit")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_worker(args.concurrency, args.batch_size, args.poll_interval, args.once))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,344 @@
+from __future__ import annotations
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional
+
+from fastapi import HTTPException, status
+
+from config import get_settings
+
+try:
+    import redis.asyncio as redis_asyncio
+    from redis.exceptions import RedisError
+except ModuleNotFoundError:  # redis is only needed for OTP_STORE_BACKEND=redis
+    redis_asyncio = None
+    RedisError = OSError
+
+settings = get_settings()
+
+ISSUED = "issued"
+RATE_LIMITED = "rate_limited"
+RESEND_WAIT = "resend_wait"
+
+CHECK = "check"
+NOT_FOUND = "not_found"
+VERIFIED = "verified"
+EXPIRED = "expired"
+EXHAUSTED = "exhausted"
+
+RATE_LIMIT_WINDOW_SECONDS = 3600
+
+
+@dataclass
+class OTPState:
+    phone_number: str
+    method: str
+    code_hash: str
+    code_salt: str
+    expires_at: datetime
+    last_sent_at: datetime
+    verified_at: Optional[datetime]
+    attempts: int
+    max_attempts: int
+    send_count: int
+
+
+@dataclass
+class IssueResult:
+    status: str
+    expires_at: Optional[datetime] = None
+    retry_after: float = 0.0
+
+
+@dataclass
+class AttemptResult:
+    status: str
+    code_hash: Optional[str] = None
+    code_salt: Optional[str] = None
+
+
+def _timestamp(value: Any) -> Optional[datetime]:
+    if value is None or value == "":
+        return None
+    return datetime.fromtimestamp(float(value), tz=timezone.utc)
+
+
+def _state(phone_number: str, fields: Mapping[str, Any]) -> OTPState:
+    return OTPState(
+        phone_number=phone_number,
+        method=fields["method"],
+        code_hash=fields["code_hash"],
+        code_salt=fields["code_salt"],
+        expires_at=_timestamp(fields["expires_at"]),
+        last_sent_at=_timestamp(fields.get("last_sent_at")),
+        verified_at=_timestamp(fields.get("verified_at")),
+        attempts=int(fields["attempts"]),
+        max_attempts=int(fields["max_attempts"]),
+        send_count=int(fields["send_count"]),
+    )
+
+
+def _retention_seconds() -> int:
+    # State must outlive both the code and the hourly send window.
+    return max(settings.otp_state_retention_seconds, settings.otp_ttl_seconds, RATE_LIMIT_WINDOW_SECONDS)
+
+
+class OTPStore(ABC):
+    """Per-phone OTP state with atomic issue/attempt transitions and TTL expiry."""
+
+    @abstractmethod
+    async def issue(self, phone_number: str, code_hash: str, code_salt: str, method: str) -> IssueResult:
+        """Store a new code unless the resend interval or hourly send limit forbids it."""
+
+    @abstractmethod
+    async def revoke(self, phone_number: str, code_salt: str) -> None:
+        """Undo an issue whose code was never queued for delivery.
+
+        The send and the resend wait are given back and the code stops
+        verifying; nothing changes if another issue replaced it meanwhile.
+        """
+
+    @abstractmethod
+    async def reserve_attempt(self, phone_number: str) -> AttemptResult:
+        """Consume one verification attempt and return the hash to check against."""
+
+    @abstractmethod
+    async def mark_verified(self, phone_number: str, code_salt: str) -> bool:
+        """Mark the code identified by ``code_salt`` verified unless it was replaced meanwhile."""
+
+    @abstractmethod
+    async def get(self, phone_number: str) -> Optional[OTPState]:
+        """Current state for ``phone_number``, or ``None`` once it has expired."""
+
+
+class InMemoryOTPStore(OTPStore):
+    """Per-process store; entries are kept in write order so expired ones are
+    always at the front and can be dropped cheaply."""
+
+    def __init__(self) -> None:
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _live(self, phone_number: str, now: float) -> Optional[Dict[str, Any]]:
+        while self._entries:
+            key, fields = next(iter(self._entries.items()))
+            if fields["purge_at"] > now:
+                break
+            del self._entries[key]
+        return self._entries.get(phone_number)
+
+    async def issue(self, phone_number: str, code_hash: str, code_salt: str, method: str) -> IssueResult:
+        now = time.time()
+        with self._lock:
+            fields = self._live(phone_number, now) or {}
+            send_count = fields.get("send_count", 0)
+            window_reset_at = fields.get("window_reset_at")
+            if window_reset_at is None or window_reset_at <= now:
+                send_count = 0
+                window_reset_at = now + RATE_LIMIT_WINDOW_SECONDS
+            if send_count >= settings.otp_rate_limit_per_hour:
+                return IssueResult(RATE_LIMITED, retry_after=window_reset_at - now)
+            last_sent_at = fields.get("last_sent_at")
+            if last_sent_at is not None and now - last_sent_at < settings.otp_resend_interval_seconds:
+                return IssueResult(RESEND_WAIT, retry_after=settings.otp_resend_interval_seconds - (now - last_sent_at))
+
+            expires_at = now + settings.otp_ttl_seconds
+            self._entries.pop(phone_number, None)
+            self._entries[phone_number] = {
+                "code_hash": code_hash,
+                "code_salt": code_salt,
+                "method": method,
+                "expires_at": expires_at,
+                "last_sent_at": now,
+                "verified_at": None,
+                "attempts": 0,
+                "max_attempts": settings.otp_max_attempts,
+                "send_count": send_count + 1,
+                "window_reset_at": window_reset_at,
+                "purge_at": now + _retention_seconds(),
+            }
+        return IssueResult(ISSUED, expires_at=_timestamp(expires_at))
+
+    async def revoke(self, phone_number: str, code_salt: str) -> None:
+        now = time.time()
+        with self._lock:
+            fields = self._live(phone_number, now)
+            if fields is None or fields["code_salt"] != code_salt:
+                return
+            fields["send_count"] = max(0, fields["send_count"] - 1)
+            fields["last_sent_at"] = None
+            fields["expires_at"] = now
+
+    async def reserve_attempt(self, phone_number: str) -> AttemptResult:
+        now = time.time()
+        with self._lock:
+            fields = self._live(phone_number, now)
+            if fields is None:
+                return AttemptResult(NOT_FOUND)
+            if fields["verified_at"] is not None:
+                return AttemptResult(VERIFIED)
+            if now > fields["expires_at"]:
+                return AttemptResult(EXPIRED)
+            if fields["attempts"] >= fields["max_attempts"]:
+                return AttemptResult(EXHAUSTED)
+            fields["attempts"] += 1
+            return AttemptResult(CHECK, fields["code_hash"], fields["code_salt"])
+
+    async def mark_verified(self, phone_number: str, code_salt: str) -> bool:
+        now = time.time()
+        with self._lock:
+            fields = self._live(phone_number, now)
+            if fields is None or fields["code_salt"] != code_salt:
+                return False
+            fields["verified_at"] = now
+            return True
+
+    async def get(self, phone_number: str) -> Optional[OTPState]:
+        with self._lock:
+            fields = self._live(phone_number, time.time())
+            return _state(phone_number, fields) if fields else None
+
+
+_ISSUE_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local ttl = tonumber(ARGV[4])
+local resend_interval = tonumber(ARGV[5])
+local per_hour = tonumber(ARGV[6])
+local state = redis.call('HMGET', KEYS[1], 'send_count', 'window_reset_at', 'last_sent_at')
+local send_count = tonumber(state[1]) or 0
+local window_reset_at = tonumber(state[2])
+local last_sent_at = tonumber(state[3])
+if window_reset_at == nil or window_reset_at <= now then
+  send_count = 0
+  window_reset_at = now + tonumber(ARGV[9])
+end
+if send_count >= per_hour then
+  return {'rate_limited', tostring(window_reset_at - now)}
+end
+if last_sent_at ~= nil and now - last_sent_at < resend_interval then
+  return {'resend_wait', tostring(resend_interval - (now - last_sent_at))}
+end
+local expires_at = now + ttl
+redis.call('HDEL', KEYS[1], 'verified_at')
+redis.call('HSET', KEYS[1],
+  'code_hash', ARGV[1], 'code_salt', ARGV[2], 'method', ARGV[3],
+  'expires_at', tostring(expires_at), 'last_sent_at', tostring(now),
+  'attempts', 0, 'max_attempts', ARGV[7], 'send_count', send_count + 1,
+  'window_reset_at', tostring(window_reset_at))
+redis.call('PEXPIRE', KEYS[1], math.ceil(tonumber(ARGV[8]) * 1000))
+return {'issued', tostring(expires_at)}
+"""
+
+_REVOKE_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'code_salt') ~= ARGV[1] then
+  return 0
+end
+local clock = redis.call('TIME')
+redis.call('HDEL', KEYS[1], 'last_sent_at')
+redis.call('HSET', KEYS[1], 'expires_at', tostring(tonumber(clock[1]) + tonumber(clock[2]) / 1000000))
+if tonumber(redis.call('HGET', KEYS[1], 'send_count')) > 0 then
+  redis.call('HINCRBY', KEYS[1], 'send_count', -1)
+end
+return 1
+"""
+
+_RESERVE_ATTEMPT_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'code_hash', 'code_salt', 'expires_at', 'attempts', 'max_attempts', 'verified_at')
+if not state[1] then
+  return {'not_found'}
+end
+if state[6] then
+  return {'verified'}
+end
+if now > tonumber(state[3]) then
+  return {'expired'}
+end
+if tonumber(state[4]) >= tonumber(state[5]) then
+  return {'exhausted'}
+end
+redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+return {'check', state[1], state[2]}
+"""
+
+_MARK_VERIFIED_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'code_salt') ~= ARGV[1] then
+  return 0
+end
+local clock = redis.call('TIME')
+redis.call('HSET', KEYS[1], 'verified_at', tostring(tonumber(clock[1]) + tonumber(clock[2]) / 1000000))
+return 1
+"""
+
+
+class RedisOTPStore(OTPStore):
+    """Shared store in any Redis-protocol server; each transition is one Lua
+    script evaluated against the server clock, and keys expire on their own."""
+
+    def __init__(self, url: str, prefix: str = "otp:") -> None:
+        if redis_asyncio is None:
+            raise RuntimeError("OTP_STORE_BACKEND=redis requires the 'redis' package")
+        self.client = redis_asyncio.from_url(url, decode_responses=True)
+        self.issue_script = self.client.register_script(_ISSUE_SCRIPT)
+        self.revoke_script = self.client.register_script(_REVOKE_SCRIPT)
+        self.reserve_script = self.client.register_script(_RESERVE_ATTEMPT_SCRIPT)
+        self.verify_script = self.client.register_script(_MARK_VERIFIED_SCRIPT)
+        self.prefix = prefix
+
+    async def _call(self, script, phone_number: str, args: list) -> Any:
+        try:
+            return await script(keys=[self.prefix + phone_number], args=args)
+        except (RedisError, OSError) as exc:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="OTP store unavailable") from exc
+
+    async def issue(self, phone_number: str, code_hash: str, code_salt: str, method: str) -> IssueResult:
+        args = [
+            code_hash,
+            code_salt,
+            method,
+            settings.otp_ttl_seconds,
+            settings.otp_resend_interval_seconds,
+            settings.otp_rate_limit_per_hour,
+            settings.otp_max_attempts,
+            _retention_seconds(),
+            RATE_LIMIT_WINDOW_SECONDS,
+        ]
+        result, value = await self._call(self.issue_script, phone_number, args)
+        if result == ISSUED:
+            return IssueResult(ISSUED, expires_at=_timestamp(value))
+        return IssueResult(result, retry_after=float(value))
+
+    async def revoke(self, phone_number: str, code_salt: str) -> None:
+        await self._call(self.revoke_script, phone_number, [code_salt])
+
+    async def reserve_attempt(self, phone_number: str) -> AttemptResult:
+        result = await self._call(self.reserve_script, phone_number, [])
+        return AttemptResult(*result)
+
+    async def mark_verified(self, phone_number: str, code_salt: str) -> bool:
+        return bool(await self._call(self.verify_script, phone_number, [code_salt]))
+
+    async def get(self, phone_number: str) -> Optional[OTPState]:
+        try:
+            fields = await self.client.hgetall(self.prefix + phone_number)
+        except (RedisError, OSError) as exc:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="OTP store unavailable") from exc
+        return _state(phone_number, fields) if fields else None
+
+
+@lru_cache
+def get_otp_store() -> OTPStore:
+    if settings.otp_store_backend == "redis":
+        return RedisOTPStore(settings.redis_url)
+    if settings.app_env == "production":
+        # Per-process state: codes vanish on restart and verification depends on which worker answers.
+        raise RuntimeError("OTP_STORE_BACKEND=memory is for development only; use redis in production")
+    return InMemoryOTPStore()
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple, TypeVar
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import Select, tuple_
+from sqlalchemy.sql.elements import ColumnElement
+
+T = TypeVar("T")
+
+
+def encode_cursor(created_at: datetime, row_id: UUID | str) -> str:
+    raw = json.dumps([created_at.isoformat(), str(row_id)], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), UUID(row_id)
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor") from exc
+
+
+def apply_page(
+    query: Select,
+    created_column: ColumnElement[Any],
+    id_column: ColumnElement[Any],
+    page: int,
+    page_size: int,
+    cursor: Optional[str],
+) -> Select:
+    """Order newest first and apply either OFFSET paging or a keyset seek.
+
+    ``cursor=None`` keeps the page-number mode. Any other value (including the
+    empty string for the first page) switches to keyset mode, which fetches one
+    extra row so :func:`split_page` can tell whether another page exists.
+    """
+    query = query.order_by(created_column.desc(), id_column.desc())
+    if cursor is None:
+        return query.offset((page - 1) * page_size).limit(page_size)
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.where(tuple_(created_column, id_column) < tuple_(created_at, row_id))
+    return query.limit(page_size + 1)
+
+
+def split_page(
+    rows: Sequence[T],
+    page_size: int,
+    cursor: Optional[str],
+    key: Callable[[T], Tuple[datetime, UUID | str]],
+) -> Tuple[List[T], Optional[str]]:
+    items = list(rows)
+    if cursor is None or len(items) <= page_size:
+        return items, None
+    items = items[:page_size]
+    return items, encode_cursor(*key(items[-1]))
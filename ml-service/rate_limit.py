@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Tuple
+
+from config import get_settings
+
+try:
+    import redis.asyncio as redis_asyncio
+    from redis.exceptions import RedisError
+except ModuleNotFoundError:  # redis is only needed for RATE_LIMIT_BACKEND=redis
+    redis_asyncio = None
+    RedisError = OSError
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@dataclass
+class RateLimitResult:
+    allowed: bool
+    limit: int
+    remaining: int
+    reset_after: float
+    retry_after: float
+
+    def headers(self) -> dict[str, str]:
+        headers = {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(self.remaining),
+            "X-RateLimit-Reset": str(math.ceil(self.reset_after)),
+        }
+        if not self.allowed:
+            headers["Retry-After"] = str(max(1, math.ceil(self.retry_after)))
+        return headers
+
+
+def _result(tokens: float, limit: int, window: float, cost: int, allowed: bool) -> RateLimitResult:
+    rate = limit / window
+    return RateLimitResult(
+        allowed=allowed,
+        limit=limit,
+        remaining=max(0, int(tokens)),
+        reset_after=(limit - tokens) / rate,
+        retry_after=0.0 if allowed else (cost - tokens) / rate,
+    )
+
+
+class RateLimitBackend(ABC):
+    """Token bucket of ``limit`` tokens refilled evenly over ``window`` seconds."""
+
+    @abstractmethod
+    async def hit(self, key: str, limit: int, window: float, cost: int = 1) -> RateLimitResult:
+        """Take ``cost`` tokens from ``key``'s bucket if it holds enough."""
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Per-process buckets with LRU eviction and idle expiry.
+
+    A bucket untouched for a full window has refilled completely, so dropping
+    it is indistinguishable from keeping it; that keeps memory proportional to
+    recently active clients and never above ``max_keys``.
+    """
+
+    def __init__(self, max_keys: int) -> None:
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float) -> None:
+        while self._buckets:
+            key, (_, updated_at, window) = next(iter(self._buckets.items()))
+            if now - updated_at < window and len(self._buckets) <= self.max_keys:
+                return
+            del self._buckets[key]
+
+    async def hit(self, key: str, limit: int, window: float, cost: int = 1) -> RateLimitResult:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at, _ = self._buckets.pop(key, (float(limit), now, window))
+            tokens = min(float(limit), tokens + (now - updated_at) * limit / window)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now, window)
+            self._evict(now)
+        return _result(tokens, limit, window, cost, allowed)
+
+
+_TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * capacity / window)
+local allowed = 0
+if tokens >= cost then
+  tokens = tokens - cost
+  allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(window * 1000))
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Shared buckets in any Redis-protocol server, updated atomically by a Lua script.
+
+    Buckets expire after one idle window. If the server is unreachable the
+    limiter fails open to ``fallback`` so a Redis outage does not take the API down.
+    """
+
+    def __init__(self, url: str, fallback: RateLimitBackend, prefix: str = "ratelimit:") -> None:
+        if redis_asyncio is None:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package")
+        self.client = redis_asyncio.from_url(url, socket_timeout=settings.rate_limit_redis_timeout_seconds)
+        self.script = self.client.register_script(_TOKEN_BUCKET_SCRIPT)
+        self.fallback = fallback
+        self.prefix = prefix
+
+    async def hit(self, key: str, limit: int, window: float, cost: int = 1) -> RateLimitResult:
+        try:
+            allowed, tokens = await self.script(keys=[self.prefix + key], args=[limit, window, cost])
+        except (RedisError, OSError) as exc:
+            logger.warning("Redis rate limiter unavailable, using in-process fallback: %s", exc)
+            return await self.fallback.hit(key, limit, window, cost)
+        return _result(float(tokens), limit, window, cost, bool(int(allowed)))
+
+
+@lru_cache
+def get_rate_limit_backend() -> RateLimitBackend:
+    memory = InMemoryRateLimitBackend(settings.rate_limit_max_keys)
+    if settings.rate_limit_backend == "redis":
+        return RedisRateLimitBackend(settings.redis_url, fallback=memory)
+    return memory
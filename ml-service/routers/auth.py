@@ -8,8 +8,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from config import get_settings
 from dependencies import otp_rate_limit
 from db import get_db
-from models import PhoneOTP
 from otp_manager import resend_otp, send_otp, verification_status, verify_otp
+from otp_outbox import PENDING, latest_delivery
+from otp_store import OTPState
 from schemas import (
     ResendOTPRequest,
     SendOTPRequest,
@@ -31,19 +32,17 @@ async def send_otp_endpoint(
     expires_at, resend_interval = await send_otp(session, request.phone_number, method)
     return {
         "success": True,
-        "message": f"OTP sent via {method.upper()}",
+        "message": f"OTP queued for delivery via {method.upper()}",
         "expires_at": expires_at.isoformat(),
         "resend_available_in": resend_interval,
         "method": method,
+        "delivery_status": PENDING,
     }
 
 
 @router.post("/verify-otp")
-async def verify_otp_endpoint(
-    request: VerifyOTPRequest,
-    session: AsyncSession = Depends(get_db),
-) -> dict:
-    verified = await verify_otp(session, request.phone_number, request.code)
+async def verify_otp_endpoint(request: VerifyOTPRequest) -> dict:
+    verified = await verify_otp(request.phone_number, request.code)
     return {
         "verified": verified,
         "message": "Phone number verified" if verified else "Verification failed",
@@ -60,10 +59,11 @@ async def resend_otp_endpoint(
     expires_at, resend_interval = await resend_otp(session, request.phone_number, method)
     return {
         "success": True,
-        "message": f"OTP resent via {method.upper()}",
+        "message": f"OTP queued for delivery via {method.upper()}",
         "expires_at": expires_at.isoformat(),
         "resend_available_in": resend_interval,
         "method": method,
+        "delivery_status": PENDING,
     }
 
 
@@ -72,7 +72,8 @@ async def verification_status_endpoint(
     phone_number: str = Query(..., regex=r"^\+\d{8,15}$"),
     session: AsyncSession = Depends(get_db),
 ) -> VerificationStatusResponse:
-    record: PhoneOTP = await verification_status(session, phone_number)
+    record: OTPState = await verification_status(phone_number)
+    delivery = await latest_delivery(session, phone_number)
     return VerificationStatusResponse(
         phone_number=record.phone_number,
         verified=record.verified_at is not None,
@@ -81,5 +82,9 @@ async def verification_status_endpoint(
         max_attempts=record.max_attempts,
         expires_at=record.expires_at.isoformat() if record.expires_at else None,
         last_sent_at=record.last_sent_at.isoformat() if record.last_sent_at else None,
+        delivery_status=delivery.status if delivery else None,
+        delivery_attempts=delivery.attempts if delivery else 0,
+        delivery_error=delivery.last_error if delivery else None,
+        delivered_at=delivery.sent_at.isoformat() if delivery and delivery.sent_at else None,
     )
 
@@ -1,12 +1,26 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import and_, delete, func, insert, or_, select
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import and_, insert, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
+from autocomplete import artist_suggestion, autocomplete_index, category_suggestion, video_suggestion
+from content_loader import load_video_with_validator, related_signatures, serialize_videos, touch_video
+from content_writes import (
+    delete_returning,
+    insert_returning,
+    replace_subtitles,
+    update_links,
+    update_returning,
+    write_transaction,
+)
+from counting import resolve_total
 from dependencies import admin_with_rate_limit
 from db import get_db
+from etag import check_not_modified, page_validator, query_parts
 from models import (
     Artist,
     Category,
@@ -15,6 +29,7 @@ from models import (
     video_artists,
     video_categories,
 )
+from pagination import apply_page, split_page
 from schemas import (
     ArtistCreate,
     ArtistListResponse,
@@ -45,44 +60,9 @@ async def serialize_category(session: AsyncSession, category: Category) -> Categ
     return CategoryResponse.model_validate(category)
 
 
-async def serialize_subtitles(session: AsyncSession, video_id: UUID) -> list[SubtitleResponse]:
-    subtitles = await session.execute(select(Subtitle).where(Subtitle.video_id == video_id))
-    return [SubtitleResponse.model_validate(obj) for obj in subtitles.scalars().all()]
-
-
 async def serialize_video(session: AsyncSession, video: Video) -> VideoResponse:
-    artist_rows = await session.execute(
-        select(Artist).join(video_artists, video_artists.c.artist_id == Artist.id).where(video_artists.c.video_id == video.id)
-    )
-    category_rows = await session.execute(
-        select(Category).join(video_categories, video_categories.c.category_id == Category.id).where(video_categories.c.video_id == video.id)
-    )
-    artist_responses = [ArtistResponse.model_validate(obj) for obj in artist_rows.scalars().all()]
-    category_responses = [CategoryResponse.model_validate(obj) for obj in category_rows.scalars().all()]
-    subtitle_responses = await serialize_subtitles(session, video.id)
-    base = {
-        "id": video.id,
-        "title": video.title,
-        "slug": video.slug,
-        "description": video.description,
-        "thumbnail_url": video.thumbnail_url,
-        "video_url": video.video_url,
-        "duration_seconds": video.duration_seconds,
-        "status": video.status,
-        "release_date": video.release_date,
-        "is_featured": video.is_featured,
-        "metadata": video.metadata or {},
-        "created_at": video.created_at,
-        "updated_at": video.updated_at,
-    }
-    return VideoResponse.model_validate(
-        {
-            **base,
-            "artists": artist_responses,
-            "categories": category_responses,
-            "subtitles": subtitle_responses,
-        }
-    )
+    items = await serialize_videos(session, [video])
+    return items[0]
 
 
 @router.post("/api/artists", response_model=ArtistResponse, status_code=status.HTTP_201_CREATED)
@@ -91,39 +71,44 @@ async def create_artist(
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
 ) -> ArtistResponse:
-    existing = await session.execute(select(Artist).where((Artist.slug == payload.slug) | (Artist.name == payload.name)))
-    if existing.scalar_one_or_none():
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Artist already exists")
-
-    artist = Artist(**payload.model_dump())
-    session.add(artist)
-    await session.commit()
-    await session.refresh(artist)
+    async with write_transaction(session):
+        artist = await insert_returning(session, Artist, payload.model_dump(), "Artist already exists")
+    autocomplete_index.upsert(artist_suggestion(artist))
     return await serialize_artist(session, artist)
 
 
 @router.get("/api/artists/{artist_id}", response_model=ArtistResponse)
 async def get_artist(
     artist_id: UUID,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
-) -> ArtistResponse:
+) -> ArtistResponse | Response:
     result = await session.execute(select(Artist).where(Artist.id == artist_id))
     artist = result.scalar_one_or_none()
     if not artist:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Artist not found")
+    not_modified = check_not_modified(request, response, artist.id, artist.updated_at)
+    if not_modified is not None:
+        return not_modified
     return await serialize_artist(session, artist)
 
 
 @router.get("/api/artists", response_model=ArtistListResponse)
 async def list_artists(
+    request: Request,
+    response: Response,
     page: int = 1,
     page_size: int = 20,
     search: str | None = None,
     status_filter: str | None = None,
+    cursor: str | None = None,
+    count_mode: str = "exact",
+    include_total: bool = True,
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
-) -> ArtistListResponse:
+) -> ArtistListResponse | Response:
     if page < 1 or page_size < 1 or page_size > 100:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination parameters")
 
@@ -136,15 +121,22 @@ async def list_artists(
     elif status_filter == "inactive":
         filters.append(Artist.is_active.is_(False))
 
-    query = select(Artist).where(*filters).order_by(Artist.created_at.desc())
-    result = await session.execute(query.offset((page - 1) * page_size).limit(page_size))
-    items = result.scalars().all()
-    count_query = select(func.count()).select_from(select(Artist.id).where(*filters).subquery())
-    total_result = await session.execute(count_query)
-    total = total_result.scalar_one()
+    query = apply_page(select(Artist).where(*filters), Artist.created_at, Artist.id, page, page_size, cursor)
+    result = await session.execute(query)
+    items, next_cursor = split_page(result.scalars().all(), page_size, cursor, lambda obj: (obj.created_at, obj.id))
+    total, total_mode = await resolve_total(session, select(Artist.id).where(*filters), count_mode, include_total)
+    not_modified = check_not_modified(request, response, query_parts(request), *page_validator(items, total, next_cursor))
+    if not_modified is not None:
+        return not_modified
     return ArtistListResponse(
         items=[await serialize_artist(session, artist) for artist in items],
-        pagination=Pagination(total=total, page=page, page_size=page_size),
+        pagination=Pagination(
+            total=total,
+            page=page,
+            page_size=page_size,
+            total_mode=total_mode,
+            next_cursor=next_cursor,
+        ),
     )
 
 
@@ -155,16 +147,9 @@ async def update_artist(
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
 ) -> ArtistResponse:
-    result = await session.execute(select(Artist).where(Artist.id == artist_id))
-    artist = result.scalar_one_or_none()
-    if not artist:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Artist not found")
-
-    data = payload.model_dump(exclude_unset=True)
-    for key, value in data.items():
-        setattr(artist, key, value)
-    await session.commit()
-    await session.refresh(artist)
+    async with write_transaction(session, conflict="Artist already exists"):
+        artist = await update_returning(session, Artist, artist_id, payload.model_dump(exclude_unset=True), "Artist not found")
+    autocomplete_index.upsert(artist_suggestion(artist))
     return await serialize_artist(session, artist)
 
 
@@ -174,12 +159,9 @@ async def delete_artist(
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
 ) -> None:
-    result = await session.execute(select(Artist).where(Artist.id == artist_id))
-    artist = result.scalar_one_or_none()
-    if not artist:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Artist not found")
-    await session.delete(artist)
-    await session.commit()
+    async with write_transaction(session):
+        await delete_returning(session, Artist, artist_id, "Artist not found")
+    autocomplete_index.remove("artist", artist_id)
 
 
 @router.post("/api/categories", response_model=CategoryResponse, status_code=status.HTTP_201_CREATED)
@@ -188,38 +170,44 @@ async def create_category(
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
 ) -> CategoryResponse:
-    existing = await session.execute(select(Category).where((Category.slug == payload.slug) | (Category.name == payload.name)))
-    if existing.scalar_one_or_none():
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Category already exists")
-    category = Category(**payload.model_dump())
-    session.add(category)
-    await session.commit()
-    await session.refresh(category)
+    async with write_transaction(session, invalid_reference="Parent category not found"):
+        category = await insert_returning(session, Category, payload.model_dump(), "Category already exists")
+    autocomplete_index.upsert(category_suggestion(category))
     return await serialize_category(session, category)
 
 
 @router.get("/api/categories/{category_id}", response_model=CategoryResponse)
 async def get_category(
     category_id: UUID,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
-) -> CategoryResponse:
+) -> CategoryResponse | Response:
     result = await session.execute(select(Category).where(Category.id == category_id))
     category = result.scalar_one_or_none()
     if not category:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
+    not_modified = check_not_modified(request, response, category.id, category.updated_at)
+    if not_modified is not None:
+        return not_modified
     return await serialize_category(session, category)
 
 
 @router.get("/api/categories", response_model=CategoryListResponse)
 async def list_categories(
+    request: Request,
+    response: Response,
     page: int = 1,
     page_size: int = 20,
     search: str | None = None,
     status_filter: str | None = None,
+    cursor: str | None = None,
+    count_mode: str = "exact",
+    include_total: bool = True,
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
-) -> CategoryListResponse:
+) -> CategoryListResponse | Response:
     if page < 1 or page_size < 1 or page_size > 100:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination parameters")
 
@@ -232,15 +220,22 @@ async def list_categories(
     elif status_filter == "inactive":
         filters.append(Category.is_active.is_(False))
 
-    query = select(Category).where(*filters).order_by(Category.created_at.desc())
-    result = await session.execute(query.offset((page - 1) * page_size).limit(page_size))
-    items = result.scalars().all()
-    count_query = select(func.count()).select_from(select(Category.id).where(*filters).subquery())
-    total_result = await session.execute(count_query)
-    total = total_result.scalar_one()
+    query = apply_page(select(Category).where(*filters), Category.created_at, Category.id, page, page_size, cursor)
+    result = await session.execute(query)
+    items, next_cursor = split_page(result.scalars().all(), page_size, cursor, lambda obj: (obj.created_at, obj.id))
+    total, total_mode = await resolve_total(session, select(Category.id).where(*filters), count_mode, include_total)
+    not_modified = check_not_modified(request, response, query_parts(request), *page_validator(items, total, next_cursor))
+    if not_modified is not None:
+        return not_modified
     return CategoryListResponse(
         items=[await serialize_category(session, category) for category in items],
-        pagination=Pagination(total=total, page=page, page_size=page_size),
+        pagination=Pagination(
+            total=total,
+            page=page,
+            page_size=page_size,
+            total_mode=total_mode,
+            next_cursor=next_cursor,
+        ),
     )
 
 
@@ -251,15 +246,11 @@ async def update_category(
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
 ) -> CategoryResponse:
-    result = await session.execute(select(Category).where(Category.id == category_id))
-    category = result.scalar_one_or_none()
-    if not category:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
-    data = payload.model_dump(exclude_unset=True)
-    for key, value in data.items():
-        setattr(category, key, value)
-    await session.commit()
-    await session.refresh(category)
+    async with write_transaction(session, conflict="Category already exists", invalid_reference="Parent category not found"):
+        category = await update_returning(
+            session, Category, category_id, payload.model_dump(exclude_unset=True), "Category not found"
+        )
+    autocomplete_index.upsert(category_suggestion(category))
     return await serialize_category(session, category)
 
 
@@ -269,12 +260,9 @@ async def delete_category(
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
 ) -> None:
-    result = await session.execute(select(Category).where(Category.id == category_id))
-    category = result.scalar_one_or_none()
-    if not category:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Category not found")
-    await session.delete(category)
-    await session.commit()
+    async with write_transaction(session):
+        await delete_returning(session, Category, category_id, "Category not found")
+    autocomplete_index.remove("category", category_id)
 
 
 @router.post("/api/videos", response_model=VideoResponse, status_code=status.HTTP_201_CREATED)
@@ -283,63 +271,66 @@ async def create_video(
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
 ) -> VideoResponse:
-    existing = await session.execute(select(Video).where(Video.slug == payload.slug))
-    if existing.scalar_one_or_none():
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Video with slug already exists")
-
     video_data = payload.model_dump(exclude={"artist_ids", "category_ids", "subtitles"})
-    video = Video(**video_data)
-    session.add(video)
-    await session.commit()
-    await session.refresh(video)
-
-    if payload.artist_ids:
-        values = [
-            {"video_id": video.id, "artist_id": artist_id}
-            for artist_id in payload.artist_ids
-        ]
-        await session.execute(insert(video_artists), values)
-
-    if payload.category_ids:
-        values = [
-            {"video_id": video.id, "category_id": category_id}
-            for category_id in payload.category_ids
-        ]
-        await session.execute(insert(video_categories), values)
-
-    if payload.subtitles:
-        for subtitle in payload.subtitles:
-            sub = Subtitle(video_id=video.id, **subtitle.model_dump())
-            session.add(sub)
-
-    await session.commit()
+    async with write_transaction(session, invalid_reference="Unknown artist or category"):
+        video = await insert_returning(session, Video, video_data, "Video with slug already exists")
+
+        # Repeated ids would hit the link tables' primary keys; keep the first of each.
+        if payload.artist_ids:
+            values = [
+                {"video_id": video.id, "artist_id": artist_id}
+                for artist_id in dict.fromkeys(payload.artist_ids)
+            ]
+            await session.execute(insert(video_artists), values)
+
+        if payload.category_ids:
+            values = [
+                {"video_id": video.id, "category_id": category_id}
+                for category_id in dict.fromkeys(payload.category_ids)
+            ]
+            await session.execute(insert(video_categories), values)
+
+        if payload.subtitles:
+            values = [{"video_id": video.id, **subtitle.model_dump()} for subtitle in payload.subtitles]
+            await session.execute(insert(Subtitle), values)
+    autocomplete_index.upsert(video_suggestion(video))
     return await serialize_video(session, video)
 
 
 @router.get("/api/videos/{video_id}", response_model=VideoResponse)
 async def get_video(
     video_id: UUID,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
-) -> VideoResponse:
-    result = await session.execute(select(Video).where(Video.id == video_id))
-    video = result.scalar_one_or_none()
-    if not video:
+) -> VideoResponse | Response:
+    loaded = await load_video_with_validator(session, video_id)
+    if loaded is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Video not found")
+    video, validator = loaded
+    not_modified = check_not_modified(request, response, video.id, *validator)
+    if not_modified is not None:
+        return not_modified
     return await serialize_video(session, video)
 
 
 @router.get("/api/videos", response_model=VideoListResponse)
 async def list_videos(
+    request: Request,
+    response: Response,
     page: int = 1,
     page_size: int = 20,
     search: str | None = None,
     status_filter: str | None = None,
     artist_id: UUID | None = None,
     category_id: UUID | None = None,
+    cursor: str | None = None,
+    count_mode: str = "exact",
+    include_total: bool = True,
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
-) -> VideoListResponse:
+) -> VideoListResponse | Response:
     if page < 1 or page_size < 1 or page_size > 100:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination parameters")
 
@@ -362,52 +353,86 @@ async def list_videos(
         count_query = count_query.join(video_categories, video_categories.c.video_id == Video.id)
         filters.append(video_categories.c.category_id == category_id)
 
-    query = query.where(*filters).order_by(Video.created_at.desc())
+    query = apply_page(query.where(*filters), Video.created_at, Video.id, page, page_size, cursor)
     count_query = count_query.where(*filters)
 
-    total_result = await session.execute(select(func.count()).select_from(count_query.subquery()))
-    total = total_result.scalar_one()
-    result = await session.execute(query.offset((page - 1) * page_size).limit(page_size))
-    videos = result.scalars().all()
-    items = [await serialize_video(session, video) for video in videos]
-    return VideoListResponse(items=items, pagination=Pagination(total=total, page=page, page_size=page_size))
+    total, total_mode = await resolve_total(session, count_query, count_mode, include_total)
+    result = await session.execute(query)
+    videos, next_cursor = split_page(result.scalars().all(), page_size, cursor, lambda video: (video.created_at, video.id))
+    related = await related_signatures(session, [video.id for video in videos])
+    not_modified = check_not_modified(
+        request, response, query_parts(request), *page_validator(videos, total, next_cursor), related
+    )
+    if not_modified is not None:
+        return not_modified
+    items = await serialize_videos(session, videos)
+    return VideoListResponse(
+        items=items,
+        pagination=Pagination(
+            total=total,
+            page=page,
+            page_size=page_size,
+            total_mode=total_mode,
+            next_cursor=next_cursor,
+        ),
+    )
+
+
+_VIDEO_RELATION_FIELDS = {
+    "artist_ids",
+    "category_ids",
+    "subtitles",
+    "add_artist_ids",
+    "remove_artist_ids",
+    "add_category_ids",
+    "remove_category_ids",
+}
 
 
 @router.put("/api/videos/{video_id}", response_model=VideoResponse)
+@router.patch("/api/videos/{video_id}", response_model=VideoResponse)
 async def update_video(
     video_id: UUID,
     payload: VideoUpdate,
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
 ) -> VideoResponse:
-    result = await session.execute(select(Video).where(Video.id == video_id))
-    video = result.scalar_one_or_none()
-    if not video:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Video not found")
-
-    data = payload.model_dump(exclude_unset=True, exclude={"artist_ids", "category_ids", "subtitles"})
-    for key, value in data.items():
-        setattr(video, key, value)
-
-    if payload.artist_ids is not None:
-        await session.execute(delete(video_artists).where(video_artists.c.video_id == video.id))
-        if payload.artist_ids:
-            values = [{"video_id": video.id, "artist_id": artist_id} for artist_id in payload.artist_ids]
-            await session.execute(insert(video_artists), values)
-
-    if payload.category_ids is not None:
-        await session.execute(delete(video_categories).where(video_categories.c.video_id == video.id))
-        if payload.category_ids:
-            values = [{"video_id": video.id, "category_id": category_id} for category_id in payload.category_ids]
-            await session.execute(insert(video_categories), values)
-
-    if payload.subtitles is not None:
-        await session.execute(delete(Subtitle).where(Subtitle.video_id == video.id))
-        for subtitle in payload.subtitles:
-            session.add(Subtitle(video_id=video.id, **subtitle.model_dump()))
-
-    await session.commit()
-    await session.refresh(video)
+    """Update a video's fields and links.
+
+    ``artist_ids``/``category_ids``/``subtitles`` give the full new set;
+    ``add_*``/``remove_*`` change a large set without resending it. Either
+    way only the links that differ are written.
+    """
+    data = payload.model_dump(exclude_unset=True, exclude=_VIDEO_RELATION_FIELDS)
+
+    async with write_transaction(session, conflict="Video with slug already exists", invalid_reference="Unknown artist or category"):
+        video = await update_returning(session, Video, video_id, data, "Video not found")
+
+        changed = await update_links(
+            session,
+            video_artists,
+            video_artists.c.artist_id,
+            video.id,
+            payload.artist_ids,
+            payload.add_artist_ids,
+            payload.remove_artist_ids,
+        )
+        changed |= await update_links(
+            session,
+            video_categories,
+            video_categories.c.category_id,
+            video.id,
+            payload.category_ids,
+            payload.add_category_ids,
+            payload.remove_category_ids,
+        )
+        if payload.subtitles is not None:
+            changed |= await replace_subtitles(session, video.id, payload.subtitles)
+
+        if changed and not data:
+            # Relations live in other tables; bump the video so its ETag changes.
+            video = await update_returning(session, Video, video.id, {"updated_at": datetime.utcnow()}, "Video not found")
+    autocomplete_index.upsert(video_suggestion(video))
     return await serialize_video(session, video)
 
 
@@ -417,12 +442,9 @@ async def delete_video(
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
 ) -> None:
-    result = await session.execute(select(Video).where(Video.id == video_id))
-    video = result.scalar_one_or_none()
-    if not video:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Video not found")
-    await session.delete(video)
-    await session.commit()
+    async with write_transaction(session):
+        await delete_returning(session, Video, video_id, "Video not found")
+    autocomplete_index.remove("video", video_id)
 
 
 @router.post("/api/subtitles", response_model=SubtitleResponse, status_code=status.HTTP_201_CREATED)
@@ -431,13 +453,11 @@ async def create_subtitle(
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
 ) -> SubtitleResponse:
-    video = await session.execute(select(Video).where(Video.id == payload.video_id))
-    if not video.scalar_one_or_none():
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Video not found")
-    subtitle = Subtitle(video_id=payload.video_id, **payload.model_dump(exclude={"video_id"}))
-    session.add(subtitle)
-    await session.commit()
-    await session.refresh(subtitle)
+    async with write_transaction(session):
+        if not await touch_video(session, payload.video_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Video not found")
+        result = await session.execute(insert(Subtitle).values(**payload.model_dump()).returning(Subtitle))
+        subtitle = result.scalar_one()
     return SubtitleResponse.model_validate(subtitle)
 
 
@@ -448,15 +468,9 @@ async def update_subtitle(
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
 ) -> SubtitleResponse:
-    result = await session.execute(select(Subtitle).where(Subtitle.id == subtitle_id))
-    subtitle = result.scalar_one_or_none()
-    if not subtitle:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Subtitle not found")
-    data = payload.model_dump(exclude_unset=True)
-    for key, value in data.items():
-        setattr(subtitle, key, value)
-    await session.commit()
-    await session.refresh(subtitle)
+    async with write_transaction(session):
+        subtitle = await update_returning(session, Subtitle, subtitle_id, payload.model_dump(exclude_unset=True), "Subtitle not found")
+        await touch_video(session, subtitle.video_id)
     return SubtitleResponse.model_validate(subtitle)
 
 
@@ -466,12 +480,9 @@ async def delete_subtitle(
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
 ) -> None:
-    result = await session.execute(select(Subtitle).where(Subtitle.id == subtitle_id))
-    subtitle = result.scalar_one_or_none()
-    if not subtitle:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Subtitle not found")
-    await session.delete(subtitle)
-    await session.commit()
+    async with write_transaction(session):
+        removed = await delete_returning(session, Subtitle, subtitle_id, "Subtitle not found", Subtitle.video_id)
+        await touch_video(session, removed.video_id)
 
 
 @router.get("/api/subtitles", response_model=list[SubtitleResponse])
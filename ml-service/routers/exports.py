@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+
+from catalog_export import MEDIA_TYPES, parse_export_format, parse_export_kind, stream_export
+from config import get_settings
+from dependencies import admin_with_rate_limit
+
+router = APIRouter(tags=["export"])
+settings = get_settings()
+
+
+@router.get("/api/export/{kind}", response_class=StreamingResponse)
+async def export_content(
+    kind: str,
+    format: str = "ndjson",
+    updated_since: datetime | None = None,
+    _: str = Depends(admin_with_rate_limit),
+) -> StreamingResponse:
+    """Stream every video, artist, category or subtitle as NDJSON or CSV.
+
+    Rows come in ``(updated_at, id)`` order; pass the last ``updated_at`` seen
+    as ``updated_since`` to fetch only what changed since a previous export.
+    """
+    kind = parse_export_kind(kind)
+    export_format = parse_export_format(format)
+    return StreamingResponse(
+        stream_export(kind, export_format, updated_since, settings.export_batch_size),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{export_format}"'},
+    )
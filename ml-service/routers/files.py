@@ -5,12 +5,14 @@ from typing import Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import func, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from counting import resolve_total
 from dependencies import admin_with_rate_limit
 from db import get_db
 from models import FileObject
+from pagination import apply_page, split_page
 from schemas import (
     BucketListResponse,
     BucketRequest,
@@ -21,6 +23,7 @@ from schemas import (
     UploadFileResponse,
 )
 from storage_service import StorageService
+from storage_usage import apply_usage_delta, read_usage
 
 router = APIRouter(prefix="/api/files", tags=["files"])
 
@@ -32,7 +35,7 @@ async def request_upload(
     actor: str = Depends(admin_with_rate_limit),
 ) -> UploadFileResponse:
     storage = await StorageService.from_session(session)
-    storage.ensure_bucket()
+    await storage.ensure_bucket_async()
 
     key = storage.generate_object_key(payload.file_name)
     upload_url = storage.generate_presigned_upload(key, payload.content_type)
@@ -44,6 +47,7 @@ async def request_upload(
         content_type=payload.content_type,
         size_bytes=payload.size_bytes,
     )
+    # Not counted in storage usage yet: the claimed size only counts once bucket_inventory confirms the object.
     session.add(record)
     await session.commit()
 
@@ -54,29 +58,40 @@ async def request_upload(
 async def list_files(
     page: int = 1,
     page_size: int = 20,
+    cursor: str | None = None,
+    count_mode: str = "exact",
+    include_total: bool = True,
+    include_urls: bool = True,
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
 ) -> FileListResponse:
     if page < 1 or page_size < 1 or page_size > 100:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination parameters")
 
-    query = select(FileObject).where(FileObject.deleted_at.is_(None)).order_by(FileObject.uploaded_at.desc())
-    total_query = select(func.count()).select_from(FileObject).where(FileObject.deleted_at.is_(None))
-
-    total_result = await session.execute(total_query)
-    total = total_result.scalar_one()
+    query = apply_page(
+        select(FileObject).where(FileObject.deleted_at.is_(None)),
+        FileObject.uploaded_at,
+        FileObject.id,
+        page,
+        page_size,
+        cursor,
+    )
+    total_query = select(FileObject.id).where(FileObject.deleted_at.is_(None))
+    total, total_mode = await resolve_total(session, total_query, count_mode, include_total)
 
-    result = await session.execute(query.offset((page - 1) * page_size).limit(page_size))
-    records = result.scalars().all()
+    result = await session.execute(query)
+    records, next_cursor = split_page(result.scalars().all(), page_size, cursor, lambda obj: (obj.uploaded_at, obj.id))
 
-    storage = await StorageService.from_session(session)
+    storage = await StorageService.from_session(session) if include_urls else None
 
     items: list[FileItem] = []
     for record in records:
         preview_url: Optional[str] = None
-        if record.content_type.startswith(("image/", "application/pdf")):
-            preview_url = storage.generate_presigned_download(record.key, expires_in=300)
-        download_url = storage.generate_presigned_download(record.key, expires_in=300)
+        download_url: Optional[str] = None
+        if storage is not None:
+            download_url = storage.generate_presigned_download(record.key, expires_in=300)
+            if record.content_type.startswith(("image/", "application/pdf")):
+                preview_url = download_url
 
         items.append(
             FileItem(
@@ -92,7 +107,14 @@ async def list_files(
             )
         )
 
-    return FileListResponse(items=items, page=page, page_size=page_size, total=total)
+    return FileListResponse(
+        items=items,
+        page=page,
+        page_size=page_size,
+        total=total,
+        total_mode=total_mode,
+        next_cursor=next_cursor,
+    )
 
 
 @router.get("/{file_id}/download")
@@ -123,21 +145,22 @@ async def delete_file(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
 
     storage = await StorageService.from_session(session)
-    storage.delete_object(record.key)
+    await storage.delete_object_async(record.key)
     record.deleted_at = datetime.utcnow()
     record.updated_at = record.deleted_at
+    await apply_usage_delta(session, record, sign=-1)
     await session.commit()
     return {"success": True, "message": "File deleted"}
 
 
 @router.get("/storage-usage", response_model=StorageUsageResponse)
 async def storage_usage(
+    breakdown: bool = False,
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
 ) -> StorageUsageResponse:
     storage = await StorageService.from_session(session)
-    usage = storage.get_usage()
-    return StorageUsageResponse(total_files=usage["total_files"], total_size=usage["total_size"])
+    return await read_usage(session, storage.credentials.bucket, breakdown)
 
 
 @router.get("/buckets", response_model=BucketListResponse)
@@ -146,7 +169,7 @@ async def list_buckets(
     _: str = Depends(admin_with_rate_limit),
 ) -> BucketListResponse:
     storage = await StorageService.from_session(session)
-    return BucketListResponse(buckets=storage.list_buckets())
+    return BucketListResponse(buckets=await storage.list_buckets_async())
 
 
 @router.post("/buckets", status_code=status.HTTP_201_CREATED)
@@ -156,7 +179,7 @@ async def create_bucket(
     _: str = Depends(admin_with_rate_limit),
 ) -> dict:
     storage = await StorageService.from_session(session)
-    storage.create_bucket(payload.name, payload.region)
+    await storage.create_bucket_async(payload.name, payload.region)
     return {"success": True, "bucket": payload.name}
 
 
@@ -169,5 +192,5 @@ async def delete_bucket(
     storage = await StorageService.from_session(session)
     if bucket_name == storage.credentials.bucket:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot delete active storage bucket")
-    storage.delete_bucket(bucket_name)
+    await storage.delete_bucket_async(bucket_name)
     return {"success": True, "bucket": bucket_name}
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from catalog_import import MAX_BATCH_SIZE, import_catalog, parse_format, parse_kind
+from config import get_settings
+from dependencies import admin_with_rate_limit
+from db import get_db
+from schemas import ImportResponse
+
+router = APIRouter(tags=["import"])
+settings = get_settings()
+
+
+@router.post(
+    "/api/import/{kind}",
+    response_model=ImportResponse,
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/x-ndjson": {"schema": {"type": "string", "format": "binary"}},
+                "text/csv": {"schema": {"type": "string", "format": "binary"}},
+            },
+            "required": True,
+        }
+    },
+)
+async def import_content(
+    kind: str,
+    request: Request,
+    input_format: str | None = Query(default=None, alias="format"),
+    batch_size: int = Query(default=settings.import_batch_size, ge=1, le=MAX_BATCH_SIZE),
+    session: AsyncSession = Depends(get_db),
+    _: str = Depends(admin_with_rate_limit),
+) -> ImportResponse:
+    """Stream an NDJSON or CSV body of artists, categories or videos into the catalog.
+
+    The format comes from ``?format=`` or the Content-Type. Each row is
+    reported by line number if it fails; the rest of the import carries on.
+    """
+    report = await import_catalog(
+        session,
+        parse_kind(kind),
+        parse_format(input_format, request.headers.get("content-type")),
+        request.stream(),
+        batch_size,
+        settings.import_max_errors,
+    )
+    return ImportResponse(**report.as_dict())
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from autocomplete import autocomplete_index
+from counting import resolve_total
+from dependencies import admin_with_autocomplete_rate_limit, admin_with_rate_limit
+from db import get_db
+from schemas import AutocompleteResponse, AutocompleteSuggestion, Pagination, SearchHit, SearchResponse
+from search import build_search_query, page_search_query, parse_types
+
+router = APIRouter(tags=["search"])
+
+
+@router.get("/api/search", response_model=SearchResponse)
+async def search_content(
+    q: str = Query(..., min_length=1, max_length=200),
+    types: str | None = None,
+    status_filter: str | None = None,
+    category_id: UUID | None = None,
+    page: int = 1,
+    page_size: int = 20,
+    count_mode: str = "exact",
+    include_total: bool = True,
+    session: AsyncSession = Depends(get_db),
+    _: str = Depends(admin_with_rate_limit),
+) -> SearchResponse:
+    if page < 1 or page_size < 1 or page_size > 100:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination parameters")
+
+    term = q.strip()
+    if not term:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Search query is empty")
+    hits = build_search_query(term, parse_types(types), status_filter, category_id)
+    result = await session.execute(page_search_query(hits, page, page_size))
+    total, total_mode = await resolve_total(session, hits, count_mode, include_total)
+    return SearchResponse(
+        items=[SearchHit(**row) for row in result.mappings().all()],
+        pagination=Pagination(total=total, page=page, page_size=page_size, total_mode=total_mode),
+    )
+
+
+@router.get("/api/autocomplete", response_model=AutocompleteResponse)
+async def autocomplete(
+    q: str = Query(..., min_length=1, max_length=100),
+    types: str | None = None,
+    status_filter: str | None = None,
+    limit: int = Query(10, ge=1, le=50),
+    _: str = Depends(admin_with_autocomplete_rate_limit),
+) -> AutocompleteResponse:
+    suggestions = autocomplete_index.lookup(q, limit, parse_types(types), status_filter)
+    return AutocompleteResponse(items=[AutocompleteSuggestion.model_validate(item) for item in suggestions])
@@ -1,49 +1,187 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.requests import ClientDisconnect
 from uuid import UUID
 
-from dependencies import admin_with_rate_limit
+from dependencies import admin_with_rate_limit, admin_with_rate_limit_cost
 from db import get_db
 from models import FileObject
 from schemas import DirectUploadResponse
 from storage_service import StorageService
+from storage_usage import apply_usage_delta
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ModuleNotFoundError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
 
 router = APIRouter(tags=["files"])
 
+_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            },
+            "application/octet-stream": {"schema": {"type": "string", "format": "binary"}},
+        },
+    }
+}
+
+
+class _MultipartFileReader:
+    """Incremental multipart/form-data parser that surfaces one file field as raw chunks."""
+
+    def __init__(self, boundary: bytes, field_name: str = "file") -> None:
+        self.field_name = field_name
+        self.file_name: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.done = False
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_target = False
+        self._pending: List[bytes] = []
+        self._parser = MultipartParser(
+            boundary,
+            callbacks={
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
+        )
+
+    def feed(self, chunk: bytes) -> List[bytes]:
+        self._parser.write(chunk)
+        pending, self._pending = self._pending, []
+        return pending
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        if self.file_name is None and options.get(b"name") == self.field_name.encode() and b"filename" in options:
+            self._in_target = True
+            self.file_name = options[b"filename"].decode("utf-8", "replace")
+            self.content_type = self._headers.get(b"content-type", b"").decode("latin-1") or None
 
-@router.post("/api/upload", response_model=DirectUploadResponse, status_code=status.HTTP_201_CREATED)
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_target:
+            self._pending.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self._in_target:
+            self._in_target = False
+            self.done = True
+
+
+async def _open_multipart_file(request: Request, boundary: bytes) -> Tuple[str, Optional[str], AsyncIterator[bytes]]:
+    reader = _MultipartFileReader(boundary)
+    body = request.stream()
+    buffered: List[bytes] = []
+    try:
+        async for chunk in body:
+            buffered.extend(reader.feed(chunk))
+            if reader.file_name is not None:
+                break
+    except ClientDisconnect as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Client disconnected during upload") from exc
+    if reader.file_name is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Multipart body has no 'file' field")
+
+    async def chunks() -> AsyncIterator[bytes]:
+        for chunk in buffered:
+            yield chunk
+        buffered.clear()
+        if reader.done:
+            return
+        async for chunk in body:
+            for data in reader.feed(chunk):
+                yield data
+            if reader.done:
+                return
+        # Raised inside the upload so storage aborts it instead of keeping a truncated object.
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Multipart body ended before the closing boundary")
+
+    return reader.file_name, reader.content_type, chunks()
+
+
+@router.post(
+    "/api/upload",
+    response_model=DirectUploadResponse,
+    status_code=status.HTTP_201_CREATED,
+    openapi_extra=_UPLOAD_OPENAPI,
+)
 async def direct_upload(
-    file: UploadFile = File(...),
+    request: Request,
+    file_name: Optional[str] = None,
     session: AsyncSession = Depends(get_db),
-    _: str = Depends(admin_with_rate_limit),
+    _: str = Depends(admin_with_rate_limit_cost(5)),
 ) -> DirectUploadResponse:
-    contents = await file.read()
-    if not contents:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Uploaded file is empty")
+    """Stream an upload to storage without buffering the whole file.
+
+    Accepts either a ``multipart/form-data`` body with a ``file`` field or a raw
+    body with the name given by the ``file_name`` query parameter.
+    """
+    request_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if request_type == b"multipart/form-data":
+        boundary = options.get(b"boundary")
+        if not boundary:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing multipart boundary")
+        name, part_type, chunks = await _open_multipart_file(request, boundary)
+        file_name = name or file_name
+        content_type = part_type or "application/octet-stream"
+    else:
+        if not file_name:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="file_name is required for raw uploads")
+        content_type = request_type.decode("latin-1") or "application/octet-stream"
+        chunks = request.stream()
+    if not file_name:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Uploaded file has no name")
 
     storage = await StorageService.from_session(session)
-    storage.ensure_bucket()
-    key = storage.generate_object_key(file.filename)
+    await storage.ensure_bucket_async()
+    key = storage.generate_object_key(file_name)
     try:
-        storage.client.put_object(
-            Bucket=storage.credentials.bucket,
-            Key=key,
-            Body=contents,
-            ContentType=file.content_type or "application/octet-stream",
-        )
-    except Exception as exc:  # pragma: no cover - delegated to boto3
-        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Failed to upload file: {exc}") from exc
+        upload = await storage.upload_stream(key, chunks, content_type)
+    except ClientDisconnect as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Client disconnected during upload") from exc
 
     record = FileObject(
         bucket=storage.credentials.bucket,
         key=key,
-        file_name=file.filename,
-        content_type=file.content_type or "application/octet-stream",
-        size_bytes=len(contents),
+        file_name=file_name,
+        content_type=content_type,
+        size_bytes=upload.size_bytes,
+        etag=upload.etag,
     )
     session.add(record)
+    await apply_usage_delta(session, record)
     await session.commit()
     await session.refresh(record)
 
@@ -55,6 +193,7 @@ async def direct_upload(
         key=key,
         content_type=record.content_type,
         size_bytes=record.size_bytes,
+        checksum_sha256=upload.checksum_sha256,
         download_url=download_url,
         object_url=object_url,
     )
@@ -64,12 +203,25 @@ async def direct_upload(
 async def list_files_alias(
     page: int = 1,
     page_size: int = 20,
+    cursor: str | None = None,
+    count_mode: str = "exact",
+    include_total: bool = True,
+    include_urls: bool = True,
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
 ):
     from .files import list_files as core_list_files
 
-    return await core_list_files(page=page, page_size=page_size, session=session, _=_)
+    return await core_list_files(
+        page=page,
+        page_size=page_size,
+        cursor=cursor,
+        count_mode=count_mode,
+        include_total=include_total,
+        include_urls=include_urls,
+        session=session,
+        _=_,
+    )
 
 
 @router.delete("/api/files/{file_id}", include_in_schema=False)
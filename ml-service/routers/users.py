@@ -4,12 +4,14 @@ import uuid
 from typing import Any, Dict
 
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import text
+from sqlalchemy import column, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
+from counting import resolve_total
 from dependencies import admin_with_rate_limit
 from db import get_db
+from pagination import decode_cursor, split_page
 from schemas import Pagination, UserListResponse, UserSummary, UserUpdateRequest
 
 router = APIRouter(tags=["users"])
@@ -34,6 +36,9 @@ async def list_users(
     page_size: int = 20,
     search: str | None = None,
     status_filter: str | None = None,
+    cursor: str | None = None,
+    count_mode: str = "exact",
+    include_total: bool = True,
     session: AsyncSession = Depends(get_db),
     _: str = Depends(admin_with_rate_limit),
 ) -> UserListResponse:
@@ -54,22 +59,32 @@ async def list_users(
 
     where_clause = " AND ".join(conditions)
 
-    count_query = text(f"SELECT COUNT(*) FROM users WHERE {where_clause}")
-    total_result = await session.execute(count_query, params)
-    total = total_result.scalar_one()
+    count_query = text(f"SELECT id FROM users WHERE {where_clause}").columns(column("id"))
+    total, total_mode = await resolve_total(session, count_query, count_mode, include_total, params)
+
+    page_clause = "LIMIT :limit OFFSET :offset"
+    list_params = dict(params)
+    if cursor is None:
+        list_params.update({"limit": page_size, "offset": (page - 1) * page_size})
+    else:
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor)
+            where_clause = f"{where_clause} AND (created_at, id) < (:cursor_created_at, :cursor_id)"
+            list_params.update({"cursor_created_at": cursor_created_at, "cursor_id": str(cursor_id)})
+        page_clause = "LIMIT :limit"
+        list_params["limit"] = page_size + 1
 
     list_query = text(
         f"""
         SELECT id, email, full_name, is_active, is_verified, created_at
         FROM users
         WHERE {where_clause}
-        ORDER BY created_at DESC
-        LIMIT :limit OFFSET :offset
+        ORDER BY created_at DESC, id DESC
+        {page_clause}
         """
     )
-    params.update({"limit": page_size, "offset": (page - 1) * page_size})
-    result = await session.execute(list_query, params)
-    rows = result.mappings().all()
+    result = await session.execute(list_query, list_params)
+    rows, next_cursor = split_page(result.mappings().all(), page_size, cursor, lambda row: (row["created_at"], row["id"]))
 
     items = [
         UserSummary(
@@ -83,7 +98,16 @@ async def list_users(
         for row in rows
     ]
 
-    return UserListResponse(items=items, pagination=Pagination(total=total, page=page, page_size=page_size))
+    return UserListResponse(
+        items=items,
+        pagination=Pagination(
+            total=total,
+            page=page,
+            page_size=page_size,
+            total_mode=total_mode,
+            next_cursor=next_cursor,
+        ),
+    )
 
 
 @router.get("/api/users/{user_id}", response_model=UserSummary)
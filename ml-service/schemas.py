@@ -99,6 +99,10 @@ class VerificationStatusResponse(BaseModel):
     max_attempts: int
     expires_at: Optional[str]
     last_sent_at: Optional[str]
+    delivery_status: Optional[str] = None
+    delivery_attempts: int = 0
+    delivery_error: Optional[str] = None
+    delivered_at: Optional[str] = None
 
 
 class UploadFileRequest(BaseModel):
@@ -131,12 +135,23 @@ class FileListResponse(BaseModel):
     items: List[FileItem]
     page: int
     page_size: int
-    total: int
+    total: Optional[int]
+    total_mode: str = "exact"
+    next_cursor: Optional[str] = None
+
+
+class StorageUsageBreakdown(BaseModel):
+    key: str
+    total_files: int
+    total_size: int
 
 
 class StorageUsageResponse(BaseModel):
     total_files: int
     total_size: int
+    by_content_type: List[StorageUsageBreakdown] = Field(default_factory=list)
+    by_date_prefix: List[StorageUsageBreakdown] = Field(default_factory=list)
+    updated_at: Optional[datetime] = None
 
 
 class BucketRequest(BaseModel):
@@ -149,9 +164,11 @@ class BucketListResponse(BaseModel):
 
 
 class Pagination(BaseModel):
-    total: int
+    total: Optional[int]
     page: int
     page_size: int
+    total_mode: str = "exact"
+    next_cursor: Optional[str] = None
 
 
 class ArtistBase(BaseModel):
@@ -267,6 +284,10 @@ class VideoUpdate(BaseModel):
     artist_ids: Optional[List[UUID]] = None
     category_ids: Optional[List[UUID]] = None
     subtitles: Optional[List[SubtitleCreate]] = None
+    add_artist_ids: Optional[List[UUID]] = None
+    remove_artist_ids: Optional[List[UUID]] = None
+    add_category_ids: Optional[List[UUID]] = None
+    remove_category_ids: Optional[List[UUID]] = None
 
 
 class VideoResponse(VideoBase):
@@ -335,6 +356,7 @@ class DirectUploadResponse(BaseModel):
     key: str
     content_type: str
     size_bytes: int
+    checksum_sha256: str
     download_url: str
     object_url: str
     model_config = ConfigDict(from_attributes=True)
@@ -355,6 +377,64 @@ class VideoListResponse(BaseModel):
     pagination: Pagination
 
 
+class SearchHit(BaseModel):
+    type: str
+    id: UUID
+    title: str
+    slug: str
+    status: Optional[str]
+    score: float
+
+
+class SearchResponse(BaseModel):
+    items: List[SearchHit]
+    pagination: Pagination
+
+
+class AutocompleteSuggestion(BaseModel):
+    type: str
+    id: UUID
+    label: str
+    slug: str
+    status: str
+    model_config = ConfigDict(from_attributes=True)
+
+
+class AutocompleteResponse(BaseModel):
+    items: List[AutocompleteSuggestion]
+
+
+class ArtistImportRow(ArtistBase):
+    pass
+
+
+class CategoryImportRow(CategoryBase):
+    parent_slug: Optional[str] = Field(default=None, max_length=255)
+
+
+class VideoImportRow(VideoBase):
+    artist_slugs: List[str] = Field(default_factory=list)
+    category_slugs: List[str] = Field(default_factory=list)
+    subtitles: List[SubtitleCreate] = Field(default_factory=list)
+
+
+class ImportRowError(BaseModel):
+    line: int
+    slug: Optional[str] = None
+    error: str
+
+
+class ImportResponse(BaseModel):
+    kind: str
+    format: str
+    processed: int
+    created: int
+    failed: int
+    errors: List[ImportRowError]
+    errors_truncated: bool = False
+    elapsed_seconds: float
+
+
 class UserSummary(BaseModel):
     id: UUID
     email: Optional[str]
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from typing import Iterable, List, Optional
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import Float, String, case, cast, exists, false, func, literal, or_, select, union_all
+from sqlalchemy.sql.selectable import CompoundSelect
+
+from models import Artist, Category, Video, video_artists, video_categories
+
+SEARCH_TYPES = ("video", "artist", "category")
+
+# Added to a video's score when the query matches one of its artists rather than the video itself.
+ARTIST_MATCH_BOOST = 0.2
+
+
+def parse_types(raw: Optional[str]) -> List[str]:
+    if not raw:
+        return list(SEARCH_TYPES)
+    types = [item.strip().lower() for item in raw.split(",") if item.strip()]
+    for item in types:
+        if item not in SEARCH_TYPES:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid search type '{item}'")
+    return types
+
+
+def _matches(vector, tsquery):
+    return vector.op("@@")(tsquery)
+
+
+def _similar(column, term: str):
+    # pg_trgm's % operator uses the trigram GIN index; similarity() only ranks.
+    return column.op("%")(term)
+
+
+def _active_status(is_active):
+    return case((is_active.is_(True), "active"), else_="inactive")
+
+
+def _active_filter(is_active, status_filter: Optional[str]):
+    if status_filter is None:
+        return None
+    if status_filter in ("active", "inactive"):
+        return is_active.is_(status_filter == "active")
+    return false()
+
+
+def _hit_columns(kind: str, model, title, status_expr, score):
+    return (
+        literal(kind, String).label("type"),
+        model.id.label("id"),
+        title.label("title"),
+        model.slug.label("slug"),
+        cast(status_expr, String).label("status"),
+        cast(score, Float).label("score"),
+    )
+
+
+def _video_hits(term: str, tsquery, status_filter: Optional[str], category_id: Optional[UUID]):
+    artist_match = exists().where(
+        video_artists.c.video_id == Video.id,
+        video_artists.c.artist_id == Artist.id,
+        _matches(Artist.search_vector, tsquery),
+    )
+    score = (
+        func.ts_rank_cd(Video.search_vector, tsquery)
+        + func.similarity(Video.title, term)
+        + case((artist_match, ARTIST_MATCH_BOOST), else_=0.0)
+    )
+    query = select(*_hit_columns("video", Video, Video.title, Video.status, score)).where(
+        or_(_matches(Video.search_vector, tsquery), _similar(Video.title, term), artist_match)
+    )
+    if status_filter is not None:
+        query = query.where(Video.status == status_filter)
+    if category_id is not None:
+        query = query.where(
+            exists().where(video_categories.c.video_id == Video.id, video_categories.c.category_id == category_id)
+        )
+    return query
+
+
+def _artist_hits(term: str, tsquery, status_filter: Optional[str], category_id: Optional[UUID]):
+    score = func.ts_rank_cd(Artist.search_vector, tsquery) + func.similarity(Artist.name, term)
+    query = select(*_hit_columns("artist", Artist, Artist.name, _active_status(Artist.is_active), score)).where(
+        or_(_matches(Artist.search_vector, tsquery), _similar(Artist.name, term), _similar(Artist.slug, term))
+    )
+    active = _active_filter(Artist.is_active, status_filter)
+    if active is not None:
+        query = query.where(active)
+    if category_id is not None:
+        query = query.where(
+            exists().where(
+                video_artists.c.artist_id == Artist.id,
+                video_categories.c.video_id == video_artists.c.video_id,
+                video_categories.c.category_id == category_id,
+            )
+        )
+    return query
+
+
+def _category_hits(term: str, tsquery, status_filter: Optional[str], category_id: Optional[UUID]):
+    score = func.ts_rank_cd(Category.search_vector, tsquery) + func.similarity(Category.name, term)
+    query = select(*_hit_columns("category", Category, Category.name, _active_status(Category.is_active), score)).where(
+        or_(_matches(Category.search_vector, tsquery), _similar(Category.name, term), _similar(Category.slug, term))
+    )
+    active = _active_filter(Category.is_active, status_filter)
+    if active is not None:
+        query = query.where(active)
+    if category_id is not None:
+        query = query.where(or_(Category.id == category_id, Category.parent_id == category_id))
+    return query
+
+
+_BUILDERS = {"video": _video_hits, "artist": _artist_hits, "category": _category_hits}
+
+
+def build_search_query(
+    term: str,
+    types: Iterable[str],
+    status_filter: Optional[str] = None,
+    category_id: Optional[UUID] = None,
+) -> CompoundSelect:
+    """Union of ranked hits across the requested content types.
+
+    Rows match on the weighted ``search_vector`` (``websearch_to_tsquery``
+    syntax) or on trigram similarity of the name/title, so misspellings still
+    hit. ``status_filter`` compares against each hit's ``status``: the video
+    status, or ``active``/``inactive`` for artists and categories.
+    ``category_id`` scopes videos to that category, artists to those with a
+    video in it, and categories to it and its direct children.
+    """
+    tsquery = func.websearch_to_tsquery("english", term)
+    return union_all(*(_BUILDERS[kind](term, tsquery, status_filter, category_id) for kind in types))
+
+
+def page_search_query(hits: CompoundSelect, page: int, page_size: int):
+    ranked = hits.subquery("hits")
+    return (
+        select(ranked)
+        .order_by(ranked.c.score.desc(), ranked.c.type, ranked.c.id)
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+    )
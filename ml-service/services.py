@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import asyncio
+import time
+from dataclasses import dataclass
 from typing import Optional, Tuple
 from uuid import UUID
 
 import boto3
-from sqlalchemy import desc, select
+from sqlalchemy import desc, func, select
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
 from twilio.base.exceptions import TwilioException
@@ -23,6 +26,56 @@ async def latest_settings(session: AsyncSession) -> Optional[SettingsVersion]:
     return result.scalar_one_or_none()
 
 
+@dataclass
+class CachedSettings:
+    version: int
+    payload: Optional[SettingsPayload]
+    checked_at: float
+
+
+_settings_cache: Optional[CachedSettings] = None
+_settings_cache_lock = asyncio.Lock()
+
+
+def _store_cached_settings(version: int, payload: Optional[SettingsPayload]) -> CachedSettings:
+    global _settings_cache
+    _settings_cache = CachedSettings(version=version, payload=payload, checked_at=time.monotonic())
+    return _settings_cache
+
+
+async def settings_version(session: AsyncSession) -> int:
+    result = await session.execute(select(func.max(SettingsVersion.version)))
+    return result.scalar_one() or 0
+
+
+async def cached_settings(session: AsyncSession) -> CachedSettings:
+    """Return the decrypted latest settings, reloading only when the version moves.
+
+    Within ``settings_cache_ttl_seconds`` the cached payload is served without
+    touching the database; after that a ``max(version)`` probe decides whether
+    the record has to be fetched and decrypted again. Version 0 with a ``None``
+    payload means no settings have been saved yet.
+    """
+    cached = _settings_cache
+    if cached and time.monotonic() - cached.checked_at < settings.settings_cache_ttl_seconds:
+        return cached
+
+    async with _settings_cache_lock:
+        cached = _settings_cache
+        if cached and time.monotonic() - cached.checked_at < settings.settings_cache_ttl_seconds:
+            return cached
+
+        version = await settings_version(session)
+        if cached and cached.version == version:
+            cached.checked_at = time.monotonic()
+            return cached
+
+        record = await latest_settings(session)
+        if record is None:
+            return _store_cached_settings(0, None)
+        return _store_cached_settings(record.version, decrypt_settings(record))
+
+
 def decrypt_settings(record: SettingsVersion) -> SettingsPayload:
     return SettingsPayload(
         storage={
@@ -90,6 +143,7 @@ async def create_settings_version(
     )
     session.add(audit)
     await session.commit()
+    _store_cached_settings(record.version, payload)
     return record
 
 
@@ -0,0 +1,164 @@
+"""Opt-in per-request SQL profiling.
+
+With ``SQL_PROFILER_ENABLED=true`` an admin can send ``X-SQL-Profile: 1``
+on any request. The statements that request runs are counted and timed;
+the totals come back in a ``Server-Timing`` header and a JSON log line, and
+a statement shape repeated more than ``SQL_PROFILER_N_PLUS_ONE_THRESHOLD``
+times is logged as a likely N+1.
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+PROFILE_HEADER = b"x-sql-profile"
+
+_PARAMETER = re.compile(r"\$\d+(?:::\w+(?:\[\])?)?")
+_PARAMETER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_MAX_STATEMENT_LENGTH = 300
+
+
+def statement_shape(statement: str) -> str:
+    """``statement`` with binds as ``?`` and bind lists as one ``?``, so ``IN`` lists of any length match."""
+    shape = _PARAMETER.sub("?", " ".join(statement.split()))
+    return _PARAMETER_LIST.sub("?", shape)
+
+
+@dataclass
+class RequestProfile:
+    slowest_limit: int
+    queries: int = 0
+    db_seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+    slowest: List[Tuple[float, int, str]] = field(default_factory=list)
+    started: float = field(default_factory=time.perf_counter)
+
+    def record(self, statement: str, elapsed: float) -> None:
+        shape = statement_shape(statement)
+        self.queries += 1
+        self.db_seconds += elapsed
+        self.shapes[shape] += 1
+        entry = (elapsed, self.queries, shape[:_MAX_STATEMENT_LENGTH])
+        if len(self.slowest) < self.slowest_limit:
+            heapq.heappush(self.slowest, entry)
+        else:
+            heapq.heappushpop(self.slowest, entry)
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+    def server_timing(self) -> str:
+        metrics = [f'db;dur={self.db_seconds * 1000:.2f};desc="{self.queries} queries"']
+        metrics.extend(
+            f"db-slow-{rank};dur={elapsed * 1000:.2f}"
+            for rank, (elapsed, _, _) in enumerate(sorted(self.slowest, reverse=True), start=1)
+        )
+        metrics.append(f"app;dur={(time.perf_counter() - self.started) * 1000:.2f}")
+        return ", ".join(metrics)
+
+    def summary(self, threshold: int) -> Dict[str, Any]:
+        return {
+            "queries": self.queries,
+            "db_ms": round(self.db_seconds * 1000, 2),
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "slowest": [
+                {"ms": round(elapsed * 1000, 2), "statement": shape}
+                for elapsed, _, shape in sorted(self.slowest, reverse=True)
+            ],
+            "repeated": [
+                {"count": count, "statement": shape[:_MAX_STATEMENT_LENGTH]} for shape, count in self.repeated(threshold)
+            ],
+        }
+
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("sql_profile", default=None)
+
+
+def profile_engine(engine: Engine) -> None:
+    """Feed statements run through ``engine`` into the active request's profile; a no-op outside one."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        if _current_profile.get() is not None:
+            conn.info.setdefault("profiler_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany) -> None:
+        profile = _current_profile.get()
+        started = conn.info.get("profiler_started")
+        if profile is not None and started:
+            profile.record(statement, time.perf_counter() - started.pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context) -> None:
+        started = context.connection.info.get("profiler_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+
+def _admin(authorization: Optional[bytes]) -> bool:
+    if not settings.admin_api_token:
+        return True
+    return authorization is not None and authorization.decode("latin-1") == f"Bearer {settings.admin_api_token}"
+
+
+class SQLProfilerMiddleware:
+    """Profiles requests that carry ``X-SQL-Profile`` with a valid admin token; others pass straight through."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        flag = headers.get(PROFILE_HEADER, b"").lower()
+        if flag not in (b"1", b"true", b"yes") or not _admin(headers.get(b"authorization")):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(slowest_limit=settings.sql_profiler_slowest)
+        status_code = 500
+
+        async def send_with_timing(message: Dict[str, Any]) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                # Statements a streaming body runs after this point only reach the log line.
+                MutableHeaders(scope=message).append("Server-Timing", profile.server_timing())
+            await send(message)
+
+        token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_profile.reset(token)
+            self._report(scope, status_code, profile)
+
+    @staticmethod
+    def _report(scope: Dict[str, Any], status_code: int, profile: RequestProfile) -> None:
+        threshold = settings.sql_profiler_n_plus_one_threshold
+        route = getattr(scope.get("route"), "path", None)
+        request = f"{scope['method']} {route or scope['path']}"
+        summary = profile.summary(threshold)
+        logger.info("SQL profile %s", json.dumps({"request": request, "status": status_code, **summary}))
+        for shape, count in profile.repeated(threshold):
+            logger.warning("Possible N+1 in %s: statement ran %d times: %s", request, count, shape[:_MAX_STATEMENT_LENGTH])
@@ -1,10 +1,17 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import uuid
 import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple, TypeVar
 
 import boto3
 from botocore.client import Config as BotoConfig
@@ -12,11 +19,16 @@ from botocore.exceptions import BotoCoreError, ClientError
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from models import FileObject, SettingsVersion
-from services import decrypt_settings, latest_settings
+from config import get_settings
+from metrics import instrument_s3_client
+from services import cached_settings
 
+settings = get_settings()
 
-@dataclass
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
 class StorageCredentials:
     endpoint: str
     bucket: str
@@ -26,22 +38,94 @@ class StorageCredentials:
     path_style: bool
 
 
+@dataclass
+class UploadResult:
+    size_bytes: int
+    checksum_sha256: str
+    etag: Optional[str]
+
+
+# S3 rejects multipart parts smaller than 5 MiB (except the last one).
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+_clients: Dict[StorageCredentials, Any] = {}
+_known_buckets: Set[Tuple[StorageCredentials, str]] = set()
+_registry_version: Optional[int] = None
+_registry_lock = threading.Lock()
+
+_presign_cache: "OrderedDict[Tuple[StorageCredentials, str, int], Tuple[str, float]]" = OrderedDict()
+_presign_lock = threading.Lock()
+
+
+def _build_client(credentials: StorageCredentials) -> Any:
+    session = boto3.session.Session(
+        aws_access_key_id=credentials.access_key,
+        aws_secret_access_key=credentials.secret_key,
+        region_name=credentials.region or "us-east-1",
+    )
+    config = BotoConfig(
+        signature_version="s3v4",
+        s3={"addressing_style": "path" if credentials.path_style else "auto"},
+        max_pool_connections=settings.s3_max_pool_connections,
+    )
+    client = session.client("s3", endpoint_url=credentials.endpoint, config=config)
+    if settings.enable_metrics:
+        instrument_s3_client(client)
+    return client
+
+
+def _client_for(credentials: StorageCredentials, version: int) -> Any:
+    """Return the shared S3 client for ``credentials``.
+
+    Clients are thread-safe and keep their own connection pool, so one per
+    credential set is reused for the life of the process. A change in the
+    settings version drops every cached client and bucket check.
+    """
+    global _registry_version
+    with _registry_lock:
+        if _registry_version != version:
+            _clients.clear()
+            _known_buckets.clear()
+            with _presign_lock:
+                _presign_cache.clear()
+            _registry_version = version
+        client = _clients.get(credentials)
+        if client is None:
+            client = _clients[credentials] = _build_client(credentials)
+        return client
+
+
+_storage_executor = ThreadPoolExecutor(
+    max_workers=settings.storage_executor_workers,
+    thread_name_prefix="storage",
+)
+
+
+async def run_storage_call(func: Callable[..., T], *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> T:
+    """Run a blocking boto3 call on the dedicated storage executor.
+
+    The executor is bounded so a slow MinIO cannot exhaust the default loop
+    executor. On timeout the caller gets a 504; the worker thread finishes the
+    call in the background.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(_storage_executor, partial(func, *args, **kwargs))
+    try:
+        return await asyncio.wait_for(future, timeout or settings.storage_call_timeout_seconds)
+    except asyncio.TimeoutError as exc:
+        raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Storage request timed out") from exc
+
+
 class StorageService:
-    def __init__(self, credentials: StorageCredentials) -> None:
-        session = boto3.session.Session(
-            aws_access_key_id=credentials.access_key,
-            aws_secret_access_key=credentials.secret_key,
-            region_name=credentials.region or "us-east-1",
-        )
-        config = BotoConfig(signature_version="s3v4", s3={"addressing_style": "path" if credentials.path_style else "auto"})
-        self.client = session.client("s3", endpoint_url=credentials.endpoint, config=config)
+    def __init__(self, credentials: StorageCredentials, version: int = 0) -> None:
+        self.client = _client_for(credentials, version)
         self.credentials = credentials
 
     @classmethod
     async def from_session(cls, session: AsyncSession) -> "StorageService":
-        record: Optional[SettingsVersion] = await latest_settings(session)
-        if record:
-            config = decrypt_settings(record)
+        cached = await cached_settings(session)
+        if cached.payload:
+            config = cached.payload
             creds = StorageCredentials(
                 endpoint=str(config.storage.endpoint),
                 bucket=config.storage.bucket,
@@ -50,7 +134,7 @@ class StorageService:
                 region=config.storage.region,
                 path_style=True,
             )
-            return cls(creds)
+            return cls(creds, cached.version)
 
         env_endpoint = os.getenv("AWS_S3_ENDPOINT", "http://minio:9000")
         env_bucket = os.getenv("AWS_S3_BUCKET", "comedyinsight")
@@ -70,6 +154,9 @@ class StorageService:
         return cls(creds)
 
     def ensure_bucket(self) -> None:
+        memo_key = (self.credentials, self.credentials.bucket)
+        if memo_key in _known_buckets:
+            return
         try:
             self.client.head_bucket(Bucket=self.credentials.bucket)
         except ClientError:
@@ -77,19 +164,36 @@ class StorageService:
             if self.credentials.region and self.credentials.region != "us-east-1":
                 params["CreateBucketConfiguration"] = {"LocationConstraint": self.credentials.region}
             self.client.create_bucket(**params)
+        _known_buckets.add(memo_key)
+
+    async def ensure_bucket_async(self) -> None:
+        if (self.credentials, self.credentials.bucket) in _known_buckets:
+            return
+        await run_storage_call(self.ensure_bucket)
 
     def list_buckets(self) -> List[str]:
         response = self.client.list_buckets()
         return [bucket["Name"] for bucket in response.get("Buckets", [])]
 
+    async def list_buckets_async(self) -> List[str]:
+        return await run_storage_call(self.list_buckets)
+
     def create_bucket(self, name: str, region: Optional[str] = None) -> None:
         params: Dict[str, Any] = {"Bucket": name}
         if region and region != "us-east-1":
             params["CreateBucketConfiguration"] = {"LocationConstraint": region}
         self.client.create_bucket(**params)
+        _known_buckets.add((self.credentials, name))
+
+    async def create_bucket_async(self, name: str, region: Optional[str] = None) -> None:
+        await run_storage_call(self.create_bucket, name, region)
 
     def delete_bucket(self, name: str) -> None:
         self.client.delete_bucket(Bucket=name)
+        _known_buckets.discard((self.credentials, name))
+
+    async def delete_bucket_async(self, name: str) -> None:
+        await run_storage_call(self.delete_bucket, name)
 
     def generate_object_key(self, file_name: str) -> str:
         timestamp = datetime.utcnow()
@@ -108,8 +212,22 @@ class StorageService:
             raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Failed to create upload URL: {exc}") from exc
 
     def generate_presigned_download(self, key: str, expires_in: int = 600) -> str:
+        """Return a GET URL for ``key``, reusing a cached one while it has enough life left.
+
+        A cached URL is handed out until less than ``presign_min_remaining_ratio``
+        of ``expires_in`` remains, so callers always get at least that much
+        validity without re-signing on every request.
+        """
+        cache_key = (self.credentials, key, expires_in)
+        now = time.monotonic()
+        with _presign_lock:
+            entry = _presign_cache.get(cache_key)
+            if entry and entry[1] - now >= expires_in * settings.presign_min_remaining_ratio:
+                _presign_cache.move_to_end(cache_key)
+                return entry[0]
+
         try:
-            return self.client.generate_presigned_url(
+            url = self.client.generate_presigned_url(
                 "get_object",
                 Params={"Bucket": self.credentials.bucket, "Key": key},
                 ExpiresIn=expires_in,
@@ -117,35 +235,141 @@ class StorageService:
         except (ClientError, BotoCoreError) as exc:
             raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Failed to create download URL: {exc}") from exc
 
+        with _presign_lock:
+            _presign_cache[cache_key] = (url, now + expires_in)
+            _presign_cache.move_to_end(cache_key)
+            while len(_presign_cache) > settings.presign_cache_max_entries:
+                _presign_cache.popitem(last=False)
+        return url
+
+    def put_object(self, key: str, body: bytes, content_type: str) -> Dict[str, Any]:
+        try:
+            return self.client.put_object(Bucket=self.credentials.bucket, Key=key, Body=body, ContentType=content_type)
+        except (ClientError, BotoCoreError) as exc:
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Failed to upload file: {exc}") from exc
+
+    async def put_object_async(self, key: str, body: bytes, content_type: str) -> Dict[str, Any]:
+        return await run_storage_call(self.put_object, key, body, content_type)
+
     def delete_object(self, key: str) -> None:
         try:
             self.client.delete_object(Bucket=self.credentials.bucket, Key=key)
         except (ClientError, BotoCoreError) as exc:
             raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Failed to delete file: {exc}") from exc
 
-    def list_objects(self, prefix: Optional[str] = None, max_keys: int = 1000, continuation_token: Optional[str] = None) -> Dict[str, Any]:
+    def _create_multipart_upload(self, key: str, content_type: str) -> str:
+        response = self.client.create_multipart_upload(Bucket=self.credentials.bucket, Key=key, ContentType=content_type)
+        return response["UploadId"]
+
+    def _upload_part(self, key: str, upload_id: str, part_number: int, body: bytes) -> str:
+        response = self.client.upload_part(
+            Bucket=self.credentials.bucket,
+            Key=key,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=body,
+        )
+        return response["ETag"]
+
+    def _complete_multipart_upload(self, key: str, upload_id: str, parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return self.client.complete_multipart_upload(
+            Bucket=self.credentials.bucket,
+            Key=key,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+
+    def _abort_multipart_upload(self, key: str, upload_id: str) -> None:
+        self.client.abort_multipart_upload(Bucket=self.credentials.bucket, Key=key, UploadId=upload_id)
+
+    async def upload_stream(self, key: str, chunks: AsyncIterator[bytes], content_type: str) -> UploadResult:
+        """Stream ``chunks`` into ``key`` holding at most one part in memory.
+
+        Bodies smaller than one part go up with a single ``put_object``; larger
+        ones use a multipart upload that is aborted if the stream fails or the
+        client disconnects.
+        """
+        part_size = max(settings.upload_part_size_bytes, MIN_PART_SIZE)
+        digest = hashlib.sha256()
+        buffer = bytearray()
+        size = 0
+        upload_id: Optional[str] = None
+        parts: List[Dict[str, Any]] = []
+
+        async def abort() -> None:
+            if upload_id is None:
+                return
+            try:
+                await asyncio.shield(run_storage_call(self._abort_multipart_upload, key, upload_id))
+            except Exception:  # noqa: BLE001 - best effort, the original error is re-raised
+                pass
+
+        async def flush(body: bytes) -> None:
+            nonlocal upload_id
+            if upload_id is None:
+                upload_id = await run_storage_call(self._create_multipart_upload, key, content_type)
+            part_number = len(parts) + 1
+            etag = await run_storage_call(self._upload_part, key, upload_id, part_number, body)
+            parts.append({"PartNumber": part_number, "ETag": etag})
+
+        try:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                digest.update(chunk)
+                size += len(chunk)
+                buffer.extend(chunk)
+                while len(buffer) >= part_size:
+                    body = bytes(buffer[:part_size])
+                    del buffer[:part_size]
+                    await flush(body)
+
+            if upload_id is None:
+                if not size:
+                    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Uploaded file is empty")
+                response = await self.put_object_async(key, bytes(buffer), content_type)
+            else:
+                if buffer:
+                    await flush(bytes(buffer))
+                    buffer.clear()
+                response = await run_storage_call(self._complete_multipart_upload, key, upload_id, parts)
+        except (ClientError, BotoCoreError) as exc:
+            await abort()
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Failed to upload file: {exc}") from exc
+        except BaseException:
+            await abort()
+            raise
+
+        etag = response.get("ETag")
+        return UploadResult(size_bytes=size, checksum_sha256=digest.hexdigest(), etag=etag.strip('"') if etag else None)
+
+    async def delete_object_async(self, key: str) -> None:
+        await run_storage_call(self.delete_object, key)
+
+    def list_objects(
+        self,
+        prefix: Optional[str] = None,
+        max_keys: int = 1000,
+        continuation_token: Optional[str] = None,
+        delimiter: Optional[str] = None,
+    ) -> Dict[str, Any]:
         kwargs: Dict[str, Any] = {"Bucket": self.credentials.bucket, "MaxKeys": max_keys}
         if prefix:
             kwargs["Prefix"] = prefix
         if continuation_token:
             kwargs["ContinuationToken"] = continuation_token
+        if delimiter:
+            kwargs["Delimiter"] = delimiter
         try:
             return self.client.list_objects_v2(**kwargs)
         except (ClientError, BotoCoreError) as exc:
             raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Failed to list files: {exc}") from exc
 
-    def get_usage(self) -> Dict[str, Any]:
-        continuation_token: Optional[str] = None
-        total_size = 0
-        total_files = 0
-        while True:
-            response = self.list_objects(continuation_token=continuation_token)
-            for obj in response.get("Contents", []):
-                total_files += 1
-                total_size += obj.get("Size", 0)
-            if response.get("IsTruncated"):
-                continuation_token = response.get("NextContinuationToken")
-            else:
-                break
-        return {"total_files": total_files, "total_size": total_size}
-
+    async def list_objects_async(
+        self,
+        prefix: Optional[str] = None,
+        max_keys: int = 1000,
+        continuation_token: Optional[str] = None,
+        delimiter: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        return await run_storage_call(self.list_objects, prefix, max_keys, continuation_token, delimiter)
@@ -0,0 +1,255 @@
+"""Storage usage rollups maintained from FileObject writes.
+
+Only confirmed objects count: a presigned upload's row has no etag until
+``bucket_inventory.py`` finds the object and backfills its etag and real size.
+
+Run ``python storage_usage.py reconcile --interval 3600`` to rebuild them from
+``file_objects``; ``bucket_inventory.py`` keeps that table in line with the bucket.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import re
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import FileObject, StorageUsageRollup
+from schemas import StorageUsageBreakdown, StorageUsageResponse
+
+TOTAL = "total"
+CONTENT_TYPE = "content_type"
+DATE_PREFIX = "date_prefix"
+
+_DATE_PREFIX_PATTERN = re.compile(r"^uploads/(\d{4}/\d{2}/\d{2})/")
+
+Totals = Dict[Tuple[str, str], List[int]]
+
+
+def date_prefix_for(key: str) -> str:
+    match = _DATE_PREFIX_PATTERN.match(key)
+    return match.group(1) if match else "other"
+
+
+def _dimensions(key: str, content_type: Optional[str]) -> List[Tuple[str, str]]:
+    dimensions = [(TOTAL, ""), (DATE_PREFIX, date_prefix_for(key))]
+    if content_type is not None:
+        dimensions.append((CONTENT_TYPE, content_type))
+    return dimensions
+
+
+async def _has_total(session: AsyncSession, bucket: str) -> bool:
+    query = select(StorageUsageRollup.id).where(StorageUsageRollup.bucket == bucket, StorageUsageRollup.dimension == TOTAL)
+    return (await session.execute(query.limit(1))).first() is not None
+
+
+async def _lock_bucket(session: AsyncSession, bucket: str) -> None:
+    # Transaction-scoped, so it is released by the caller's commit or rollback.
+    await session.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"storage_usage:{bucket}"))))
+
+
+async def _seed_if_missing(session: AsyncSession, bucket: str) -> bool:
+    """Build the bucket's rollups from ``file_objects`` if they were never built.
+
+    Runs under a per-bucket lock so concurrent first writers seed once.
+    Pending changes are flushed first, so a ``True`` result means the
+    rollups already include them.
+    """
+    if await _has_total(session, bucket):
+        return False
+    await session.flush()
+    await _lock_bucket(session, bucket)
+    if await _has_total(session, bucket):
+        return False
+    await _replace_rollups(session, bucket, await _file_object_totals(session, bucket))
+    return True
+
+
+def _contribution(size_bytes: Optional[int], etag: Optional[str]) -> Tuple[int, int]:
+    # A presigned upload has no etag until the object is confirmed, so it is not counted yet.
+    return (1, size_bytes or 0) if etag is not None else (0, 0)
+
+
+def add_change(
+    deltas: Totals,
+    key: str,
+    content_type: Optional[str],
+    old: Tuple[Optional[int], Optional[str]],
+    new: Tuple[Optional[int], Optional[str]],
+) -> None:
+    """Accumulate into ``deltas`` the change from one ``(size_bytes, etag)`` state of a file to another."""
+    (old_count, old_size), (new_count, new_size) = _contribution(*old), _contribution(*new)
+    count, size = new_count - old_count, new_size - old_size
+    if not count and not size:
+        return
+    for dimension in _dimensions(key, content_type):
+        delta = deltas[dimension]
+        delta[0] += count
+        delta[1] += size
+
+
+async def apply_usage_deltas(session: AsyncSession, bucket: str, deltas: Totals) -> None:
+    """Add ``deltas`` built with ``add_change`` to the bucket's rollups.
+
+    Does not commit; callers run it inside the transaction that writes the
+    ``FileObject`` rows so usage and rows move together. The first write for
+    a bucket seeds its rollups from the existing ``file_objects`` instead.
+    """
+    if not deltas or await _seed_if_missing(session, bucket):
+        return
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "bucket": bucket,
+            "dimension": dimension,
+            "value": value,
+            "file_count": count,
+            "total_bytes": size,
+            "updated_at": now,
+        }
+        for (dimension, value), (count, size) in deltas.items()
+    ]
+    statement = pg_insert(StorageUsageRollup).values(rows)
+    statement = statement.on_conflict_do_update(
+        constraint="uq_storage_usage_rollup",
+        set_={
+            "file_count": StorageUsageRollup.file_count + statement.excluded.file_count,
+            "total_bytes": StorageUsageRollup.total_bytes + statement.excluded.total_bytes,
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+    await session.execute(statement)
+
+
+async def apply_usage_delta(session: AsyncSession, record: FileObject, sign: int = 1) -> None:
+    """Add (``sign=1``) or remove (``sign=-1``) ``record`` from the rollups; see ``apply_usage_deltas``."""
+    deltas: Totals = defaultdict(lambda: [0, 0])
+    state, absent = (record.size_bytes, record.etag), (None, None)
+    old, new = (absent, state) if sign > 0 else (state, absent)
+    add_change(deltas, record.key, record.content_type, old, new)
+    await apply_usage_deltas(session, record.bucket, deltas)
+
+
+async def _replace_rollups(session: AsyncSession, bucket: str, totals: Totals) -> None:
+    await session.execute(delete(StorageUsageRollup).where(StorageUsageRollup.bucket == bucket))
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "bucket": bucket,
+            "dimension": dimension,
+            "value": value,
+            "file_count": count,
+            "total_bytes": size,
+            "updated_at": now,
+        }
+        for (dimension, value), (count, size) in totals.items()
+    ]
+    statement = pg_insert(StorageUsageRollup)
+    statement = statement.on_conflict_do_update(
+        constraint="uq_storage_usage_rollup",
+        set_={
+            "file_count": statement.excluded.file_count,
+            "total_bytes": statement.excluded.total_bytes,
+            "updated_at": statement.excluded.updated_at,
+        },
+    )
+    await session.execute(statement, rows)
+
+
+async def _file_object_totals(session: AsyncSession, bucket: str) -> Totals:
+    totals: Totals = defaultdict(lambda: [0, 0])
+    totals[(TOTAL, "")] = [0, 0]
+    live = (FileObject.bucket == bucket, FileObject.deleted_at.is_(None), FileObject.etag.is_not(None))
+    result = await session.execute(
+        select(FileObject.content_type, func.count(), func.coalesce(func.sum(FileObject.size_bytes), 0))
+        .where(*live)
+        .group_by(FileObject.content_type)
+    )
+    for content_type, count, size in result.all():
+        totals[(CONTENT_TYPE, content_type)] = [count, int(size)]
+    prefix = func.coalesce(func.substring(FileObject.key, _DATE_PREFIX_PATTERN.pattern), "other")
+    result = await session.execute(
+        select(prefix, func.count(), func.coalesce(func.sum(FileObject.size_bytes), 0)).where(*live).group_by(prefix)
+    )
+    for value, count, size in result.all():
+        totals[(DATE_PREFIX, value)] = [count, int(size)]
+        totals[(TOTAL, "")][0] += count
+        totals[(TOTAL, "")][1] += int(size)
+    return totals
+
+
+async def read_usage(session: AsyncSession, bucket: str, breakdown: bool = False) -> StorageUsageResponse:
+    if await _seed_if_missing(session, bucket):
+        await session.commit()
+    query = select(StorageUsageRollup).where(StorageUsageRollup.bucket == bucket)
+    if not breakdown:
+        query = query.where(StorageUsageRollup.dimension == TOTAL)
+    rows = (await session.execute(query)).scalars().all()
+
+    response = StorageUsageResponse(total_files=0, total_size=0)
+    for row in rows:
+        if row.dimension == TOTAL:
+            response.total_files = row.file_count
+            response.total_size = row.total_bytes
+            response.updated_at = row.updated_at
+            continue
+        entry = StorageUsageBreakdown(key=row.value, total_files=row.file_count, total_size=row.total_bytes)
+        if row.dimension == CONTENT_TYPE:
+            response.by_content_type.append(entry)
+        elif row.dimension == DATE_PREFIX:
+            response.by_date_prefix.append(entry)
+    response.by_content_type.sort(key=lambda item: item.total_size, reverse=True)
+    response.by_date_prefix.sort(key=lambda item: item.key, reverse=True)
+    return response
+
+
+async def reconcile(session: AsyncSession, bucket: str) -> StorageUsageResponse:
+    """Rebuild the bucket's rollups from live ``file_objects``, correcting any drift in the deltas.
+
+    ``file_objects`` is the single source: S3 listings carry no content type,
+    and differences between the table and the bucket itself are what
+    ``bucket_inventory.py`` reconciles.
+    """
+    await _lock_bucket(session, bucket)
+    await _replace_rollups(session, bucket, await _file_object_totals(session, bucket))
+    await session.commit()
+    return await read_usage(session, bucket, breakdown=True)
+
+
+async def _run_reconcile(interval: Optional[float]) -> None:
+    from db import SessionLocal
+    from storage_service import StorageService
+
+    while True:
+        async with SessionLocal() as session:
+            storage = await StorageService.from_session(session)
+            bucket = storage.credentials.bucket
+            usage = await reconcile(session, bucket)
+            print(f"reconciled {bucket}: {usage.total_files} files, {usage.total_size} bytes")
+        if not interval:
+            return
+        await asyncio.sleep(interval)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Maintain storage usage rollups")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    reconcile_parser = subparsers.add_parser("reconcile", help="Rebuild rollups from file_objects")
+    reconcile_parser.add_argument("--interval", type=float, default=None, help="Repeat every N seconds")
+    args = parser.parse_args(argv)
+
+    if args.command == "reconcile":
+        asyncio.run(_run_reconcile(args.interval))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+os.environ.setdefault("SETTINGS_ENCRYPTION_KEY", "test-settings-key")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
@@ -0,0 +1,78 @@
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from bucket_inventory import Partition, discover_partitions
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeStorage:
+    """Just enough of ``StorageService.list_objects_async`` for partition discovery, paginated like S3."""
+
+    def __init__(self, keys: List[str], page_size: int = 2) -> None:
+        self.keys = sorted(keys)
+        self.page_size = page_size
+
+    async def list_objects_async(
+        self,
+        prefix: Optional[str] = None,
+        max_keys: int = 1000,
+        continuation_token: Optional[str] = None,
+        delimiter: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        prefix = prefix or ""
+        entries: List[Any] = []
+        for key in self.keys:
+            if not key.startswith(prefix):
+                continue
+            rest = key[len(prefix) :]
+            if delimiter and delimiter in rest:
+                common = prefix + rest[: rest.index(delimiter) + 1]
+                if {"Prefix": common} not in entries:
+                    entries.append({"Prefix": common})
+            else:
+                entries.append({"Key": key, "Size": 1})
+        start = int(continuation_token or 0)
+        page = entries[start : start + self.page_size]
+        response: Dict[str, Any] = {
+            "Contents": [entry for entry in page if "Key" in entry],
+            "CommonPrefixes": [entry for entry in page if "Prefix" in entry],
+            "IsTruncated": start + self.page_size < len(entries),
+        }
+        if response["IsTruncated"]:
+            response["NextContinuationToken"] = str(start + self.page_size)
+        return response
+
+
+async def test_partitions_follow_bucket_prefixes():
+    storage = FakeStorage(["loose.txt", "uploads/2024/01/01/a", "uploads/2024/01/02/b", "uploads/2024/02/01/c"])
+
+    partitions = await discover_partitions(storage, depth=4)
+
+    recursive = [partition.prefix for partition in partitions if partition.recursive]
+    assert recursive == ["uploads/2024/01/01/", "uploads/2024/01/02/", "uploads/2024/02/01/"]
+    assert Partition("", recursive=False) in partitions
+    assert Partition("uploads/2024/", recursive=False) in partitions
+
+
+async def test_prefix_emptied_out_of_band_still_gets_a_partition():
+    storage = FakeStorage(["uploads/2024/01/01/a"])
+    # file_objects still has rows under 2024/01/02 and 2023/12/31, but the bucket no longer has those prefixes.
+    tracked = {
+        "uploads/",
+        "uploads/2023/",
+        "uploads/2023/12/",
+        "uploads/2023/12/31/",
+        "uploads/2024/",
+        "uploads/2024/01/",
+        "uploads/2024/01/01/",
+        "uploads/2024/01/02/",
+    }
+
+    partitions = await discover_partitions(storage, depth=4, tracked=tracked)
+
+    recursive = [partition.prefix for partition in partitions if partition.recursive]
+    assert recursive == ["uploads/2023/12/31/", "uploads/2024/01/01/", "uploads/2024/01/02/"]
+    prefixes = [partition.prefix for partition in partitions]
+    assert len(prefixes) == len(set(prefixes))
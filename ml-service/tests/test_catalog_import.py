@@ -0,0 +1,77 @@
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+import catalog_import
+from catalog_import import _row, import_catalog
+from models import Artist, Video
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeSession:
+    """Accepts multi-row inserts, except that any statement carrying a row named ``BAD`` fails like a constraint."""
+
+    def __init__(self) -> None:
+        self.pending = []
+        self.committed = []
+        self.rollbacks = 0
+
+    async def execute(self, statement, rows=None):
+        rows = rows or []
+        if any(row.get("name") == "BAD" for row in rows):
+            raise IntegrityError("INSERT INTO artists", {}, Exception("violates check constraint"))
+        self.pending.extend(rows)
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: [row["id"] for row in rows]))
+
+    async def commit(self) -> None:
+        self.committed.extend(self.pending)
+        self.pending = []
+
+    async def rollback(self) -> None:
+        self.pending = []
+        self.rollbacks += 1
+
+
+async def _chunks(lines):
+    yield "\n".join(lines).encode()
+
+
+async def _no_rebuild(session) -> None:
+    return None
+
+
+def test_explicit_nulls_take_callable_and_scalar_defaults():
+    now = datetime.utcnow()
+
+    video = _row(Video.__table__, {"title": "Set", "slug": "set", "metadata": None}, now)
+    artist = _row(Artist.__table__, {"name": "A", "slug": "a", "is_active": None, "bio": None}, now)
+
+    assert video["metadata"] == {}
+    assert artist["is_active"] is True
+    assert artist["bio"] is None
+
+
+async def test_rejected_batch_reports_only_the_offending_rows(monkeypatch):
+    monkeypatch.setattr(catalog_import, "rebuild_index", _no_rebuild)
+    session = FakeSession()
+    lines = [
+        json.dumps({"name": "One", "slug": "one", "is_active": None}),
+        "{not json",
+        json.dumps({"name": "BAD", "slug": "bad"}),
+        json.dumps({"slug": "nameless"}),
+        json.dumps({"name": "Two", "slug": "two"}),
+    ]
+
+    report = await import_catalog(session, "artists", "ndjson", _chunks(lines), batch_size=10, max_errors=10)
+
+    result = report.as_dict()
+    assert (result["processed"], result["created"], result["failed"]) == (5, 2, 3)
+    assert [error["line"] for error in result["errors"]] == [2, 3, 4]
+    assert result["errors"][1]["slug"] == "bad"
+    assert "violates check constraint" in result["errors"][1]["error"]
+    assert sorted(row["slug"] for row in session.committed) == ["one", "two"]
+    assert session.rollbacks == 2
@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+from fastapi import Response
+from starlette.requests import Request
+
+from etag import check_not_modified, compute_etag, page_validator
+
+NOW = datetime(2026, 1, 1)
+
+
+def rows(count: int):
+    return [SimpleNamespace(id=uuid4(), updated_at=NOW) for _ in range(count)]
+
+
+def request(if_none_match: str | None = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/api/artists", "query_string": b"", "headers": headers})
+
+
+def test_page_validator_tracks_the_rendered_page():
+    page = rows(3)
+    base = compute_etag(*page_validator(page, 3, None))
+
+    edited = [*page[:2], SimpleNamespace(id=page[2].id, updated_at=NOW + timedelta(seconds=1))]
+    assert compute_etag(*page_validator(edited, 3, None)) != base
+    assert compute_etag(*page_validator(page[:2], 2, None)) != base
+    assert compute_etag(*page_validator(page, 4, None)) != base
+    assert compute_etag(*page_validator(page, None, None)) != base
+    assert compute_etag(*page_validator(page, 3, None)) == base
+
+
+def test_matching_etag_answers_304_with_headers():
+    validator = page_validator(rows(2), 2, None)
+    first = Response()
+    assert check_not_modified(request(), first, *validator) is None
+
+    again = check_not_modified(request(first.headers["ETag"]), Response(), *validator)
+    assert again.status_code == 304
+    assert again.headers["ETag"] == first.headers["ETag"]
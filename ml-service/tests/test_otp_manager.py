@@ -0,0 +1,86 @@
+import fakeredis
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import otp_manager
+import otp_store
+from otp_store import CHECK, EXPIRED, ISSUED, NOT_FOUND, InMemoryOTPStore, RedisOTPStore
+
+pytestmark = pytest.mark.anyio
+
+PHONE = "+15551234567"
+
+
+class FailingSession:
+    def __init__(self) -> None:
+        self.rolled_back = False
+
+    async def commit(self) -> None:
+        raise OperationalError("COMMIT", {}, Exception("connection lost"))
+
+    async def rollback(self) -> None:
+        self.rolled_back = True
+
+
+async def _enqueue(*args, **kwargs) -> None:
+    return None
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request, monkeypatch):
+    if request.param == "memory":
+        store = InMemoryOTPStore()
+    else:
+        server = fakeredis.FakeServer()
+        monkeypatch.setattr(
+            otp_store.redis_asyncio,
+            "from_url",
+            lambda url, **kwargs: fakeredis.aioredis.FakeRedis(server=server, decode_responses=True),
+        )
+        store = RedisOTPStore("redis://stand-in")
+    monkeypatch.setattr(otp_manager, "get_otp_store", lambda: store)
+    monkeypatch.setattr(otp_manager, "enqueue_otp", _enqueue)
+    monkeypatch.setattr(otp_manager, "record_otp_event", lambda *args, **kwargs: None)
+    return store
+
+
+async def test_failed_outbox_commit_gives_the_send_back(store):
+    session = FailingSession()
+
+    with pytest.raises(OperationalError):
+        await otp_manager.send_otp(session, PHONE, "sms")
+
+    assert session.rolled_back
+    state = await store.get(PHONE)
+    assert state.send_count == 0
+    assert state.last_sent_at is None
+    assert (await store.reserve_attempt(PHONE)).status == EXPIRED
+    retry = await store.issue(PHONE, "hash", "salt", "sms")
+    assert retry.status == ISSUED
+
+
+async def test_revoke_leaves_a_newer_code_alone(store):
+    await store.issue(PHONE, "old-hash", "old-salt", "sms")
+    await store.revoke(PHONE, "other-salt")
+
+    state = await store.get(PHONE)
+    assert state.send_count == 1
+    assert state.code_salt == "old-salt"
+    assert (await store.reserve_attempt(PHONE)).status == CHECK
+
+
+async def test_revoke_without_state_is_a_no_op(store):
+    await store.revoke(PHONE, "salt")
+
+    assert (await store.reserve_attempt(PHONE)).status == NOT_FOUND
+
+
+def test_memory_store_is_refused_in_production(monkeypatch):
+    monkeypatch.setattr(otp_store.settings, "otp_store_backend", "memory")
+    monkeypatch.setattr(otp_store.settings, "app_env", "production")
+    otp_store.get_otp_store.cache_clear()
+    try:
+        with pytest.raises(RuntimeError):
+            otp_store.get_otp_store()
+    finally:
+        otp_store.get_otp_store.cache_clear()
@@ -0,0 +1,79 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+import db
+import otp_outbox
+from otp_outbox import FINISHED, prune_outbox
+
+pytestmark = pytest.mark.anyio
+
+
+class RecordingSession:
+    def __init__(self, rowcount: int) -> None:
+        self.rowcount = rowcount
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(rowcount=self.rowcount)
+
+    async def commit(self) -> None:
+        self.commits += 1
+
+
+async def test_prune_deletes_one_batch_of_old_finished_rows():
+    session = RecordingSession(rowcount=3)
+    before = otp_outbox._now()
+
+    assert await prune_outbox(session, retention_seconds=3600, batch_size=500) == 3
+
+    compiled = session.statements[0].compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+    assert sql.startswith("DELETE FROM otp_outbox")
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    params = compiled.params
+    assert 500 in params.values()
+    assert list(FINISHED) in params.values()
+    cutoff = next(value for value in params.values() if hasattr(value, "tzinfo"))
+    assert before - timedelta(seconds=3601) < cutoff <= otp_outbox._now() - timedelta(seconds=3600)
+    assert session.commits == 1
+
+
+async def test_worker_keeps_pruning_while_batches_come_back_full(monkeypatch):
+    monkeypatch.setattr(otp_outbox.settings, "otp_outbox_prune_batch_size", 10)
+    monkeypatch.setattr(otp_outbox.settings, "otp_outbox_prune_interval_seconds", 300)
+    pruned = [10, 10, 4]
+    prunes = []
+    passes = 0
+
+    @asynccontextmanager
+    async def session_local():
+        yield None
+
+    async def process_batch(session, batch_size, concurrency):
+        nonlocal passes
+        passes += 1
+        if passes > 4:
+            raise asyncio.CancelledError
+        return 0
+
+    async def prune(session, retention_seconds, batch_size):
+        prunes.append(batch_size)
+        return pruned.pop(0)
+
+    monkeypatch.setattr(db, "SessionLocal", session_local)
+    monkeypatch.setattr(otp_outbox, "process_batch", process_batch)
+    monkeypatch.setattr(otp_outbox, "prune_outbox", prune)
+
+    with pytest.raises(asyncio.CancelledError):
+        await otp_outbox.run_worker(concurrency=1, batch_size=5, poll_interval=0.01)
+
+    # Two full prune batches run back to back; the short third one waits for the interval.
+    assert prunes == [10, 10, 10]
+    assert passes == 5
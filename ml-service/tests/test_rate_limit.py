@@ -0,0 +1,174 @@
+import asyncio
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+import config
+import dependencies
+import rate_limit
+from dependencies import RateLimit
+from rate_limit import InMemoryRateLimitBackend, RedisRateLimitBackend
+
+pytestmark = pytest.mark.anyio
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=clock.monotonic))
+    return clock
+
+
+def redis_backend(monkeypatch, server: fakeredis.FakeServer) -> RedisRateLimitBackend:
+    monkeypatch.setattr(
+        rate_limit.redis_asyncio, "from_url", lambda url, **kwargs: fakeredis.aioredis.FakeRedis(server=server)
+    )
+    return RedisRateLimitBackend("redis://stand-in", fallback=InMemoryRateLimitBackend(max_keys=10))
+
+
+async def test_redis_bucket_drains_and_refills(monkeypatch):
+    backend = redis_backend(monkeypatch, fakeredis.FakeServer())
+
+    first = await backend.hit("client", limit=2, window=0.5)
+    second = await backend.hit("client", limit=2, window=0.5)
+    denied = await backend.hit("client", limit=2, window=0.5)
+
+    assert (first.allowed, first.remaining) == (True, 1)
+    assert (second.allowed, second.remaining) == (True, 0)
+    assert not denied.allowed
+    assert 0 < denied.retry_after <= 0.25
+
+    await asyncio.sleep(0.3)
+    refilled = await backend.hit("client", limit=2, window=0.5)
+    assert refilled.allowed
+
+
+async def test_redis_bucket_charges_cost(monkeypatch):
+    backend = redis_backend(monkeypatch, fakeredis.FakeServer())
+
+    charged = await backend.hit("client", limit=10, window=60, cost=4)
+    too_expensive = await backend.hit("client", limit=10, window=60, cost=7)
+    cheap = await backend.hit("client", limit=10, window=60, cost=6)
+
+    assert (charged.allowed, charged.remaining) == (True, 6)
+    assert not too_expensive.allowed
+    assert (cheap.allowed, cheap.remaining) == (True, 0)
+
+
+async def test_redis_buckets_are_shared_between_backends(monkeypatch):
+    server = fakeredis.FakeServer()
+    one, other = redis_backend(monkeypatch, server), redis_backend(monkeypatch, server)
+
+    await one.hit("client", limit=1, window=60)
+
+    assert not (await other.hit("client", limit=1, window=60)).allowed
+
+
+async def test_redis_outage_fails_open_to_memory(monkeypatch):
+    server = fakeredis.FakeServer()
+    server.connected = False
+    backend = redis_backend(monkeypatch, server)
+
+    result = await backend.hit("client", limit=2, window=60)
+
+    assert (result.allowed, result.remaining) == (True, 1)
+    assert list(backend.fallback._buckets) == ["client"]
+
+
+async def test_memory_evicts_least_recently_used_at_max_keys(clock):
+    backend = InMemoryRateLimitBackend(max_keys=2)
+
+    await backend.hit("a", limit=5, window=60)
+    await backend.hit("b", limit=5, window=60)
+    await backend.hit("a", limit=5, window=60)
+    await backend.hit("c", limit=5, window=60)
+
+    assert list(backend._buckets) == ["a", "c"]
+
+
+async def test_memory_drops_buckets_idle_for_a_window(clock):
+    backend = InMemoryRateLimitBackend(max_keys=10)
+
+    await backend.hit("idle", limit=1, window=60)
+    clock.now += 30
+    await backend.hit("active", limit=1, window=60)
+    clock.now += 31
+    await backend.hit("active", limit=1, window=60)
+
+    assert list(backend._buckets) == ["active"]
+
+
+async def test_memory_bucket_refills_with_time(clock):
+    backend = InMemoryRateLimitBackend(max_keys=10)
+
+    await backend.hit("client", limit=2, window=60)
+    await backend.hit("client", limit=2, window=60)
+    assert not (await backend.hit("client", limit=2, window=60)).allowed
+
+    clock.now += 30
+    assert (await backend.hit("client", limit=2, window=60)).allowed
+
+
+def test_rate_limit_headers(monkeypatch):
+    backend = InMemoryRateLimitBackend(max_keys=10)
+    monkeypatch.setattr(dependencies, "get_rate_limit_backend", lambda: backend)
+    app = FastAPI()
+
+    @app.get("/limited", dependencies=[Depends(RateLimit("test", limit=2, window=60))])
+    async def limited() -> dict:
+        return {}
+
+    client = TestClient(app)
+    first, second, denied = (client.get("/limited") for _ in range(3))
+
+    assert first.status_code == 200
+    assert first.headers["X-RateLimit-Limit"] == "2"
+    assert first.headers["X-RateLimit-Remaining"] == "1"
+    assert second.headers["X-RateLimit-Remaining"] == "0"
+    assert denied.status_code == 429
+    assert denied.headers["X-RateLimit-Remaining"] == "0"
+    assert int(denied.headers["Retry-After"]) >= 1
+    assert int(denied.headers["X-RateLimit-Reset"]) >= 1
+
+
+def _redis_env(monkeypatch, **values: str) -> None:
+    monkeypatch.delenv("REDIS_URL", raising=False)
+    for name in ("REDIS_HOST", "REDIS_PORT", "REDIS_PASSWORD", "REDIS_DB", "REDIS_TLS"):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in values.items():
+        monkeypatch.setenv(name, value)
+
+
+def test_redis_backend_authenticates_with_redis_password(monkeypatch):
+    _redis_env(
+        monkeypatch, RATE_LIMIT_BACKEND="redis", REDIS_HOST="cache", REDIS_PORT="6380", REDIS_PASSWORD="p@ss/word", REDIS_DB="2"
+    )
+    monkeypatch.setattr(rate_limit, "settings", config.Settings())
+    rate_limit.get_rate_limit_backend.cache_clear()
+    try:
+        backend = rate_limit.get_rate_limit_backend()
+    finally:
+        rate_limit.get_rate_limit_backend.cache_clear()
+
+    options = backend.client.connection_pool.connection_kwargs
+    assert isinstance(backend, RedisRateLimitBackend)
+    assert (options["host"], options["port"], options["db"], options["password"]) == ("cache", 6380, 2, "p@ss/word")
+
+
+def test_redis_url_uses_tls_and_yields_to_an_explicit_url(monkeypatch):
+    _redis_env(monkeypatch, REDIS_TLS="true")
+    assert config.Settings().redis_url == "rediss://redis:6379/0"
+
+    monkeypatch.setenv("REDIS_URL", "redis://:other@elsewhere:6379/5")
+    assert config.Settings().redis_url == "redis://:other@elsewhere:6379/5"
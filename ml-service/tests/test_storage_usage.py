@@ -0,0 +1,50 @@
+from collections import defaultdict
+
+import pytest
+
+from models import FileObject
+from storage_usage import CONTENT_TYPE, DATE_PREFIX, TOTAL, add_change, apply_usage_delta
+
+pytestmark = pytest.mark.anyio
+
+KEY = "uploads/2026/10/17/clip.mp4"
+
+
+def _deltas():
+    return defaultdict(lambda: [0, 0])
+
+
+def test_unconfirmed_upload_is_not_counted():
+    deltas = _deltas()
+
+    add_change(deltas, KEY, "video/mp4", (None, None), (500, None))
+
+    assert not deltas
+
+
+def test_confirmation_counts_the_real_size():
+    deltas = _deltas()
+
+    add_change(deltas, KEY, "video/mp4", (500, None), (320, "abc"))
+
+    assert deltas == {(TOTAL, ""): [1, 320], (DATE_PREFIX, "2026/10/17"): [1, 320], (CONTENT_TYPE, "video/mp4"): [1, 320]}
+
+
+def test_corrected_size_moves_usage_by_the_difference():
+    deltas = _deltas()
+
+    add_change(deltas, KEY, "video/mp4", (500, "abc"), (320, "def"))
+    add_change(deltas, KEY, "video/mp4", (100, "abc"), (100, "def"))
+
+    assert deltas[(TOTAL, "")] == [0, -180]
+
+
+async def test_presigned_record_leaves_the_rollups_alone():
+    class Untouchable:
+        async def execute(self, *args, **kwargs):
+            raise AssertionError("no rollup write expected")
+
+    record = FileObject(bucket="media", key=KEY, file_name="clip.mp4", content_type="video/mp4", size_bytes=500)
+
+    await apply_usage_delta(Untouchable(), record)
+    await apply_usage_delta(Untouchable(), record, sign=-1)
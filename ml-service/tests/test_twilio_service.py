@@ -0,0 +1,195 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+import twilio_service
+from twilio_service import CircuitBreaker, TwilioCredentials, TwilioTransport
+
+pytestmark = pytest.mark.anyio
+
+CREDENTIALS = TwilioCredentials(
+    account_sid="AC123",
+    auth_token="secret",
+    from_number="+15550000000",
+    verify_service_sid=None,
+    otp_template="Your code is {{code}}",
+)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(twilio_service, "time", SimpleNamespace(monotonic=clock.monotonic, perf_counter=time.perf_counter))
+    return clock
+
+
+class FakeTwilio:
+    """``httpx.MockTransport`` handler answering with queued status codes and counting calls."""
+
+    def __init__(self) -> None:
+        self.statuses = []
+        self.calls = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        status_code = self.statuses.pop(0) if self.statuses else 201
+        return httpx.Response(status_code, json={"sid": "SM1", "message": f"status {status_code}"})
+
+
+def transport_for(handler, threshold: int = 2, reset: float = 30) -> TwilioTransport:
+    transport = TwilioTransport(CREDENTIALS, "https://api.twilio.test")
+    transport.client = httpx.AsyncClient(base_url="https://api.twilio.test", transport=httpx.MockTransport(handler))
+    transport.breaker = CircuitBreaker(failure_threshold=threshold, reset_timeout=reset)
+    return transport
+
+
+async def send(transport: TwilioTransport) -> int:
+    try:
+        await transport.create("Messages", {"To": "+15551234567", "Body": "hi"})
+    except HTTPException as exc:
+        return exc.status_code
+    return 200
+
+
+async def test_breaker_opens_after_consecutive_failures(clock):
+    twilio = FakeTwilio()
+    twilio.statuses = [500, 503]
+    transport = transport_for(twilio)
+
+    assert [await send(transport), await send(transport)] == [502, 502]
+    assert transport.breaker.state == "open"
+    assert await send(transport) == 503
+    assert twilio.calls == 2
+
+
+async def test_client_errors_do_not_trip_the_breaker(clock):
+    twilio = FakeTwilio()
+    twilio.statuses = [400, 400, 400]
+    transport = transport_for(twilio)
+
+    for _ in range(3):
+        assert await send(transport) == 502
+    assert transport.breaker.state == "closed"
+
+
+async def test_half_open_trial_success_closes(clock):
+    twilio = FakeTwilio()
+    twilio.statuses = [500, 500]
+    transport = transport_for(twilio)
+    await send(transport)
+    await send(transport)
+
+    clock.now += 30
+    assert transport.breaker.state == "half_open"
+    assert await send(transport) == 200
+    assert transport.breaker.state == "closed"
+    assert await send(transport) == 200
+
+
+async def test_half_open_trial_failure_reopens(clock):
+    twilio = FakeTwilio()
+    twilio.statuses = [500, 500, 500]
+    transport = transport_for(twilio)
+    await send(transport)
+    await send(transport)
+
+    clock.now += 30
+    assert await send(transport) == 502
+    assert transport.breaker.state == "open"
+    assert await send(transport) == 503
+
+
+async def test_half_open_admits_a_single_trial(clock):
+    release = asyncio.Event()
+    calls = 0
+
+    async def slow(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if calls <= 2:
+            return httpx.Response(500, json={})
+        await release.wait()
+        return httpx.Response(201, json={})
+
+    transport = transport_for(slow)
+    await send(transport)
+    await send(transport)
+    clock.now += 30
+
+    trial = asyncio.create_task(send(transport))
+    await asyncio.sleep(0)
+    assert await send(transport) == 503
+    release.set()
+    assert await trial == 200
+    assert transport.breaker.state == "closed"
+
+
+async def test_cancelled_trial_does_not_wedge_the_breaker(clock):
+    calls = 0
+
+    async def hang_once(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if calls <= 2:
+            return httpx.Response(500, json={})
+        if calls == 3:
+            await asyncio.Event().wait()
+        return httpx.Response(201, json={})
+
+    transport = transport_for(hang_once)
+    await send(transport)
+    await send(transport)
+    clock.now += 30
+
+    trial = asyncio.create_task(send(transport))
+    await asyncio.sleep(0)
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+
+    assert transport.breaker.state == "half_open"
+    assert await send(transport) == 200
+    assert transport.breaker.state == "closed"
+
+
+async def test_cancellation_is_not_counted_as_a_failure(clock):
+    async def hang(request: httpx.Request) -> httpx.Response:
+        await asyncio.Event().wait()
+
+    transport = transport_for(hang)
+    transport.breaker.failures = 1
+
+    call = asyncio.create_task(send(transport))
+    await asyncio.sleep(0)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+
+    assert transport.breaker.failures == 1
+    assert transport.breaker.state == "closed"
+
+
+async def test_replaced_transports_are_closed(monkeypatch):
+    monkeypatch.setattr(twilio_service, "_transports", {})
+    monkeypatch.setattr(twilio_service, "_transport_version", None)
+
+    old = twilio_service._transport_for(CREDENTIALS, version=1)
+    new = twilio_service._transport_for(CREDENTIALS, version=2)
+
+    assert new is not old
+    assert twilio_service._closing
+    await twilio_service.close_transports()
+    assert old.client.is_closed and new.client.is_closed
+    assert not twilio_service._closing
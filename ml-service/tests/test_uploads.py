@@ -0,0 +1,54 @@
+import pytest
+from fastapi import HTTPException
+from starlette.requests import ClientDisconnect
+
+from routers.uploads import _open_multipart_file
+
+pytestmark = pytest.mark.anyio
+
+BOUNDARY = b"xyz"
+HEAD = (
+    b"--xyz\r\n"
+    b'Content-Disposition: form-data; name="file"; filename="clip.mp4"\r\n'
+    b"Content-Type: video/mp4\r\n\r\n"
+)
+
+
+class FakeRequest:
+    def __init__(self, *chunks: bytes, disconnect: bool = False) -> None:
+        self.chunks = chunks
+        self.disconnect = disconnect
+
+    async def stream(self):
+        for chunk in self.chunks:
+            yield chunk
+        if self.disconnect:
+            raise ClientDisconnect()
+
+
+async def _read(chunks) -> bytes:
+    return b"".join([chunk async for chunk in chunks])
+
+
+async def test_complete_part_is_streamed():
+    name, content_type, chunks = await _open_multipart_file(
+        FakeRequest(HEAD, b"abc", b"def\r\n--xyz--\r\n"), BOUNDARY
+    )
+
+    assert (name, content_type) == ("clip.mp4", "video/mp4")
+    assert await _read(chunks) == b"abcdef"
+
+
+async def test_body_ending_before_the_closing_boundary_is_rejected():
+    _, _, chunks = await _open_multipart_file(FakeRequest(HEAD, b"abc"), BOUNDARY)
+
+    with pytest.raises(HTTPException) as raised:
+        await _read(chunks)
+    assert raised.value.status_code == 400
+    assert "closing boundary" in raised.value.detail
+
+
+async def test_disconnect_while_reading_part_headers_is_a_400():
+    with pytest.raises(HTTPException) as raised:
+        await _open_multipart_file(FakeRequest(HEAD[:20], disconnect=True), BOUNDARY)
+    assert raised.value.status_code == 400
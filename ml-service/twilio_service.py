@@ -1,19 +1,22 @@
 from __future__ import annotations
 
+import asyncio
 import os
+import time
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Dict, Optional, Set
 
+import httpx
 from fastapi import HTTPException, status
 
-from twilio.base.exceptions import TwilioException
-from twilio.rest import Client as TwilioClient
+from config import get_settings
+from metrics import TWILIO_REQUEST_DURATION, TWILIO_REQUESTS
+from services import cached_settings
 
-from models import SettingsVersion
-from services import latest_settings, decrypt_settings
+settings = get_settings()
 
 
-@dataclass
+@dataclass(frozen=True)
 class TwilioCredentials:
     account_sid: str
     auth_token: str
@@ -22,16 +25,159 @@ class TwilioCredentials:
     otp_template: str
 
 
+class CircuitBreaker:
+    """Consecutive-failure breaker: open after ``failure_threshold`` failures,
+    then let a single trial request through once ``reset_timeout`` has passed."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Free the half-open trial slot of a call that ended without a verdict on Twilio's health."""
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+class TwilioTransport:
+    """Pooled async client for the Twilio REST API guarded by a circuit breaker.
+
+    Timeouts, connection errors, 429s and 5xx responses count as failures;
+    other 4xx responses mean Twilio is healthy and rejected the request.
+    """
+
+    def __init__(self, credentials: TwilioCredentials, base_url: str) -> None:
+        self.credentials = credentials
+        self.breaker = CircuitBreaker(settings.twilio_circuit_failure_threshold, settings.twilio_circuit_reset_seconds)
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            auth=(credentials.account_sid, credentials.auth_token),
+            timeout=httpx.Timeout(settings.twilio_timeout_seconds, connect=settings.twilio_connect_timeout_seconds),
+            limits=httpx.Limits(
+                max_connections=settings.twilio_max_connections,
+                max_keepalive_connections=settings.twilio_max_connections,
+            ),
+        )
+
+    async def create(self, resource: str, data: Dict[str, str]) -> Dict[str, Any]:
+        if not self.breaker.allow():
+            TWILIO_REQUESTS.inc((resource, "circuit_open"))
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Twilio is unavailable; delivery paused until it recovers",
+            )
+        path = f"/2010-04-01/Accounts/{self.credentials.account_sid}/{resource}.json"
+        started = time.perf_counter()
+        try:
+            response = await self.client.post(path, data=data)
+        except httpx.TimeoutException as exc:
+            self.breaker.record_failure()
+            TWILIO_REQUESTS.inc((resource, "timeout"))
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Twilio request timed out") from exc
+        except httpx.HTTPError as exc:
+            self.breaker.record_failure()
+            TWILIO_REQUESTS.inc((resource, "connection_error"))
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Twilio connection failed: {exc}") from exc
+        except BaseException:
+            # Cancellation (shutdown, a cancelled worker) says nothing about Twilio, so it is not a
+            # failure; it only must not leave a half-open trial in flight forever.
+            self.breaker.release_trial()
+            TWILIO_REQUESTS.inc((resource, "aborted"))
+            raise
+        finally:
+            TWILIO_REQUEST_DURATION.observe(time.perf_counter() - started, (resource,))
+
+        if response.status_code == 429 or response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        TWILIO_REQUESTS.inc((resource, "error" if response.is_error else "success"))
+        if response.is_error:
+            try:
+                message = response.json().get("message")
+            except ValueError:
+                message = None
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Twilio delivery failed: {message or f'HTTP {response.status_code}'}",
+            )
+        return response.json()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+_transports: Dict[TwilioCredentials, TwilioTransport] = {}
+_transport_version: Optional[int] = None
+# Closes of replaced transports still running; held so the tasks are not garbage-collected mid-close.
+_closing: Set["asyncio.Task[None]"] = set()
+
+
+def _transport_for(credentials: TwilioCredentials, version: int) -> TwilioTransport:
+    """Return the shared transport for ``credentials``, rebuilt when the settings version moves."""
+    global _transport_version
+    if _transport_version != version:
+        for transport in _transports.values():
+            task = asyncio.get_running_loop().create_task(transport.aclose())
+            _closing.add(task)
+            task.add_done_callback(_closing.discard)
+        _transports.clear()
+        _transport_version = version
+    transport = _transports.get(credentials)
+    if transport is None:
+        transport = _transports[credentials] = TwilioTransport(credentials, settings.twilio_api_base_url)
+    return transport
+
+
+async def close_transports() -> None:
+    transports = list(_transports.values())
+    _transports.clear()
+    for transport in transports:
+        await transport.aclose()
+    if _closing:
+        await asyncio.gather(*_closing, return_exceptions=True)
+
+
 class TwilioOTPService:
-    def __init__(self, credentials: TwilioCredentials) -> None:
+    def __init__(self, credentials: TwilioCredentials, version: int = 0) -> None:
         self.credentials = credentials
-        self.client = TwilioClient(credentials.account_sid, credentials.auth_token)
+        self.transport = _transport_for(credentials, version)
 
     @classmethod
     async def from_session(cls, session) -> "TwilioOTPService":
-        record: Optional[SettingsVersion] = await latest_settings(session)
-        if record:
-            config = decrypt_settings(record)
+        cached = await cached_settings(session)
+        if cached.payload:
+            config = cached.payload
             credentials = TwilioCredentials(
                 account_sid=config.twilio.account_sid,
                 auth_token=config.twilio.auth_token,
@@ -39,7 +185,7 @@ class TwilioOTPService:
                 verify_service_sid=config.twilio.verify_service_sid,
                 otp_template=config.twilio.otp_template,
             )
-            return cls(credentials)
+            return cls(credentials, cached.version)
 
         # Fallback to environment variables
         account_sid = os.getenv("TWILIO_ACCOUNT_SID")
@@ -55,26 +201,13 @@ class TwilioOTPService:
             verify_service_sid=verify_sid,
             otp_template=os.getenv("TWILIO_OTP_TEMPLATE", "Your ComedyInsight verification code is {{code}}"),
         )
-        return cls(credentials)
+        return cls(credentials, cached.version)
 
     async def send_code(self, phone_number: str, code: str, method: str = "sms") -> None:
-        message = self.credentials.otp_template.replace("{{code}}", " ".join(code))
-        try:
-            if method == "voice":
-                twiml = f"<Response><Say voice='alice'>{message}</Say></Response>"
-                self.client.calls.create(
-                    to=phone_number,
-                    from_=self.credentials.from_number,
-                    twiml=twiml,
-                )
-            else:
-                self.client.messages.create(
-                    to=phone_number,
-                    from_=self.credentials.from_number,
-                    body=self.credentials.otp_template.replace("{{code}}", code),
-                )
-        except TwilioException as exc:
-            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Twilio delivery failed: {exc.msg}") from exc
-        except Exception as exc:  # noqa: BLE001
-            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=f"Unexpected Twilio error: {exc}") from exc
-
+        if method == "voice":
+            message = self.credentials.otp_template.replace("{{code}}", " ".join(code))
+            twiml = f"<Response><Say voice='alice'>{message}</Say></Response>"
+            await self.transport.create("Calls", {"To": phone_number, "From": self.credentials.from_number, "Twiml": twiml})
+        else:
+            body = self.credentials.otp_template.replace("{{code}}", code)
+            await self.transport.create("Messages", {"To": phone_number, "From": self.credentials.from_number, "Body": body})
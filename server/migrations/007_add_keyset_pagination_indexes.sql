@@ -0,0 +1,20 @@
+-- Migration: Add composite indexes for keyset pagination
+-- Description: Back the (created_at, id) cursor used by the ml-service list endpoints
+
+CREATE INDEX IF NOT EXISTS ix_users_created_at_id ON users(created_at, id);
+CREATE INDEX IF NOT EXISTS ix_artists_created_at_id ON artists(created_at, id);
+CREATE INDEX IF NOT EXISTS ix_categories_created_at_id ON categories(created_at, id);
+CREATE INDEX IF NOT EXISTS ix_videos_created_at_id ON videos(created_at, id);
+
+-- ============================================================================
+-- ROLLBACK SECTION
+-- ============================================================================
+
+/*
+-- ROLLBACK: Remove keyset pagination indexes
+
+DROP INDEX IF EXISTS ix_videos_created_at_id;
+DROP INDEX IF EXISTS ix_categories_created_at_id;
+DROP INDEX IF EXISTS ix_artists_created_at_id;
+DROP INDEX IF EXISTS ix_users_created_at_id;
+*/
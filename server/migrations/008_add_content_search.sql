@@ -0,0 +1,50 @@
+-- Migration: Add full-text and trigram search for the content catalog
+-- Description: Generated tsvector columns with GIN indexes back ranked search;
+-- pg_trgm indexes give typo tolerance and also serve the ILIKE filters on the list endpoints
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE videos ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B')
+) STORED;
+
+ALTER TABLE artists ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(bio, '')), 'C')
+) STORED;
+
+ALTER TABLE categories ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('english', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce(description, '')), 'B')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS ix_videos_search_vector ON videos USING GIN(search_vector);
+CREATE INDEX IF NOT EXISTS ix_artists_search_vector ON artists USING GIN(search_vector);
+CREATE INDEX IF NOT EXISTS ix_categories_search_vector ON categories USING GIN(search_vector);
+
+CREATE INDEX IF NOT EXISTS ix_videos_title_trgm ON videos USING GIN(title gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_artists_name_trgm ON artists USING GIN(name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_artists_slug_trgm ON artists USING GIN(slug gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_categories_name_trgm ON categories USING GIN(name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS ix_categories_slug_trgm ON categories USING GIN(slug gin_trgm_ops);
+
+-- ============================================================================
+-- ROLLBACK SECTION
+-- ============================================================================
+
+/*
+-- ROLLBACK: Remove content search columns and indexes
+
+DROP INDEX IF EXISTS ix_categories_slug_trgm;
+DROP INDEX IF EXISTS ix_categories_name_trgm;
+DROP INDEX IF EXISTS ix_artists_slug_trgm;
+DROP INDEX IF EXISTS ix_artists_name_trgm;
+DROP INDEX IF EXISTS ix_videos_title_trgm;
+DROP INDEX IF EXISTS ix_categories_search_vector;
+DROP INDEX IF EXISTS ix_artists_search_vector;
+DROP INDEX IF EXISTS ix_videos_search_vector;
+ALTER TABLE categories DROP COLUMN IF EXISTS search_vector;
+ALTER TABLE artists DROP COLUMN IF EXISTS search_vector;
+ALTER TABLE videos DROP COLUMN IF EXISTS search_vector;
+*/
@@ -0,0 +1,18 @@
+-- Migration: Add (updated_at, id) indexes to the content catalog
+-- Description: Back the updated_since filter and ordering of the ml-service export endpoints
+
+CREATE INDEX IF NOT EXISTS ix_artists_updated_at_id ON artists(updated_at, id);
+CREATE INDEX IF NOT EXISTS ix_categories_updated_at_id ON categories(updated_at, id);
+CREATE INDEX IF NOT EXISTS ix_videos_updated_at_id ON videos(updated_at, id);
+
+-- ============================================================================
+-- ROLLBACK SECTION
+-- ============================================================================
+
+/*
+-- ROLLBACK: Remove export indexes
+
+DROP INDEX IF EXISTS ix_videos_updated_at_id;
+DROP INDEX IF EXISTS ix_categories_updated_at_id;
+DROP INDEX IF EXISTS ix_artists_updated_at_id;
+*/
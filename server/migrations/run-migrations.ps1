@@ -21,7 +21,10 @@ $MIGRATIONS = @(
   "002_add_fake_views_campaigns.sql",
   "003_add_stripe_columns.sql",
   "004_add_ad_tracking_tables.sql",
-  "005_add_download_encryption_fields.sql"
+  "005_add_download_encryption_fields.sql",
+  "007_add_keyset_pagination_indexes.sql",
+  "008_add_content_search.sql",
+  "009_add_updated_at_indexes.sql"
 )
 
 # Get the directory where this script is located
@@ -36,6 +36,9 @@ MIGRATIONS=(
   "003_add_stripe_columns.sql"
   "004_add_ad_tracking_tables.sql"
   "005_add_download_encryption_fields.sql"
+  "007_add_keyset_pagination_indexes.sql"
+  "008_add_content_search.sql"
+  "009_add_updated_at_indexes.sql"
 )
 
 # Get the directory where this script is located